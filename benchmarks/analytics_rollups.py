@@ -0,0 +1,175 @@
+"""
+Бенчмарк аналитики продаж (AnalyticsService) на локальном PostgreSQL.
+
+Создаёт временные продукты, топпинги, пользователя и N заказов, разложенных по
+дням 2001 года (чтобы не пересекаться с настоящими заказами), пересчитывает
+агрегаты, затем меняет статусы части заказов, добавляет новые и пересчитывает
+их инкрементально. Печатает время пересчётов, чтения из агрегатов и такого же
+запроса напрямую по заказам. Временные данные удаляются в конце.
+
+Правильность агрегатов проверяет tests/test_analytics.py.
+
+Запуск (база из переменных DATABASE_*, схема применена через `python main.py migrate`):
+    python -m benchmarks.analytics_rollups --orders 20000
+"""
+import argparse
+import asyncio
+import random
+import time
+import uuid
+from datetime import date, datetime, time as day_time, timedelta
+from typing import Dict, List
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import delete, func, insert, select, update
+
+from src.db import Category, Order, OrderItem, OrderItemTopping, Product, Topping, User
+from src.db.db import async_session_maker, engine
+from src.db.unit_of_work import UnitOfWork
+from src.repositories.analytics import SALES_STATUSES, AnalyticsRepository
+from src.services.analytics import AnalyticsService
+from src.utils.config import settings
+from src.utils.enums import DeliveryType, OrderStatus
+
+FIRST_DAY = date(2001, 1, 1)
+PRODUCTS = 30
+TOPPINGS = 5
+
+
+def build_orders(count: int, days: int, user_id: int, products: Dict[int, int], toppings: Dict[int, int]) -> List[dict]:
+    zone = ZoneInfo(settings.analytics.TIMEZONE)
+    orders = []
+    for _ in range(count):
+        day = FIRST_DAY + timedelta(days=random.randrange(days))
+        # Часть заказов -- около полуночи, чтобы проверить раскладку по дням в часовом поясе
+        seconds = random.choice([random.randrange(86400), random.randrange(60), 86400 - 1 - random.randrange(60)])
+        items = []
+        for product_id in random.sample(list(products), random.randint(1, 4)):
+            item_toppings = random.sample(list(toppings), random.choice([0, 0, 1, 2]))
+            items.append({
+                "product_id": product_id,
+                "quantity": random.randint(1, 3),
+                "price": products[product_id],
+                "toppings": [{"topping_id": topping_id, "price": toppings[topping_id]} for topping_id in item_toppings],
+            })
+        orders.append({
+            "user_id": user_id,
+            "created_at": datetime.combine(day, day_time(), zone) + timedelta(seconds=seconds),
+            "status": random.choice(list(OrderStatus)),
+            "delivery_type": random.choice(list(DeliveryType)),
+            "total_amount": sum(
+                item["quantity"] * (item["price"] + sum(t["price"] for t in item["toppings"])) for item in items
+            ),
+            "items": items,
+        })
+    return orders
+
+
+async def insert_orders(orders: List[dict]) -> None:
+    async with async_session_maker() as session:
+        rows = [{key: value for key, value in order.items() if key != "items"} for order in orders]
+        ids = (await session.execute(
+            insert(Order).returning(Order.id, sort_by_parameter_order=True), rows
+        )).scalars().all()
+        items = [dict(item, order_id=order_id) for order_id, order in zip(ids, orders) for item in order["items"]]
+        for order_id, order in zip(ids, orders):
+            order["id"] = order_id
+        item_ids = (await session.execute(
+            insert(OrderItem).returning(OrderItem.id, sort_by_parameter_order=True),
+            [{key: value for key, value in item.items() if key != "toppings"} for item in items],
+        )).scalars().all()
+        toppings = [
+            dict(topping, order_item_id=item_id) for item_id, item in zip(item_ids, items) for topping in item["toppings"]
+        ]
+        if toppings:
+            await session.execute(insert(OrderItemTopping), toppings)
+        await session.commit()
+
+
+async def refresh(label: str) -> None:
+    started = time.perf_counter()
+    async with UnitOfWork() as uow:
+        result = await AnalyticsService(uow=uow, analytics_repo=AnalyticsRepository()).refresh()
+    print(f"{label:<12} {time.perf_counter() - started:7.3f} s, {len(result.days)} day(s)")
+
+
+async def measure_reads(last_day: date, requests: int) -> None:
+    zone = ZoneInfo(settings.analytics.TIMEZONE)
+    created_from = datetime.combine(FIRST_DAY, day_time(), zone)
+    created_to = datetime.combine(last_day + timedelta(days=1), day_time(), zone)
+    brute_force = (
+        select(func.count(), func.sum(Order.total_amount))
+        .where(Order.created_at >= created_from, Order.created_at < created_to, Order.status.in_(SALES_STATUSES))
+    )
+    async with UnitOfWork(read_only=True) as uow:
+        service = AnalyticsService(uow=uow, analytics_repo=AnalyticsRepository())
+        for label, call in (
+                ("rollups", lambda: service.get_sales(date_from=FIRST_DAY, date_to=last_day)),
+                ("top", lambda: service.get_top_products(date_from=FIRST_DAY, date_to=last_day)),
+                ("orders", lambda: uow.session.execute(brute_force)),
+        ):
+            await call()
+            started = time.perf_counter()
+            for _ in range(requests):
+                await call()
+            print(f"read {label:<7} {(time.perf_counter() - started) / requests * 1000:7.2f} ms/request")
+
+
+async def run(orders_count: int, days: int, requests: int) -> None:
+    suffix = uuid.uuid4().hex[:8]
+    async with async_session_maker() as session:
+        category = Category(name=f"benchmark-{suffix}")
+        products = [
+            Product(name=f"benchmark-{suffix}-{i}", subcategory=category, price=30000 + i * 500) for i in range(PRODUCTS)
+        ]
+        toppings = [Topping(name=f"benchmark-{suffix}-{i}", price=2000 + i * 300) for i in range(TOPPINGS)]
+        user = User(name="benchmark", phone=f"+7{suffix}", email=f"benchmark-{suffix}@example.com")
+        session.add_all([category, user, *toppings])
+        await session.commit()
+        product_prices = {product.id: product.price for product in products}
+        topping_prices = {topping.id: topping.price for topping in toppings}
+        category_id, user_id = category.id, user.id
+
+    last_day = FIRST_DAY + timedelta(days=days - 1)
+    try:
+        orders = build_orders(orders_count, days, user_id, product_prices, topping_prices)
+        await insert_orders(orders)
+        await refresh("refresh")
+
+        # Смена статусов задевает дни, в которых заказы были созданы, а не день изменения
+        changed = random.sample(orders, min(50, len(orders)))
+        async with async_session_maker() as session:
+            for order in changed:
+                order["status"] = random.choice([OrderStatus.PAID, OrderStatus.CANCELLED])
+                await session.execute(update(Order).where(Order.id == order["id"]).values(status=order["status"]))
+            await session.commit()
+        new_orders = build_orders(50, days, user_id, product_prices, topping_prices)
+        await insert_orders(new_orders)
+        orders += new_orders
+        await refresh("incremental")
+
+        await measure_reads(last_day, requests)
+    finally:
+        async with async_session_maker() as session:
+            await session.execute(delete(User).where(User.id == user_id))
+            await session.execute(delete(Category).where(Category.id == category_id))
+            await session.execute(delete(Topping).where(Topping.id.in_(list(topping_prices))))
+            # Заказы удалены, пересчёт их дней убирает строки агрегатов
+            await AnalyticsRepository().rebuild_days(
+                session, [FIRST_DAY + timedelta(days=i) for i in range(days)], tz=settings.analytics.TIMEZONE
+            )
+            await session.commit()
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=20000)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(run(args.orders, args.days, args.requests))
+
+
+if __name__ == "__main__":
+    main()
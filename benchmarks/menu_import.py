@@ -0,0 +1,89 @@
+"""
+Бенчмарк массового импорта меню (MenuBulkService.import_document) на локальном PostgreSQL.
+
+Строит документ на N продуктов во временной корневой категории и импортирует его
+трижды: в пустую базу, повторно без изменений и с новыми ценами у половины
+продуктов. Печатает время, число SQL-выражений и отчёт о различиях для каждого
+прогона. Временные данные удаляются в конце.
+
+Запуск (база из переменных DATABASE_*, схема применена через `python main.py migrate`):
+    python -m benchmarks.menu_import --products 5000
+"""
+import argparse
+import asyncio
+import time
+import uuid
+
+from sqlalchemy import delete, event
+
+from src.db import Category, Topping
+from src.db.db import async_session_maker, engine
+from src.db.unit_of_work import UnitOfWork
+from src.repositories.menu import MenuRepository
+from src.schemas.menu import MenuDocument, MenuProduct, MenuTopping
+from src.services.menu_bulk import MenuBulkService
+from benchmarks.order_placement import StatementCounter
+
+SUBCATEGORIES = 20
+TOPPINGS = 10
+
+
+def build_document(root: str, products_count: int, price_bump: int = 0) -> MenuDocument:
+    toppings = [MenuTopping(name=f"{root}-topping-{i}", price=3000 + i * 100) for i in range(TOPPINGS)]
+    products = [
+        MenuProduct(
+            category=[root, f"subcategory-{i % SUBCATEGORIES}"],
+            name=f"product-{i}",
+            # Меняем цену у каждого второго продукта
+            price=40000 + i + (price_bump if i % 2 else 0),
+            description=f"Описание продукта {i}",
+            toppings=[toppings[(i + shift) % TOPPINGS].name for shift in range(3)],
+        )
+        for i in range(products_count)
+    ]
+    return MenuDocument(toppings=toppings, products=products)
+
+
+async def import_once(document: MenuDocument, counter: StatementCounter, label: str) -> None:
+    counter.count = 0
+    started = time.perf_counter()
+    async with UnitOfWork() as uow:
+        report = await MenuBulkService(uow=uow, menu_repo=MenuRepository()).import_document(document)
+    elapsed = time.perf_counter() - started
+    print(f"{label:<10} {elapsed:6.2f} s, {counter.count:>4} statements")
+    print(f"           {report.model_dump_json(exclude={'dry_run'})}")
+
+
+async def cleanup(root: str) -> None:
+    async with async_session_maker() as session:
+        paths = await MenuRepository().get_category_paths(session)
+        # Продукты и их топпинги удаляются каскадом вместе с категориями
+        ids = [category_id for category_id, path in paths.items() if path[0] == root]
+        await session.execute(delete(Category).where(Category.id.in_(ids)))
+        await session.execute(delete(Topping).where(Topping.name.startswith(f"{root}-topping-")))
+        await session.commit()
+
+
+async def run(products_count: int) -> None:
+    root = f"benchmark-{uuid.uuid4().hex[:8]}"
+    counter = StatementCounter()
+    event.listen(engine.sync_engine, "before_cursor_execute", counter)
+    try:
+        await import_once(build_document(root, products_count), counter, "initial")
+        await import_once(build_document(root, products_count), counter, "unchanged")
+        await import_once(build_document(root, products_count, price_bump=500), counter, "repriced")
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", counter)
+        await cleanup(root)
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=5000)
+    args = parser.parse_args()
+    asyncio.run(run(args.products))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Бенчмарк оформления заказа (OrdersService.place_order) на локальном PostgreSQL.
+
+Создаёт временные категорию, продукты, топпинги и пользователя, оформляет
+заказы с корзинами из 1, 10 и 50 позиций и печатает среднее время и число
+SQL-выражений на заказ. Число выражений не должно зависеть от размера корзины.
+Временные данные удаляются в конце.
+
+Запуск (база из переменных DATABASE_*, схема применена через `python main.py migrate`):
+    python -m benchmarks.order_placement
+"""
+import argparse
+import asyncio
+import time
+import uuid
+
+from sqlalchemy import delete, event
+
+from src.db import Category, Product, ProductTopping, Topping, User, UserAddress
+from src.db.db import async_session_maker, engine
+from src.db.unit_of_work import UnitOfWork
+from src.repositories.delivery_slots import DeliverySlotsRepository
+from src.repositories.idempotency import IdempotencyRepository
+from src.repositories.jobs import JobsRepository
+from src.repositories.orders import OrdersRepository
+from src.schemas.cart import CartCreate
+from src.services.delivery_slots import DeliverySlotsService
+from src.services.orders import OrdersService
+
+CART_SIZES = (1, 10, 50)
+
+
+class StatementCounter:
+    def __init__(self) -> None:
+        self.count = 0
+
+    def __call__(self, *args) -> None:
+        self.count += 1
+
+
+async def seed(products_count: int) -> tuple:
+    suffix = uuid.uuid4().hex[:8]
+    async with async_session_maker() as session:
+        category = Category(name=f"benchmark-{suffix}")
+        toppings = [Topping(name=f"benchmark-{suffix}-{i}", price=3000) for i in range(3)]
+        products = [
+            Product(name=f"benchmark-{suffix}-{i}", subcategory=category, price=40000 + i * 100)
+            for i in range(products_count)
+        ]
+        for product in products:
+            for topping in toppings:
+                ProductTopping(product=product, topping=topping)
+        user = User(name="benchmark", phone=f"+7{suffix}", email=f"benchmark-{suffix}@example.com")
+        address = UserAddress(user=user, street="benchmark")
+        session.add_all([category, user])
+        await session.commit()
+        return category.id, user.id, address.id, [p.id for p in products], [t.id for t in toppings]
+
+
+async def cleanup(category_id: int, user_id: int, topping_ids: list) -> None:
+    async with async_session_maker() as session:
+        await session.execute(delete(User).where(User.id == user_id))
+        await session.execute(delete(Category).where(Category.id == category_id))
+        await session.execute(delete(Topping).where(Topping.id.in_(topping_ids)))
+        await session.commit()
+
+
+async def run(orders_per_size: int) -> None:
+    category_id, user_id, address_id, product_ids, topping_ids = await seed(max(CART_SIZES))
+    counter = StatementCounter()
+    event.listen(engine.sync_engine, "before_cursor_execute", counter)
+
+    try:
+        for size in CART_SIZES:
+            cart = CartCreate(
+                address_id=address_id,
+                items=[
+                    {"product_id": product_ids[i], "quantity": 1, "topping_ids": topping_ids[: i % 3]}
+                    for i in range(size)
+                ],
+            )
+            counter.count = 0
+            started = time.perf_counter()
+            for _ in range(orders_per_size):
+                async with UnitOfWork() as uow:
+                    await OrdersService(
+                        uow=uow,
+                        orders_repo=OrdersRepository(),
+                        idempotency_repo=IdempotencyRepository(),
+                        slots=DeliverySlotsService(uow=uow, slots_repo=DeliverySlotsRepository()),
+                        jobs_repo=JobsRepository(),
+                    ).place_order(cart, user_id=user_id)
+            elapsed = time.perf_counter() - started
+            print(
+                f"cart of {size:>2} items: {elapsed / orders_per_size * 1000:7.2f} ms/order, "
+                f"{counter.count / orders_per_size:.1f} statements/order"
+            )
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", counter)
+        await cleanup(category_id, user_id, topping_ids)
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--orders", type=int, default=200, help="Orders placed per cart size")
+    args = parser.parse_args()
+    asyncio.run(run(args.orders))
+
+
+if __name__ == "__main__":
+    main()
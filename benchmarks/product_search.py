@@ -0,0 +1,172 @@
+"""
+Бенчмарк поиска продуктов (ProductsRepository.search_products) на локальном PostgreSQL.
+
+Импортирует синтетический каталог из N продуктов с русскими названиями и
+описаниями во временную корневую категорию, затем гоняет запросы нескольких
+видов: точное слово, другая словоформа, опечатка, фраза из описания, запрос
+с фильтрами по подкатегории и цене. Для каждого вида печатает p50/p95 времени
+и число найденных на первой странице, а для одного запроса каждого вида --
+план EXPLAIN ANALYZE, чтобы видеть, что используются GIN-индексы.
+Временные данные удаляются в конце.
+
+Запуск (база из переменных DATABASE_*, схема применена через `python main.py migrate`):
+    python -m benchmarks.product_search --products 50000 --repeat 50
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+import uuid
+from typing import Dict, List
+
+from sqlalchemy import event
+
+from src.db.db import engine
+from src.db.unit_of_work import UnitOfWork
+from src.repositories.menu import MenuRepository
+from src.repositories.products import ProductsRepository
+from src.schemas.menu import MenuDocument, MenuProduct
+from src.services.menu_bulk import MenuBulkService
+from benchmarks.menu_import import cleanup
+
+SUBCATEGORIES = 20
+PAGE_SIZE = 20
+
+DISHES = [
+    "Пицца", "Люля-кебаб", "Шашлык", "Шаурма", "Бургер", "Салат", "Суп", "Паста",
+    "Ролл", "Пирог", "Хачапури", "Лагман", "Плов", "Чебурек", "Вок", "Сэндвич",
+]
+FILLINGS = [
+    "с курицей", "с говядиной", "с бараниной", "со свининой", "с лососем", "с креветками",
+    "с грибами", "с сыром", "с ветчиной", "с овощами", "с беконом", "с индейкой",
+]
+STYLES = ["острый", "домашний", "фирменный", "классический", "по-восточному", "на углях", "детский", "большой"]
+SAUCES = ["сырным соусом", "чесночным соусом", "томатным соусом", "соусом барбекю", "сметаной", "аджикой"]
+
+# Вид запроса -> запросы и фильтры; в опечатках пропущена или удвоена буква
+QUERIES: Dict[str, List[dict]] = {
+    "word": [{"query": q} for q in ["пицца", "шашлык", "курица", "соус", "грибы"]],
+    "inflected": [{"query": q} for q in ["пиццы", "шашлыки", "курицей", "соусом", "грибами"]],
+    "typo": [{"query": q} for q in ["люлля", "шаурмма", "хачапур", "чибурек", "бургкр"]],
+    "phrase": [{"query": q} for q in ["курица сырный соус", "острый шашлык на углях", "паста с креветками"]],
+    "filtered": [
+        {"query": "пицца", "price_min": 40000, "price_max": 60000},
+        {"query": "курица", "subcategory": 3},
+        {"query": "соус", "subcategory": 7, "price_max": 50000},
+    ],
+}
+
+
+def build_document(root: str, products_count: int) -> MenuDocument:
+    rng = random.Random(products_count)
+    products = []
+    for i in range(products_count):
+        dish, filling, style = rng.choice(DISHES), rng.choice(FILLINGS), rng.choice(STYLES)
+        products.append(
+            MenuProduct(
+                category=[root, f"subcategory-{i % SUBCATEGORIES}"],
+                # Номер делает названия уникальными внутри подкатегории
+                name=f"{dish} {filling} {style} №{i}",
+                price=rng.randrange(20000, 150000, 500),
+                description=f"{style.capitalize()} {dish.lower()} {filling}, подаётся с {rng.choice(SAUCES)}",
+            )
+        )
+    return MenuDocument(toppings=[], products=products)
+
+
+async def seed(root: str, products_count: int) -> Dict[int, int]:
+    """
+    Import the catalog and return ids of its subcategories by their number.
+    """
+    started = time.perf_counter()
+    async with UnitOfWork() as uow:
+        await MenuBulkService(uow=uow, menu_repo=MenuRepository()).import_document(build_document(root, products_count))
+    print(f"imported {products_count} products in {time.perf_counter() - started:.2f} s")
+    async with UnitOfWork(read_only=True) as uow:
+        paths = await MenuRepository().get_category_paths(uow.session)
+    return {
+        int(path[1].rsplit("-", 1)[1]): category_id
+        for category_id, path in paths.items()
+        if path[0] == root and len(path) == 2
+    }
+
+
+def search_kwargs(params: dict, subcategories: Dict[int, int]) -> dict:
+    kwargs = {key: value for key, value in params.items() if key != "subcategory"}
+    if "subcategory" in params:
+        kwargs["subcategory_id"] = subcategories[params["subcategory"]]
+    return kwargs
+
+
+async def explain(params: dict, subcategories: Dict[int, int]) -> None:
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        captured.append((statement, parameters))
+
+    event.listen(engine.sync_engine, "before_cursor_execute", capture)
+    try:
+        async with UnitOfWork(read_only=True) as uow:
+            await ProductsRepository().search_products(
+                session=uow.session, limit=PAGE_SIZE, **search_kwargs(params, subcategories)
+            )
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", capture)
+
+    statement, parameters = captured[-1]
+    async with engine.connect() as conn:
+        result = await conn.exec_driver_sql(f"EXPLAIN (ANALYZE, BUFFERS) {statement}", parameters)
+        for (line,) in result:
+            print(f"    {line}")
+
+
+async def measure(kind: str, queries: List[dict], repeat: int, subcategories: Dict[int, int]) -> None:
+    repo = ProductsRepository()
+    timings = []
+    hits = []
+    for _ in range(repeat):
+        for params in queries:
+            started = time.perf_counter()
+            # Как в API: отдельная read-only транзакция на каждый запрос
+            async with UnitOfWork(read_only=True) as uow:
+                rows = await repo.search_products(
+                    session=uow.session, limit=PAGE_SIZE, **search_kwargs(params, subcategories)
+                )
+            timings.append((time.perf_counter() - started) * 1000)
+            hits.append(len(rows))
+    p50 = statistics.median(timings)
+    p95 = statistics.quantiles(timings, n=20)[-1]
+    print(f"{kind:<10} p50 {p50:7.2f} ms, p95 {p95:7.2f} ms, {min(hits)}-{max(hits)} hits per page")
+
+
+async def run(products_count: int, repeat: int, show_plans: bool) -> None:
+    root = f"benchmark-{uuid.uuid4().hex[:8]}"
+    try:
+        subcategories = await seed(root, products_count)
+        # Статистика для планировщика по только что вставленным строкам
+        async with engine.connect() as conn:
+            await conn.exec_driver_sql("ANALYZE products")
+            await conn.commit()
+        for kind, queries in QUERIES.items():
+            await measure(kind, queries, repeat, subcategories)
+        if show_plans:
+            for kind, queries in QUERIES.items():
+                print(f"\n{kind}: {queries[0]}")
+                await explain(queries[0], subcategories)
+    finally:
+        await cleanup(root)
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--no-plans", dest="show_plans", action="store_false")
+    args = parser.parse_args()
+    asyncio.run(run(args.products, args.repeat, args.show_plans))
+
+
+if __name__ == "__main__":
+    main()
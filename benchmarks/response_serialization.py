@@ -0,0 +1,95 @@
+"""
+Бенчмарк сериализации ответа на один запрос.
+
+Отдаёт одну и ту же страницу заказов с позициями, топпингами и оплатой тремя
+способами через приложение FastAPI в памяти, без сети и без базы:
+
+  before  -- как было в UsersRepository.create_user: готовая схема ещё раз
+             проходит model_dump() -> Model(**dict), ответ без response_model
+             (jsonable_encoder + json.dumps);
+  orjson  -- схемы из serializer.py, response_class=ORJSONResponse;
+  typed   -- схемы из serializer.py и типизированный ответ: FastAPI
+             сериализует модель сразу в JSON-байты через pydantic-core;
+  summary  -- для сравнения: та же страница в виде OrderHistoryPage из плоских
+             OrderSummary, как её сейчас отдаёт /users/me/orders.
+
+Запуск: python -m benchmarks.response_serialization
+"""
+import argparse
+import asyncio
+import time
+import warnings
+from typing import List
+
+import httpx
+from fastapi import FastAPI
+from fastapi.exceptions import FastAPIDeprecationWarning
+from fastapi.responses import ORJSONResponse
+
+from benchmarks.serialization import ORDER_HISTORY_INCLUDE, build_history
+from src.schemas.order import OrderHistoryPage, OrderRead
+from src.schemas.serializer import to_read_list
+
+# ORJSONResponse помечен в FastAPI как устаревший, здесь он нужен только для сравнения
+warnings.filterwarnings("ignore", category=FastAPIDeprecationWarning)
+
+
+def build_app(orders_count: int) -> FastAPI:
+    orders = build_history(orders_count).orders
+    app = FastAPI()
+
+    @app.get("/before")
+    async def before():
+        dumped = [order.model_dump() for order in to_read_list(orders, include=ORDER_HISTORY_INCLUDE)]
+        return [OrderRead(**data) for data in dumped]
+
+    @app.get("/orjson", response_class=ORJSONResponse)
+    async def with_orjson() -> List[OrderRead]:
+        return to_read_list(orders, include=ORDER_HISTORY_INCLUDE)
+
+    @app.get("/typed")
+    async def typed() -> List[OrderRead]:
+        return to_read_list(orders, include=ORDER_HISTORY_INCLUDE)
+
+    @app.get("/summary")
+    async def summary() -> OrderHistoryPage:
+        return OrderHistoryPage(orders=[order.to_summary_model() for order in orders])
+
+    return app
+
+
+async def measure(client: httpx.AsyncClient, path: str, requests: int) -> float:
+    # Прогрев: первый запрос строит валидаторы и кеши FastAPI
+    (await client.get(path)).raise_for_status()
+    started = time.perf_counter()
+    for _ in range(requests):
+        await client.get(path)
+    return (time.perf_counter() - started) / requests
+
+
+async def run(orders_count: int, requests: int) -> None:
+    app = build_app(orders_count)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        bodies = {path: (await client.get(path)).json() for path in ("/before", "/orjson", "/typed")}
+        if not bodies["/before"] == bodies["/orjson"] == bodies["/typed"]:
+            raise SystemExit("responses differ between serialization paths")
+
+        baseline = None
+        for path in ("/before", "/orjson", "/typed", "/summary"):
+            seconds = await measure(client, path, requests)
+            baseline = baseline or seconds
+            size = len((await client.get(path)).content)
+            print(f"{path:<9} {seconds * 1e6:9.1f} us/request  x{baseline / seconds:5.2f}  {size:>7} bytes")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=20, help="Orders per history page")
+    parser.add_argument("--requests", type=int, default=500)
+    args = parser.parse_args()
+    asyncio.run(run(args.orders, args.requests))
+
+
+if __name__ == "__main__":
+    main()
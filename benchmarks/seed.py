@@ -0,0 +1,282 @@
+"""
+Синтетический набор данных кафе для нагрузочных тестов (benchmarks/suite.py).
+
+Заполняет локальный PostgreSQL: дерево категорий, продукты и топпинги (через
+MenuBulkService), пользователей с адресами и заказы с позициями, топпингами и
+оплатами за последние --days дней. Заказы распределены по часам с пиками в обед
+и вечером, у небольшой части пользователей заказов намного больше, чем у
+остальных. Заказы последних двух часов ещё в работе и образуют очередь кухни.
+
+Пользователи и заказы пишутся через COPY пачками по --batch-size, поэтому
+миллион заказов загружается за минуты. Генерация детерминирована при
+одинаковом --seed (кроме отсчёта от текущего времени).
+
+Запуск (база из переменных DATABASE_*, схема применена через `python main.py migrate`):
+    python -m benchmarks.seed --users 20000 --orders 1000000
+    python -m benchmarks.seed --truncate ...   # сначала очистить ВСЕ таблицы
+"""
+import argparse
+import asyncio
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from itertools import accumulate
+from typing import Dict, List, Sequence, Tuple
+
+from sqlalchemy import func, select, text
+
+from src.db import Product, User
+from src.db.db import Base, async_session_maker, engine
+from src.db.unit_of_work import UnitOfWork
+from src.repositories.menu import MenuRepository
+from src.schemas.menu import MenuDocument, MenuProduct, MenuTopping
+from src.services.analytics import analytics_refresher
+from src.services.menu_bulk import MenuBulkService
+from src.utils.enums import DeliveryType, OrderStatus, UserRole
+
+ADMIN_EMAIL = "admin@seed.example.com"
+
+MENU = {
+    "Шашлык": ["Свинина", "Баранина", "Курица", "Говядина", "Овощи"],
+    "Кебабы": ["Люля-кебаб", "В лаваше"],
+    "Салаты": ["Овощные", "Мясные"],
+    "Супы": [],
+    "Гарниры": [],
+    "Выпечка": ["Хачапури", "Лаваш"],
+    "Десерты": [],
+    "Напитки": ["Горячие", "Холодные", "Лимонады"],
+}
+VARIANTS = ["классический", "острый", "по-кавказски", "с травами", "фирменный", "на углях", "мини", "большой"]
+TOPPINGS = [
+    "Соус томатный", "Соус сырный", "Соус чесночный", "Соус наршараб", "Аджика", "Ткемали",
+    "Лук маринованный", "Зелень", "Лаваш", "Сыр сулугуни", "Перец халапеньо", "Огурцы солёные",
+    "Помидоры", "Грибы", "Бекон", "Лимон", "Мёд", "Сироп", "Лёд", "Мята",
+]
+STREETS = ["Ленина", "Мира", "Садовая", "Советская", "Лесная", "Школьная", "Набережная", "Гагарина", "Пушкина"]
+# Доля заказов по часам суток: обед и вечер
+HOUR_WEIGHTS = [1, 0, 0, 0, 0, 0, 1, 2, 3, 4, 6, 9, 14, 13, 9, 6, 6, 9, 14, 16, 13, 9, 5, 2]
+IN_PROGRESS = [OrderStatus.PENDING, OrderStatus.PAID, OrderStatus.PREPARING, OrderStatus.DELIVERING]
+
+
+def build_menu(rnd: random.Random, products_count: int) -> MenuDocument:
+    leaves = [[root, child] for root, children in MENU.items() for child in children]
+    leaves += [[root] for root, children in MENU.items() if not children]
+    toppings = [MenuTopping(name=name, price=rnd.randrange(20, 120) * 500) for name in TOPPINGS]
+    products = []
+    for i in range(products_count):
+        category = leaves[i % len(leaves)]
+        products.append(MenuProduct(
+            category=category,
+            name=f"{category[-1]} {VARIANTS[(i // len(leaves)) % len(VARIANTS)]} №{i // (len(leaves) * len(VARIANTS)) + 1}",
+            price=rnd.randrange(15, 120) * 1000,
+            description=f"Позиция {i + 1} из раздела «{' / '.join(category)}»",
+            toppings=rnd.sample(TOPPINGS, rnd.randint(0, 6)),
+        ))
+    return MenuDocument(toppings=toppings, products=products)
+
+
+async def copy_rows(table: str, columns: Sequence[str], rows: List[tuple]) -> None:
+    async with engine.connect() as connection:
+        raw = await connection.get_raw_connection()
+        await raw.driver_connection.copy_records_to_table(table, records=rows, columns=list(columns))
+
+
+async def next_id(table: str) -> int:
+    async with engine.connect() as connection:
+        return (await connection.execute(text(f"SELECT coalesce(max(id), 0) + 1 FROM {table}"))).scalar_one()
+
+
+async def seed_users(rnd: random.Random, users_count: int, now: datetime) -> Dict[int, List[int]]:
+    """
+    :return: user id -> ids of their addresses.
+    """
+    user_id = await next_id("users")
+    address_id = await next_id("user_addresses")
+    users, addresses = [], []
+    addresses_by_user: Dict[int, List[int]] = {}
+    for i in range(users_count):
+        created_at = now - timedelta(days=rnd.uniform(0, 730))
+        is_admin = i == 0
+        users.append((
+            user_id, "Администратор" if is_admin else f"Гость {i}", f"+7900{i:07d}",
+            ADMIN_EMAIL if is_admin else f"user{i}@seed.example.com",
+            (UserRole.ADMINISTRATOR if is_admin else UserRole.CUSTOMER).name, 0, created_at, created_at,
+        ))
+        addresses_by_user[user_id] = []
+        for _ in range(rnd.choices([0, 1, 2, 3], weights=[3, 5, 2, 1])[0]):
+            private = rnd.random() < 0.2
+            addresses.append((
+                address_id, user_id, f"ул. {rnd.choice(STREETS)}, д. {rnd.randint(1, 120)}",
+                None if private else str(rnd.randint(1, 300)), None if private else rnd.randint(1, 16),
+                None if private else str(rnd.randint(1, 300)), private, created_at, created_at,
+            ))
+            addresses_by_user[user_id].append(address_id)
+            address_id += 1
+        user_id += 1
+
+    await copy_rows(
+        "users", ["id", "name", "phone", "email", "role", "token_version", "created_at", "updated_at"], users
+    )
+    await copy_rows(
+        "user_addresses",
+        ["id", "user_id", "street", "intercom", "floor", "apartment", "is_private_house", "created_at", "updated_at"],
+        addresses,
+    )
+    return addresses_by_user
+
+
+async def load_menu_prices() -> Tuple[Dict[int, int], Dict[int, List[Tuple[int, int]]]]:
+    """
+    :return: product id -> price, product id -> [(topping id, price)].
+    """
+    async with async_session_maker() as session:
+        products = dict((await session.execute(select(Product.id, Product.price))).tuples().all())
+        toppings: Dict[int, List[Tuple[int, int]]] = {product_id: [] for product_id in products}
+        rows = await session.execute(text(
+            "SELECT pt.product_id, t.id, t.price FROM product_toppings pt JOIN toppings t ON t.id = pt.topping_id"
+        ))
+        for product_id, topping_id, price in rows.tuples():
+            toppings[product_id].append((topping_id, price))
+    return products, toppings
+
+
+async def seed_orders(
+        rnd: random.Random,
+        orders_count: int,
+        days: int,
+        batch_size: int,
+        now: datetime,
+        addresses_by_user: Dict[int, List[int]],
+) -> None:
+    products, toppings = await load_menu_prices()
+    product_ids = list(products)
+    # Популярность продуктов и активность пользователей -- с длинным хвостом
+    product_weights = list(accumulate(rnd.paretovariate(1.2) for _ in product_ids))
+    user_ids = list(addresses_by_user)
+    user_weights = list(accumulate(rnd.paretovariate(1.5) for _ in user_ids))
+    hour_weights = list(accumulate(HOUR_WEIGHTS))
+
+    order_id, item_id, topping_row_id, payment_id = [
+        await next_id(table) for table in ("orders", "order_items", "order_item_toppings", "payments")
+    ]
+    started = time.perf_counter()
+    for batch_start in range(0, orders_count, batch_size):
+        size = min(batch_size, orders_count - batch_start)
+        orders, items, item_toppings, payments = [], [], [], []
+        users = rnd.choices(user_ids, cum_weights=user_weights, k=size)
+        for user_id in users:
+            day = now.date() - timedelta(days=rnd.randrange(days))
+            hour = rnd.choices(range(24), cum_weights=hour_weights)[0]
+            created_at = datetime(day.year, day.month, day.day, hour, tzinfo=timezone.utc) + timedelta(
+                seconds=rnd.randrange(3600)
+            )
+            if created_at > now:
+                created_at = now - timedelta(seconds=rnd.randrange(7200))
+
+            addresses = addresses_by_user[user_id]
+            delivery = bool(addresses) and rnd.random() < 0.7
+            if now - created_at < timedelta(hours=2):
+                status = rnd.choice(IN_PROGRESS if delivery else IN_PROGRESS[:3])
+            else:
+                status = OrderStatus.CANCELLED if rnd.random() < 0.07 else OrderStatus.COMPLETED
+
+            total = 0
+            for product_id in set(rnd.choices(product_ids, cum_weights=product_weights, k=rnd.randint(1, 5))):
+                quantity = rnd.choices([1, 2, 3], weights=[8, 3, 1])[0]
+                available = toppings[product_id]
+                chosen = rnd.sample(available, min(len(available), rnd.choices([0, 1, 2], weights=[5, 3, 1])[0]))
+                for topping_id, price in chosen:
+                    item_toppings.append((topping_row_id, item_id, topping_id, price))
+                    topping_row_id += 1
+                items.append((item_id, order_id, product_id, quantity, products[product_id]))
+                total += quantity * (products[product_id] + sum(price for _, price in chosen))
+                item_id += 1
+
+            updated_at = min(created_at + timedelta(minutes=rnd.randint(20, 90)), now)
+            if status in IN_PROGRESS:
+                updated_at = created_at
+            orders.append((
+                order_id, user_id, rnd.choice(addresses) if delivery else None,
+                (DeliveryType.DELIVERY if delivery else DeliveryType.PICKUP).name, status.name, total,
+                None, None, created_at, updated_at,
+            ))
+            if status != OrderStatus.PENDING:
+                payments.append((
+                    payment_id, user_id, order_id, total,
+                    "refunded" if status == OrderStatus.CANCELLED else "paid", created_at, updated_at,
+                ))
+                payment_id += 1
+            order_id += 1
+
+        await copy_rows(
+            "orders",
+            ["id", "user_id", "address_id", "delivery_type", "status", "total_amount", "courier_comment",
+             "delivery_time", "created_at", "updated_at"],
+            orders,
+        )
+        await copy_rows("order_items", ["id", "order_id", "product_id", "quantity", "price"], items)
+        await copy_rows("order_item_toppings", ["id", "order_item_id", "topping_id", "price"], item_toppings)
+        await copy_rows(
+            "payments", ["id", "user_id", "order_id", "amount", "status", "created_at", "updated_at"], payments
+        )
+        done = batch_start + size
+        elapsed = time.perf_counter() - started
+        print(f"orders     {done:>9}/{orders_count}  {done / elapsed:8.0f} orders/s")
+
+
+async def run(args: argparse.Namespace) -> None:
+    rnd = random.Random(args.seed)
+    now = datetime.now(timezone.utc)
+    try:
+        async with engine.begin() as connection:
+            users = (await connection.execute(select(func.count()).select_from(User))).scalar_one()
+            if users and not args.truncate:
+                raise SystemExit(f"The database already has {users} users; pass --truncate to wipe all tables first")
+            if args.truncate:
+                tables = ", ".join(table.name for table in Base.metadata.sorted_tables)
+                await connection.execute(text(f"TRUNCATE {tables} RESTART IDENTITY CASCADE"))
+
+        started = time.perf_counter()
+        async with UnitOfWork() as uow:
+            report = await MenuBulkService(uow=uow, menu_repo=MenuRepository()).import_document(
+                build_menu(rnd, args.products)
+            )
+        print(f"menu       {report.products.created} products, {report.toppings.created} toppings")
+
+        addresses_by_user = await seed_users(rnd, args.users, now)
+        print(f"users      {args.users} users, {sum(map(len, addresses_by_user.values()))} addresses")
+
+        await seed_orders(rnd, args.orders, args.days, args.batch_size, now, addresses_by_user)
+
+        async with engine.begin() as connection:
+            # Строки вставлены с явными id, сдвигаем последовательности за них
+            for table in Base.metadata.sorted_tables:
+                if "id" in table.c:
+                    await connection.execute(text(
+                        f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), "
+                        f"coalesce((SELECT max(id) FROM {table.name}), 0) + 1, false)"
+                    ))
+            await connection.execute(text("ANALYZE"))
+
+        result = await analytics_refresher.refresh_once(full=True)
+        print(f"analytics  {len(result.days)} days")
+        print(f"done in {time.perf_counter() - started:.0f} s; admin user: {ADMIN_EMAIL}")
+    finally:
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=20000)
+    parser.add_argument("--orders", type=int, default=1_000_000)
+    parser.add_argument("--products", type=int, default=300)
+    parser.add_argument("--days", type=int, default=365, help="Orders are spread over this many past days")
+    parser.add_argument("--batch-size", type=int, default=20000, help="Orders per COPY round")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--truncate", action="store_true", help="Wipe every table before seeding")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Бенчмарк сериализации истории заказов через src/schemas/serializer.py.
+
+Строит в памяти (без базы) пользователя с историей из N заказов, у каждого
+заказа есть позиции, топпинги и оплата, а все отношения загружены в обе стороны
+(Order.user.orders, OrderItem.product.order_items, ...). Замеряет время
+сериализации для разных N и проверяет, что время на один заказ не растёт.
+
+Запуск: python -m benchmarks.serialization
+"""
+import argparse
+import time
+from datetime import datetime, timezone
+
+import src.schemas  # noqa: F401 -- разрешает forward-ссылки *Read схем
+from src.db import (
+    User,
+    Category,
+    Topping,
+    Product,
+    Order,
+    OrderItem,
+    OrderItemTopping,
+    Payment,
+)
+from src.schemas.serializer import to_read_list
+from src.utils.enums import DeliveryType, OrderStatus
+
+ORDER_HISTORY_INCLUDE = ["address", "items.product", "items.toppings.topping", "payment"]
+ITEMS_PER_ORDER = 3
+
+
+def build_history(orders_count: int) -> User:
+    now = datetime.now(timezone.utc)
+    user = User(id=1, name="Покупатель", phone="+70000000000", email="user@example.com", created_at=now, updated_at=now)
+    category = Category(id=1, name="Шашлык")
+    toppings = [Topping(id=i, name=f"Соус {i}", price=5000) for i in range(1, 4)]
+    products = [
+        Product(id=i, name=f"Шашлык {i}", subcategory=category, subcategory_id=1, price=45000)
+        for i in range(1, 11)
+    ]
+
+    for order_id in range(1, orders_count + 1):
+        order = Order(
+            id=order_id,
+            user=user,
+            user_id=user.id,
+            delivery_type=DeliveryType.DELIVERY,
+            status=OrderStatus.COMPLETED,
+            total_amount=150000,
+            created_at=now,
+            updated_at=now,
+        )
+        for position in range(ITEMS_PER_ORDER):
+            item_id = order_id * ITEMS_PER_ORDER + position
+            product = products[item_id % len(products)]
+            topping = toppings[item_id % len(toppings)]
+            item = OrderItem(
+                id=item_id, order=order, order_id=order_id,
+                product=product, product_id=product.id, quantity=1, price=product.price,
+            )
+            OrderItemTopping(
+                id=item_id, order_item=item, order_item_id=item_id,
+                topping=topping, topping_id=topping.id, price=topping.price,
+            )
+        Payment(
+            id=order_id, user=user, user_id=user.id, order=order, order_id=order_id,
+            amount=150000, status="succeeded", created_at=now, updated_at=now,
+        )
+    return user
+
+
+def measure(orders_count: int, repeat: int) -> float:
+    user = build_history(orders_count)
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        to_read_list(user.orders, include=ORDER_HISTORY_INCLUDE)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--max-orders", type=int, default=500)
+    parser.add_argument("--steps", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    sizes = [args.max_orders * step // args.steps for step in range(1, args.steps + 1)]
+    results = [(size, measure(size, args.repeat)) for size in sizes]
+
+    for size, seconds in results:
+        print(f"{size:>6} orders: {seconds * 1000:8.2f} ms, {seconds / size * 1e6:7.1f} us/order")
+
+    # При линейном росте время на заказ для самой большой истории
+    # не должно заметно превышать время на заказ для самой маленькой
+    smallest_size, smallest = results[0]
+    largest_size, largest = results[-1]
+    ratio = (largest / largest_size) / (smallest / smallest_size)
+    print(f"per-order time ratio {largest_size}/{smallest_size}: {ratio:.2f}")
+    if ratio > 1.5:
+        raise SystemExit("serialization time grows faster than linearly")
+
+
+if __name__ == "__main__":
+    main()
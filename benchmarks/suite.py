@@ -0,0 +1,319 @@
+"""
+Нагрузочный набор бенчмарков API на данных из benchmarks/seed.py.
+
+Сценарии: чтение меню (дерево категорий, каталог, карточка продукта),
+оформление заказа, история заказов пользователя и очередь кухни. Каждый
+сценарий после прогрева гоняется --duration секунд с --concurrency
+параллельными клиентами. Для каждого печатаются p50/p95/p99 задержки,
+пропускная способность, а также среднее число SQL-выражений и время в базе
+на запрос из заголовка Server-Timing.
+
+По умолчанию приложение вызывается в том же процессе через ASGI, без сети и
+uvicorn: так результаты меньше зависят от машины и их можно сравнивать между
+коммитами. С --base-url запросы идут на запущенный сервер (SECRET_KEY должен
+совпадать, чтобы токены приняли).
+
+Результаты пишутся в JSON (--output) с ключами в стабильном порядке, чтобы их
+можно было сравнивать diff'ом. С --baseline прогон сравнивается с прошлым
+файлом и завершается с кодом 1, если p95 какого-то сценария выросла больше чем
+на --max-regression или выросло число SQL-выражений на запрос.
+
+Сценарий order_placement создаёт настоящие заказы.
+
+Запуск (база из переменных DATABASE_*, заполнена benchmarks/seed.py):
+    python -m benchmarks.suite --output benchmark-results.json
+    python -m benchmarks.suite --baseline benchmark-results.json --output new.json
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import re
+import subprocess
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+from sqlalchemy import func, select, text
+
+from src.db import Order, Product, User
+from src.db.db import async_session_maker, engine
+from src.utils.enums import UserRole
+from src.utils.security import create_access_token
+
+SCENARIOS = ["menu_categories", "menu_products", "menu_product", "order_placement", "order_history", "kitchen_queue"]
+
+_SERVER_TIMING_DB = re.compile(r'db;dur=([\d.]+);desc="(\d+) queries"')
+
+
+@dataclass
+class Dataset:
+    product_ids: List[int]
+    toppings_by_product: Dict[int, List[int]]
+    customer_tokens: List[str]
+    admin_token: str
+    counts: Dict[str, int]
+
+
+@dataclass
+class ScenarioResult:
+    latencies: List[float] = field(default_factory=list)
+    errors: int = 0
+    statements: List[int] = field(default_factory=list)
+    db_ms: List[float] = field(default_factory=list)
+    first_error: Optional[str] = None
+
+    def record(self, response: httpx.Response, seconds: float) -> None:
+        if response.is_success:
+            self.latencies.append(seconds)
+        else:
+            self.errors += 1
+            self.first_error = self.first_error or f"{response.status_code} {response.text[:200]}"
+        timing = _SERVER_TIMING_DB.search(response.headers.get("server-timing", ""))
+        if timing:
+            self.db_ms.append(float(timing.group(1)))
+            self.statements.append(int(timing.group(2)))
+
+    def summary(self, elapsed: float) -> Dict[str, Any]:
+        latencies = sorted(self.latencies)
+        return {
+            "requests": len(latencies),
+            "errors": self.errors,
+            "throughput_rps": round(len(latencies) / elapsed, 1),
+            "latency_ms": {
+                "p50": _percentile(latencies, 50),
+                "p95": _percentile(latencies, 95),
+                "p99": _percentile(latencies, 99),
+                "mean": round(sum(latencies) / len(latencies) * 1000, 2) if latencies else None,
+                "max": round(latencies[-1] * 1000, 2) if latencies else None,
+            },
+            "db_statements_mean": round(sum(self.statements) / len(self.statements), 2) if self.statements else None,
+            "db_ms_mean": round(sum(self.db_ms) / len(self.db_ms), 2) if self.db_ms else None,
+        }
+
+
+def _percentile(sorted_values: List[float], percent: int) -> Optional[float]:
+    # Ближайший ранг, в миллисекундах
+    if not sorted_values:
+        return None
+    rank = max(math.ceil(percent / 100 * len(sorted_values)) - 1, 0)
+    return round(sorted_values[rank] * 1000, 2)
+
+
+async def load_dataset(customers: int, rnd: random.Random) -> Dataset:
+    async with async_session_maker() as session:
+        product_ids = list((await session.execute(select(Product.id).order_by(Product.id))).scalars())
+        toppings_by_product: Dict[int, List[int]] = {product_id: [] for product_id in product_ids}
+        for product_id, topping_id in (await session.execute(
+                text("SELECT product_id, topping_id FROM product_toppings")
+        )).tuples():
+            toppings_by_product[product_id].append(topping_id)
+
+        admin = (await session.execute(
+            select(User.id, User.token_version).where(User.role == UserRole.ADMINISTRATOR).order_by(User.id).limit(1)
+        )).one_or_none()
+        if admin is None or not product_ids:
+            raise SystemExit("No admin user or products found; fill the database with `python -m benchmarks.seed`")
+
+        # Половина -- самые активные покупатели (длинная история), половина -- случайные
+        heavy = (await session.execute(
+            select(Order.user_id).group_by(Order.user_id).order_by(func.count().desc()).limit(customers // 2)
+        )).scalars().all()
+        random_users = (await session.execute(
+            select(User.id).where(User.role == UserRole.CUSTOMER).order_by(func.random()).limit(customers - len(heavy))
+        )).scalars().all()
+        versions = dict((await session.execute(
+            select(User.id, User.token_version).where(User.id.in_([*heavy, *random_users]))
+        )).tuples().all())
+
+        counts = {
+            table: (await session.execute(text(f"SELECT count(*) FROM {table}"))).scalar_one()
+            for table in ("users", "products", "orders", "order_items")
+        }
+
+    customer_tokens = [
+        create_access_token(user_id=user_id, role=UserRole.CUSTOMER, token_version=version)
+        for user_id, version in versions.items()
+    ]
+    rnd.shuffle(customer_tokens)
+    return Dataset(
+        product_ids=product_ids,
+        toppings_by_product=toppings_by_product,
+        customer_tokens=customer_tokens,
+        admin_token=create_access_token(user_id=admin.id, role=UserRole.ADMINISTRATOR, token_version=admin.token_version),
+        counts=counts,
+    )
+
+
+def build_request(name: str, dataset: Dataset, rnd: random.Random) -> Callable[[httpx.AsyncClient], Awaitable[httpx.Response]]:
+    def auth(token: str) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {token}"}
+
+    if name == "menu_categories":
+        return lambda client: client.get("/categories/")
+    if name == "menu_products":
+        return lambda client: client.get("/products/")
+    if name == "menu_product":
+        return lambda client: client.get(f"/products/{rnd.choice(dataset.product_ids)}")
+    if name == "order_history":
+        return lambda client: client.get(
+            "/users/me/orders", params={"limit": 20}, headers=auth(rnd.choice(dataset.customer_tokens))
+        )
+    if name == "kitchen_queue":
+        return lambda client: client.get("/orders/queue", headers=auth(dataset.admin_token))
+    if name == "order_placement":
+        def place(client: httpx.AsyncClient) -> Awaitable[httpx.Response]:
+            items = []
+            for product_id in rnd.sample(dataset.product_ids, rnd.randint(1, 5)):
+                toppings = dataset.toppings_by_product[product_id]
+                items.append({
+                    "product_id": product_id,
+                    "quantity": rnd.randint(1, 3),
+                    "topping_ids": rnd.sample(toppings, min(len(toppings), rnd.randint(0, 2))),
+                })
+            return client.post(
+                "/orders/",
+                json={"delivery_type": "pickup", "items": items},
+                headers=auth(rnd.choice(dataset.customer_tokens)),
+            )
+        return place
+    raise ValueError(f"Unknown scenario {name}")
+
+
+async def run_scenario(
+        client: httpx.AsyncClient,
+        request: Callable[[httpx.AsyncClient], Awaitable[httpx.Response]],
+        duration: float,
+        concurrency: int,
+        warmup: int,
+) -> Dict[str, Any]:
+    # Прогрев: снапшот меню, кеш токенов, пул соединений
+    for _ in range(warmup):
+        await request(client)
+
+    result = ScenarioResult()
+    deadline = time.perf_counter() + duration
+
+    async def worker() -> None:
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            response = await request(client)
+            result.record(response, time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    summary = result.summary(time.perf_counter() - started)
+    if result.first_error:
+        summary["first_error"] = result.first_error
+    return summary
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], max_regression: float) -> List[str]:
+    """
+    :return: descriptions of regressions, empty if there are none.
+    """
+    regressions = []
+    print(f"\n{'scenario':<16} {'p95 before':>10} {'p95 now':>10} {'change':>8} {'sql before':>10} {'sql now':>8}")
+    for name, now in current["scenarios"].items():
+        before = baseline.get("scenarios", {}).get(name)
+        if before is None:
+            continue
+        p95_before, p95_now = before["latency_ms"]["p95"], now["latency_ms"]["p95"]
+        change = (p95_now / p95_before - 1) if p95_before and p95_now else 0.0
+        sql_before, sql_now = before.get("db_statements_mean"), now.get("db_statements_mean")
+        print(f"{name:<16} {p95_before!s:>10} {p95_now!s:>10} {change:>+8.0%} {sql_before!s:>10} {sql_now!s:>8}")
+        if change > max_regression:
+            regressions.append(f"{name}: p95 {p95_before} -> {p95_now} ms")
+        if sql_before is not None and sql_now is not None and sql_now > sql_before + 0.5:
+            regressions.append(f"{name}: SQL statements per request {sql_before} -> {sql_now}")
+    return regressions
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    rnd = random.Random(args.seed)
+    scenarios = args.scenarios or SCENARIOS
+    try:
+        dataset = await load_dataset(args.customers, rnd)
+        if args.base_url:
+            transport = None
+            base_url = args.base_url
+        else:
+            # Импорт здесь: приложение с роутерами не нужно при работе с --base-url
+            from main import app
+
+            transport = httpx.ASGITransport(app=app)
+            base_url = "http://bench"
+
+        results: Dict[str, Any] = {}
+        async with httpx.AsyncClient(transport=transport, base_url=base_url, timeout=30) as client:
+            for name in scenarios:
+                summary = await run_scenario(
+                    client, build_request(name, dataset, rnd), args.duration, args.concurrency, args.warmup
+                )
+                results[name] = summary
+                latency = summary["latency_ms"]
+                print(
+                    f"{name:<16} p50 {latency['p50']!s:>7} ms  p95 {latency['p95']!s:>7} ms  "
+                    f"p99 {latency['p99']!s:>7} ms  {summary['throughput_rps']:>8} req/s  "
+                    f"sql {summary['db_statements_mean']!s:>5}  errors {summary['errors']}"
+                )
+    finally:
+        await engine.dispose()
+
+    return {
+        "commit": git_commit(),
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "settings": {
+            "duration_seconds": args.duration,
+            "concurrency": args.concurrency,
+            "warmup_requests": args.warmup,
+            "customers": args.customers,
+            "seed": args.seed,
+            "target": args.base_url or "in-process",
+        },
+        "dataset": dataset.counts,
+        "scenarios": results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, help="Defaults to all of them")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per scenario")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--warmup", type=int, default=20, help="Requests before measuring")
+    parser.add_argument("--customers", type=int, default=200, help="Users whose tokens are used")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--base-url", help="Benchmark a running server instead of the app in this process")
+    parser.add_argument("--output", default="benchmark-results.json")
+    parser.add_argument("--baseline", help="Earlier results to compare with")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="Allowed p95 growth, 0.2 = 20%%")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    with open(args.output, "w", encoding="utf-8") as output:
+        json.dump(results, output, indent=2, sort_keys=True, ensure_ascii=False)
+        output.write("\n")
+    print(f"results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as baseline_file:
+            regressions = compare(json.load(baseline_file), results, args.max_regression)
+        if regressions:
+            raise SystemExit("Regressions:\n  " + "\n  ".join(regressions))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,27 +1,235 @@
+import argparse
 import asyncio
+import signal
+import sys
 import uvicorn
 import logging
+from contextlib import asynccontextmanager
+from datetime import datetime
+from pathlib import Path
 from fastapi import FastAPI
 
-from src.db.db import init_db
+from src.api.middleware import ReadYourWritesMiddleware, RequestMetricsMiddleware
 from src.api.routers import all_routers
+from src.db.db import engine, replica_engine
+from src.services.analytics import analytics_refresher
+from src.services.jobs import job_runner
+from src.services.order_events import order_events
 from src.utils.config import settings
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    order_events.start()
+    analytics_refresher.start()
+    job_runner.start()
+    yield
+    await job_runner.stop()
+    await analytics_refresher.stop()
+    await order_events.stop()
+    # Сюда uvicorn приходит после того, как дождался завершения текущих запросов
+    logging.info("Disposing database connection pool")
+    await engine.dispose()
+    if replica_engine is not None:
+        await replica_engine.dispose()
+
+
 app = FastAPI(
-    title="Goar-Cafe-API"
+    title="Goar-Cafe-API",
+    lifespan=lifespan
 )
 
+# Число запросов к базе и время по этапам для каждого запроса: Server-Timing и /metrics
+app.add_middleware(RequestMetricsMiddleware)
+# После записи клиент какое-то время читает с primary, а не с отстающей реплики
+if replica_engine is not None:
+    app.add_middleware(ReadYourWritesMiddleware)
+
 for router in all_routers:  # Include routers into FastAPI app from src/api/routes (all of them in src/api/routers.py)
     app.include_router(router)
 
 
-async def main():
-    logging.info("Starting init_db()")
-    await init_db()
+def serve(workers: int, reload: bool) -> None:
+    run = settings.run
+    if reload:
+        # Перезагрузка по изменению файлов работает только с одним процессом
+        workers = 1
+
+    logging.info("Starting FastAPI app with %s worker(s)", workers)
+    uvicorn.run(
+        "main:app",
+        host=run.host,
+        port=run.port,
+        workers=workers,
+        reload=reload,
+        loop=run.loop,
+        http=run.http,
+        timeout_keep_alive=run.timeout_keep_alive,
+        backlog=run.backlog,
+        timeout_graceful_shutdown=run.timeout_graceful_shutdown,
+    )
+
+
+def run_menu_command(args: argparse.Namespace) -> None:
+    from src.services.menu_bulk import export_menu_file, import_menu_file
+    from src.utils.menu_document import MenuDocumentError
+
+    async def run() -> None:
+        try:
+            if args.command == "menu-import":
+                report = await import_menu_file(args.path, dry_run=args.dry_run)
+                print(report.model_dump_json(indent=2))
+            else:
+                fmt = args.format or ("csv" if args.path.suffix == ".csv" else "json")
+                if str(args.path) == "-":
+                    await export_menu_file(sys.stdout, fmt)
+                else:
+                    with args.path.open("w", encoding="utf-8", newline="") as output:
+                        await export_menu_file(output, fmt)
+        except MenuDocumentError as e:
+            raise SystemExit(f"Invalid menu document: {e}")
+        finally:
+            await engine.dispose()
+
+    asyncio.run(run())
+
+
+def run_orders_export(args: argparse.Namespace) -> None:
+    from src.services.order_export import export_orders_file
+
+    fmt = args.format or ("ndjson" if args.path.suffix == ".ndjson" else "csv")
+
+    async def run() -> None:
+        try:
+            if str(args.path) == "-":
+                await export_orders_file(sys.stdout, fmt, date_from=args.date_from, date_to=args.date_to)
+            else:
+                with args.path.open("w", encoding="utf-8", newline="") as output:
+                    await export_orders_file(output, fmt, date_from=args.date_from, date_to=args.date_to)
+        finally:
+            await engine.dispose()
+
+    asyncio.run(run())
+
+
+def run_analytics_refresh(args: argparse.Namespace) -> None:
+    async def run() -> None:
+        try:
+            report = await analytics_refresher.refresh_once(full=args.full)
+            print(report.model_dump_json(indent=2))
+        finally:
+            await engine.dispose()
+
+    asyncio.run(run())
+
+
+def run_idempotency_cleanup() -> None:
+    from src.services.orders import delete_expired_idempotency_keys
+
+    async def run() -> None:
+        try:
+            deleted = await delete_expired_idempotency_keys()
+            print(f"deleted {deleted} expired idempotency keys")
+        finally:
+            await engine.dispose()
+
+    asyncio.run(run())
+
+
+def run_jobs_worker() -> None:
+    async def run() -> None:
+        # Выполняет задачи и при JOBS_ENABLED=false, для которого и предназначен
+        job_runner.enabled = True
+        stopped = asyncio.Event()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            asyncio.get_running_loop().add_signal_handler(signum, stopped.set)
+        job_runner.start()
+        logging.info("Running background jobs: %s", ", ".join(job_type.value for job_type in job_runner.specs))
+        try:
+            await stopped.wait()
+        finally:
+            await job_runner.stop()
+            await engine.dispose()
+
+    asyncio.run(run())
+
+
+def run_jobs_requeue_failed() -> None:
+    from src.services.jobs import requeue_failed_jobs
+
+    async def run() -> None:
+        try:
+            requeued = await requeue_failed_jobs()
+            print(f"requeued {requeued} failed jobs")
+        finally:
+            await engine.dispose()
+
+    asyncio.run(run())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Goar-Cafe-API")
+    subparsers = parser.add_subparsers(dest="command")
+    serve_parser = subparsers.add_parser("serve", help="Run the API server (default)")
+    serve_parser.add_argument("--workers", type=int, default=settings.run.workers, help="Number of worker processes")
+    serve_parser.add_argument("--reload", action="store_true", default=settings.run.reload, help="Reload on code changes (development only)")
+    subparsers.add_parser("migrate", help="Apply database migrations, run once per deploy")
+    import_parser = subparsers.add_parser("menu-import", help="Upsert categories, products and toppings from a .json/.csv menu")
+    import_parser.add_argument("path", type=Path)
+    import_parser.add_argument("--dry-run", action="store_true", help="Report the changes and roll them back")
+    export_parser = subparsers.add_parser("menu-export", help="Write the whole menu as a .json/.csv document")
+    export_parser.add_argument("path", type=Path, help="Output file, '-' for stdout")
+    export_parser.add_argument("--format", choices=["json", "csv"], default=None, help="Defaults to the file extension")
+    orders_parser = subparsers.add_parser("orders-export", help="Write orders of a period as .csv/.ndjson for accounting")
+    orders_parser.add_argument("path", type=Path, help="Output file, '-' for stdout")
+    orders_parser.add_argument("--from", dest="date_from", type=datetime.fromisoformat, required=True, help="Start, inclusive (UTC unless an offset is given)")
+    orders_parser.add_argument("--to", dest="date_to", type=datetime.fromisoformat, required=True, help="End, exclusive")
+    orders_parser.add_argument("--format", choices=["csv", "ndjson"], default=None, help="Defaults to the file extension")
+    analytics_parser = subparsers.add_parser("analytics-refresh", help="Refresh the daily sales rollups")
+    analytics_parser.add_argument("--full", action="store_true", help="Rebuild every day, not only the changed ones")
+    subparsers.add_parser("idempotency-cleanup", help="Delete expired order idempotency keys, run from cron")
+    subparsers.add_parser("jobs-worker", help="Run background jobs (SMS, receipts) outside the API workers")
+    subparsers.add_parser("jobs-requeue-failed", help="Retry the background jobs that ran out of attempts")
+    args = parser.parse_args()
+
+    if args.command == "migrate":
+        # Импорт здесь, чтобы сервер не тянул Alembic при старте
+        from src.db.migrate import run_migrations
+
+        logging.info("Applying database migrations")
+        run_migrations()
+        return
+
+    if args.command in ("menu-import", "menu-export"):
+        run_menu_command(args)
+        return
+
+    if args.command == "orders-export":
+        run_orders_export(args)
+        return
+
+    if args.command == "analytics-refresh":
+        run_analytics_refresh(args)
+        return
+
+    if args.command == "idempotency-cleanup":
+        run_idempotency_cleanup()
+        return
+
+    if args.command == "jobs-worker":
+        run_jobs_worker()
+        return
+
+    if args.command == "jobs-requeue-failed":
+        run_jobs_requeue_failed()
+        return
 
-    logging.info("Starting FastAPI app")
-    uvicorn.run("main:app", host=settings.run.host, port=settings.run.port, reload=True)
+    # Схема базы не проверяется при старте: за неё отвечает `python main.py migrate`
+    if args.command == "serve":
+        serve(workers=args.workers, reload=args.reload)
+    else:
+        serve(workers=settings.run.workers, reload=settings.run.reload)
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    main()
@@ -0,0 +1,83 @@
+"""fk and hot filter indexes
+
+Indexes on foreign keys, the order history and kitchen queue composite
+indexes on orders, and a unique (product_id, topping_id) pair.
+Indexes are built CONCURRENTLY so the migration does not block writes.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+FK_INDEXES = [
+    ("ix_user_addresses_user_id", "user_addresses", ["user_id"]),
+    ("ix_categories_parent_id", "categories", ["parent_id"]),
+    ("ix_products_subcategory_id", "products", ["subcategory_id"]),
+    ("ix_product_toppings_topping_id", "product_toppings", ["topping_id"]),
+    ("ix_orders_address_id", "orders", ["address_id"]),
+    ("ix_order_items_order_id", "order_items", ["order_id"]),
+    ("ix_order_items_product_id", "order_items", ["product_id"]),
+    ("ix_order_item_toppings_order_item_id", "order_item_toppings", ["order_item_id"]),
+    ("ix_order_item_toppings_topping_id", "order_item_toppings", ["topping_id"]),
+    ("ix_payments_user_id", "payments", ["user_id"]),
+]
+
+
+def upgrade() -> None:
+    # Перед уникальным ограничением убираем дубли пар (product_id, topping_id)
+    op.execute(
+        "DELETE FROM product_toppings a USING product_toppings b "
+        "WHERE a.product_id = b.product_id AND a.topping_id = b.topping_id AND a.id > b.id"
+    )
+
+    # CREATE INDEX CONCURRENTLY нельзя выполнять внутри транзакции
+    with op.get_context().autocommit_block():
+        for name, table, columns in FK_INDEXES:
+            op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index(
+            "ix_orders_user_id_created_at", "orders", ["user_id", sa.text("created_at DESC")],
+            postgresql_concurrently=True, if_not_exists=True,
+        )
+        op.create_index(
+            "ix_orders_status_created_at", "orders", ["status", "created_at"],
+            postgresql_concurrently=True, if_not_exists=True,
+        )
+        op.create_index(
+            "uq_product_toppings_product_id_topping_id", "product_toppings", ["product_id", "topping_id"],
+            unique=True, postgresql_concurrently=True, if_not_exists=True,
+        )
+
+    # Ограничение может уже существовать, если таблицы создавались через create_all
+    op.execute(
+        """
+        DO $$
+        BEGIN
+            IF NOT EXISTS (
+                SELECT 1 FROM pg_constraint WHERE conname = 'uq_product_toppings_product_id_topping_id'
+            ) THEN
+                ALTER TABLE product_toppings ADD CONSTRAINT uq_product_toppings_product_id_topping_id
+                    UNIQUE USING INDEX uq_product_toppings_product_id_topping_id;
+            END IF;
+        END $$
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint("uq_product_toppings_product_id_topping_id", "product_toppings", type_="unique")
+    op.drop_index("ix_orders_status_created_at", table_name="orders")
+    op.drop_index("ix_orders_user_id_created_at", table_name="orders")
+    for name, table, _ in reversed(FK_INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,52 @@
+"""money in kopecks
+
+Store prices, totals and payment amounts as BIGINT kopecks instead of
+double precision rubles.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MONEY_COLUMNS = [
+    ("products", "price"),
+    ("toppings", "price"),
+    ("orders", "total_amount"),
+    ("order_items", "price"),
+    ("order_item_toppings", "price"),
+    ("payments", "amount"),
+]
+
+
+def upgrade() -> None:
+    for table, column in MONEY_COLUMNS:
+        op.alter_column(
+            table, column,
+            type_=sa.BigInteger(),
+            existing_type=sa.Float(),
+            existing_nullable=False,
+            postgresql_using=f"round({column} * 100)::bigint",
+        )
+
+
+def downgrade() -> None:
+    for table, column in MONEY_COLUMNS:
+        op.alter_column(
+            table, column,
+            type_=sa.Float(),
+            existing_type=sa.BigInteger(),
+            existing_nullable=False,
+            postgresql_using=f"{column} / 100.0",
+        )
@@ -0,0 +1,59 @@
+"""menu natural keys
+
+Unique keys used by the bulk menu import: a category name is unique among
+its siblings, a topping name is unique, and a product name is unique within
+its subcategory. Existing duplicates are renamed ("<name> #<id>") rather
+than deleted, because order history may reference them.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Таблица и выражение ключа, по которому ищутся дубли
+NATURAL_KEYS = [
+    ("categories", "coalesce(parent_id, 0), name"),
+    ("toppings", "name"),
+    ("products", "subcategory_id, name"),
+]
+
+
+def upgrade() -> None:
+    for table, key in NATURAL_KEYS:
+        # Самая старая строка сохраняет имя, остальные получают суффикс с id
+        op.execute(
+            f"""
+            UPDATE {table} SET name = left(name, 90) || ' #' || id
+            WHERE id IN (
+                SELECT id FROM (
+                    SELECT id, row_number() OVER (PARTITION BY {key} ORDER BY id) AS position FROM {table}
+                ) ranked
+                WHERE position > 1
+            )
+            """
+        )
+
+    # Таблицы меню небольшие, поэтому индексы строятся без CONCURRENTLY
+    op.create_index(
+        "uq_categories_parent_id_name", "categories", [sa.text("coalesce(parent_id, 0)"), "name"], unique=True
+    )
+    op.create_unique_constraint("uq_toppings_name", "toppings", ["name"])
+    op.create_unique_constraint("uq_products_subcategory_id_name", "products", ["subcategory_id", "name"])
+
+
+def downgrade() -> None:
+    op.drop_constraint("uq_products_subcategory_id_name", "products", type_="unique")
+    op.drop_constraint("uq_toppings_name", "toppings", type_="unique")
+    op.drop_index("uq_categories_parent_id_name", table_name="categories")
@@ -0,0 +1,69 @@
+"""analytics rollups
+
+Daily sales and per-product sales rollups, the refresh watermark, and an
+index on orders.updated_at used to find the days touched since the last
+refresh. The rollups start empty; the first refresh fills them from all
+existing orders.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0006"
+down_revision: Union[str, None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "analytics_daily_sales",
+        sa.Column("day", sa.Date(), primary_key=True),
+        sa.Column("orders_count", sa.Integer(), nullable=False),
+        sa.Column("revenue", sa.BigInteger(), nullable=False),
+        sa.Column("delivery_orders", sa.Integer(), nullable=False),
+        sa.Column("delivery_revenue", sa.BigInteger(), nullable=False),
+        sa.Column("pickup_orders", sa.Integer(), nullable=False),
+        sa.Column("pickup_revenue", sa.BigInteger(), nullable=False),
+        sa.Column("order_items_count", sa.Integer(), nullable=False),
+        sa.Column("items_with_toppings", sa.Integer(), nullable=False),
+    )
+    op.create_table(
+        "analytics_daily_product_sales",
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("product_id", sa.Integer(), sa.ForeignKey("products.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("quantity", sa.Integer(), nullable=False),
+        sa.Column("revenue", sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint("day", "product_id"),
+    )
+    op.create_index(
+        "ix_analytics_daily_product_sales_product_id", "analytics_daily_product_sales", ["product_id"]
+    )
+    op.create_table(
+        "analytics_refresh_state",
+        sa.Column("name", sa.String(50), primary_key=True),
+        sa.Column("watermark", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("refreshed_at", sa.DateTime(timezone=True), nullable=False),
+    )
+
+    # Таблица заказов большая, индекс строится без блокировки записи
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_orders_updated_at", "orders", ["updated_at"], postgresql_concurrently=True, if_not_exists=True
+        )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_orders_updated_at", table_name="orders")
+    op.drop_table("analytics_refresh_state")
+    op.drop_index("ix_analytics_daily_product_sales_product_id", table_name="analytics_daily_product_sales")
+    op.drop_table("analytics_daily_product_sales")
+    op.drop_table("analytics_daily_sales")
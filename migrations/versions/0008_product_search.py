@@ -0,0 +1,50 @@
+"""product search
+
+Full-text search over product names and descriptions with Russian
+stemming (a generated tsvector column) and typo-tolerant name search with
+pg_trgm, each backed by a GIN index.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0008"
+down_revision: Union[str, None] = "0007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Совпадает с PRODUCT_SEARCH_VECTOR в src/models/models.py на момент миграции
+SEARCH_VECTOR = (
+    "setweight(to_tsvector('russian', name), 'A') || "
+    "setweight(to_tsvector('russian', coalesce(description, '')), 'B')"
+)
+
+
+def upgrade() -> None:
+    # Расширение ставится в схему базы; у пользователя миграций должно быть право CREATE
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # Меню -- небольшая таблица, перезапись при добавлении вычисляемой колонки быстрая
+    op.add_column(
+        "products",
+        sa.Column("search_vector", postgresql.TSVECTOR(), sa.Computed(SEARCH_VECTOR, persisted=True), nullable=False),
+    )
+    op.create_index("ix_products_search_vector", "products", ["search_vector"], postgresql_using="gin")
+    op.create_index(
+        "ix_products_name_trgm", "products", ["name"], postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_products_name_trgm", table_name="products")
+    op.drop_index("ix_products_search_vector", table_name="products")
+    op.drop_column("products", "search_vector")
+    # pg_trgm не удаляем: им могут пользоваться и другие объекты базы
@@ -0,0 +1,46 @@
+"""delivery slots
+
+Capacity counters of delivery and pickup slots: kitchen and courier
+places per slot and delivery type, taken by orders with a delivery time.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0009"
+down_revision: Union[str, None] = "0008"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "delivery_slots",
+        # Тип delivery_type уже создан вместе с таблицей orders
+        sa.Column(
+            "delivery_type",
+            postgresql.ENUM("DELIVERY", "PICKUP", name="delivery_type", create_type=False),
+            nullable=False,
+        ),
+        sa.Column("slot_start", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("kitchen_capacity", sa.Integer(), nullable=False),
+        sa.Column("kitchen_reserved", sa.Integer(), nullable=False),
+        sa.Column("courier_capacity", sa.Integer(), nullable=False),
+        sa.Column("courier_reserved", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("delivery_type", "slot_start"),
+        sa.CheckConstraint("kitchen_capacity >= 0 AND courier_capacity >= 0", name="ck_delivery_slots_capacity"),
+        sa.CheckConstraint("kitchen_reserved >= 0 AND courier_reserved >= 0", name="ck_delivery_slots_reserved"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("delivery_slots")
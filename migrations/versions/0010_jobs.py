@@ -0,0 +1,51 @@
+"""jobs
+
+Background jobs queue: SMS and order receipts are enqueued in the
+transaction of the user or order and run after the commit.
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0010"
+down_revision: Union[str, None] = "0009"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "jobs",
+        sa.Column("id", sa.BigInteger(), primary_key=True),
+        sa.Column("job_type", sa.Enum("SEND_SMS", "SEND_ORDER_RECEIPT", name="job_type"), nullable=False),
+        sa.Column("payload", postgresql.JSONB(), nullable=False),
+        sa.Column("status", sa.Enum("QUEUED", "RUNNING", "FAILED", name="job_status"), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("run_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column("locked_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+    op.create_index(
+        "ix_jobs_queued", "jobs", ["job_type", "run_at"], postgresql_where=sa.text("status = 'QUEUED'")
+    )
+    op.create_index(
+        "ix_jobs_running", "jobs", ["job_type", "locked_at"], postgresql_where=sa.text("status = 'RUNNING'")
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_jobs_running", table_name="jobs")
+    op.drop_index("ix_jobs_queued", table_name="jobs")
+    op.drop_table("jobs")
+    sa.Enum(name="job_status").drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name="job_type").drop(op.get_bind(), checkfirst=True)
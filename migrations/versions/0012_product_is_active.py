@@ -0,0 +1,41 @@
+"""product soft delete
+
+Deleting a product hides it from the menu instead of removing the row, so
+past orders keep their items. order_items.product_id becomes RESTRICT: a
+product that has been ordered can no longer be removed by a cascade.
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0012"
+down_revision: Union[str, None] = "0011"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "products",
+        sa.Column("is_active", sa.Boolean(), server_default=sa.text("true"), nullable=False),
+    )
+    op.drop_constraint("order_items_product_id_fkey", "order_items", type_="foreignkey")
+    op.create_foreign_key(
+        "order_items_product_id_fkey", "order_items", "products", ["product_id"], ["id"], ondelete="RESTRICT"
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint("order_items_product_id_fkey", "order_items", type_="foreignkey")
+    op.create_foreign_key(
+        "order_items_product_id_fkey", "order_items", "products", ["product_id"], ["id"], ondelete="CASCADE"
+    )
+    op.drop_column("products", "is_active")
@@ -1,15 +1,154 @@
-from fastapi import Depends
+from typing import AsyncIterator
 
-from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import Depends, HTTPException, status
+from fastapi.requests import HTTPConnection
 
-from src.db.db import get_async_session
+from src.api.middleware import wrote_recently
+from src.db.db import session_maker_for
+from src.db.unit_of_work import UnitOfWork
 
 from src.repositories.users import UsersRepository
+from src.repositories.categories import CategoriesRepository
+from src.repositories.products import ProductsRepository
+from src.repositories.orders import OrdersRepository
+from src.repositories.menu import MenuRepository
+from src.repositories.analytics import AnalyticsRepository
+from src.repositories.idempotency import IdempotencyRepository
+from src.repositories.delivery_slots import DeliverySlotsRepository
+from src.repositories.jobs import JobsRepository
 from src.services.users import UsersService
+from src.services.categories import CategoriesService
+from src.services.products import ProductsService
+from src.services.orders import OrdersService
+from src.services.menu import MenuSnapshotService, menu_snapshot
+from src.services.menu_bulk import MenuBulkService
+from src.services.order_events import OrderEventsHub, order_events
+from src.services.analytics import AnalyticsService
+from src.services.delivery_slots import DeliverySlotsService
+from src.schemas.user import CurrentUser
+from src.utils.enums import UserRole
+from src.utils.security import InvalidTokenError
 
+# Токен принимается из заголовка Authorization: Bearer или из куки
+ACCESS_TOKEN_COOKIE = "access_token"
 
-def users_service(session: AsyncSession = Depends(get_async_session)) -> UsersService:
+# Запросы этих методов ничего не пишут: их транзакция не коммитится
+READ_ONLY_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+
+async def unit_of_work(connection: HTTPConnection) -> AsyncIterator[UnitOfWork]:
+    # Одна транзакция на запрос, общая для всех сервисов запроса (FastAPI кеширует зависимость).
+    # У WebSocket нет метода, они только читают
+    read_only = connection.scope.get("method", "GET") in READ_ONLY_METHODS
+    # Чтения идут на реплику, кроме клиентов, которые только что писали: реплика может отставать
+    session_maker = session_maker_for(read_only=read_only and not wrote_recently(connection))
+    async with UnitOfWork(session_maker, read_only=read_only) as uow:
+        # По этому UnitOfWork ReadYourWritesMiddleware узнаёт, что запрос закоммитил запись
+        connection.state.unit_of_work = uow
+        yield uow
+
+
+def users_service(uow: UnitOfWork = Depends(unit_of_work)) -> UsersService:
     users_repository = UsersRepository()
-    return UsersService(users_repo=users_repository, session=session)
+    return UsersService(users_repo=users_repository, jobs_repo=JobsRepository(), uow=uow)
+
+
+def menu_snapshot_service() -> MenuSnapshotService:
+    return menu_snapshot
+
+
+def categories_service(
+        uow: UnitOfWork = Depends(unit_of_work),
+        menu: MenuSnapshotService = Depends(menu_snapshot_service)
+) -> CategoriesService:
+    categories_repository = CategoriesRepository()
+    return CategoriesService(categories_repo=categories_repository, uow=uow, menu=menu)
+
+
+def products_service(
+        uow: UnitOfWork = Depends(unit_of_work),
+        menu: MenuSnapshotService = Depends(menu_snapshot_service)
+) -> ProductsService:
+    products_repository = ProductsRepository()
+    return ProductsService(products_repo=products_repository, uow=uow, menu=menu)
+
+
+def menu_bulk_service(
+        uow: UnitOfWork = Depends(unit_of_work),
+        menu: MenuSnapshotService = Depends(menu_snapshot_service)
+) -> MenuBulkService:
+    menu_repository = MenuRepository()
+    return MenuBulkService(menu_repo=menu_repository, uow=uow, menu=menu)
+
+
+def delivery_slots_service(uow: UnitOfWork = Depends(unit_of_work)) -> DeliverySlotsService:
+    slots_repository = DeliverySlotsRepository()
+    return DeliverySlotsService(slots_repo=slots_repository, uow=uow)
+
+
+def orders_service(
+        uow: UnitOfWork = Depends(unit_of_work),
+        slots: DeliverySlotsService = Depends(delivery_slots_service)
+) -> OrdersService:
+    orders_repository = OrdersRepository()
+    idempotency_repository = IdempotencyRepository()
+    return OrdersService(
+        orders_repo=orders_repository,
+        idempotency_repo=idempotency_repository,
+        slots=slots,
+        jobs_repo=JobsRepository(),
+        uow=uow,
+    )
+
+
+def analytics_service(uow: UnitOfWork = Depends(unit_of_work)) -> AnalyticsService:
+    analytics_repository = AnalyticsRepository()
+    return AnalyticsService(analytics_repo=analytics_repository, uow=uow)
+
+
+def order_events_hub() -> OrderEventsHub:
+    return order_events
+
+
+def _access_token(connection: HTTPConnection) -> str | None:
+    authorization = connection.headers.get("authorization")
+    if authorization:
+        scheme, _, token = authorization.partition(" ")
+        if scheme.lower() == "bearer" and token:
+            return token
+    return connection.cookies.get(ACCESS_TOKEN_COOKIE)
+
+
+async def current_user(connection: HTTPConnection) -> CurrentUser:
+    """
+    Resolve the user from the access token; works for HTTP and WebSocket routes.
+
+    The token is checked in its own short read-only unit of work, closed
+    before the route runs: streaming routes (SSE, WebSocket, exports) would
+    otherwise hold a pooled connection of the request for as long as the
+    client stays connected.
+    """
+    access_token = _access_token(connection)
+    if access_token is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    session_maker = session_maker_for(read_only=not wrote_recently(connection))
+    try:
+        async with UnitOfWork(session_maker, read_only=True) as uow:
+            service = UsersService(users_repo=UsersRepository(), jobs_repo=JobsRepository(), uow=uow)
+            return await service.authenticate(access_token)
+    except InvalidTokenError as e:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=str(e),
+            headers={"WWW-Authenticate": "Bearer"},
+        )
 
 
+async def admin_user(user: CurrentUser = Depends(current_user)) -> CurrentUser:
+    if user.role != UserRole.ADMINISTRATOR:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Administrator role required")
+    return user
@@ -0,0 +1,165 @@
+import functools
+import inspect
+import logging
+import time
+from collections import Counter
+from typing import Any, Callable, Coroutine
+
+from fastapi import Request, Response
+from fastapi.requests import HTTPConnection
+from fastapi.routing import APIRoute
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.utils.config import settings
+from src.utils.metrics import MetricsRegistry, RequestMetrics, current_request, metrics_registry, record_serialization
+
+logger = logging.getLogger(__name__)
+
+# Кука со временем (unix), до которого GET-запросы клиента читают с primary, а не с реплики
+PRIMARY_READS_COOKIE = "primary_reads_until"
+
+
+class RequestMetricsMiddleware:
+    """
+    Measure every HTTP request: SQL statements, DB time, pool wait and serialization.
+
+    The totals go to the Server-Timing header of the response and to the
+    per-route counters served by /metrics. In debug mode statements repeated
+    more than METRICS_N_PLUS_ONE_THRESHOLD times are logged as a likely N+1.
+
+    A plain ASGI middleware, so streaming responses are not buffered. For
+    them Server-Timing covers only the work done before the first byte.
+    """
+
+    def __init__(
+            self,
+            app: ASGIApp,
+            registry: MetricsRegistry = metrics_registry,
+            server_timing: bool = settings.metrics.SERVER_TIMING,
+            debug: bool = settings.metrics.DEBUG,
+            n_plus_one_threshold: int = settings.metrics.N_PLUS_ONE_THRESHOLD,
+    ) -> None:
+        self.app = app
+        self.registry = registry
+        self.server_timing = server_timing
+        self.debug = debug
+        self.n_plus_one_threshold = n_plus_one_threshold
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        metrics = RequestMetrics(statement_counts=Counter() if self.debug else None)
+        token = current_request.set(metrics)
+        status_code = 500
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if self.server_timing:
+                    MutableHeaders(scope=message).append("Server-Timing", metrics.server_timing())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_request.reset(token)
+            # Шаблон пути, а не сам путь, чтобы число серий не росло с числом заказов
+            route = getattr(scope.get("route"), "path", "unmatched")
+            repeated = self.debug and metrics.repeated_statements(self.n_plus_one_threshold)
+            if repeated:
+                for shape, count in repeated:
+                    logger.warning(
+                        "Possible N+1 in %s %s: statement executed %s times: %s",
+                        scope["method"], route, count, shape[:500],
+                    )
+            self.registry.observe(scope["method"], route, status_code, metrics, n_plus_one=bool(repeated))
+
+
+class ReadYourWritesMiddleware:
+    """
+    Keep the reads of a client that has just written on the primary.
+
+    When the request's unit of work commits, the response sets a cookie
+    that sends the client's GET requests to the primary for the next
+    DATABASE_READ_YOUR_WRITES_SECONDS, so a placed order shows up in the
+    history even while the replica lags behind.
+    """
+
+    def __init__(self, app: ASGIApp, window_seconds: int = settings.db.DB_READ_YOUR_WRITES_SECONDS) -> None:
+        self.app = app
+        self.window_seconds = window_seconds
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or self.window_seconds <= 0:
+            await self.app(scope, receive, send)
+            return
+
+        # Зависимость unit_of_work кладёт сюда свой UnitOfWork (request.state)
+        state = scope.setdefault("state", {})
+
+        async def send_with_cookie(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                uow = state.get("unit_of_work")
+                if uow is not None and uow.committed:
+                    until = int(time.time()) + self.window_seconds
+                    MutableHeaders(scope=message).append(
+                        "Set-Cookie",
+                        f"{PRIMARY_READS_COOKIE}={until}; Max-Age={self.window_seconds}; Path=/; HttpOnly; SameSite=Lax",
+                    )
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
+
+
+def wrote_recently(connection: HTTPConnection) -> bool:
+    """
+    Whether the client committed a write within the read-your-writes window.
+    """
+    value = connection.cookies.get(PRIMARY_READS_COOKIE)
+    try:
+        return value is not None and int(value) > time.time()
+    except ValueError:
+        return False
+
+
+class InstrumentedRoute(APIRoute):
+    """
+    APIRoute that adds the time FastAPI spends validating and encoding the
+    endpoint's return value to the serialization time of the request.
+    """
+
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any) -> None:
+        # Генераторы и синхронные эндпоинты оставляем как есть
+        if inspect.iscoroutinefunction(endpoint):
+            endpoint = _mark_finished(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        handler = super().get_route_handler()
+
+        async def timed_handler(request: Request) -> Response:
+            response = await handler(request)
+            metrics = current_request.get()
+            if metrics is not None and metrics.endpoint_finished_at is not None:
+                record_serialization(time.perf_counter() - metrics.endpoint_finished_at)
+                metrics.endpoint_finished_at = None
+            return response
+
+        return timed_handler
+
+
+def _mark_finished(endpoint: Callable[..., Coroutine[Any, Any, Any]]) -> Callable[..., Coroutine[Any, Any, Any]]:
+    # FastAPI разбирает сигнатуру исходной функции через __wrapped__
+    @functools.wraps(endpoint)
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:
+        result = await endpoint(*args, **kwargs)
+        metrics = current_request.get()
+        if metrics is not None:
+            metrics.endpoint_finished_at = time.perf_counter()
+        return result
+
+    return wrapper
@@ -0,0 +1,19 @@
+from fastapi import Request, Response
+
+from src.services.menu import EncodedDocument
+
+
+def etag_response(request: Request, document: EncodedDocument) -> Response:
+    """
+    Serve a pre-encoded JSON document, answering 304 when the client
+    already has it (If-None-Match matches the document's ETag).
+    """
+    headers = {"ETag": document.etag, "Cache-Control": "no-cache"}
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        client_etags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        if document.etag in client_etags or "*" in client_etags:
+            return Response(status_code=304, headers=headers)
+
+    return Response(content=document.body, media_type="application/json", headers=headers)
@@ -2,10 +2,20 @@ from src.api.routes.users import router as users_router
 from src.api.routes.products import router as products_router
 from src.api.routes.categories import router as categories_router
 from src.api.routes.orders import router as orders_router
+from src.api.routes.delivery_slots import router as delivery_slots_router
+from src.api.routes.menu import router as menu_router
+from src.api.routes.analytics import router as analytics_router
+from src.api.routes.system import router as system_router
+from src.api.routes.metrics import router as metrics_router
 
 all_routers = [
     users_router,
     products_router,
     categories_router,
-    orders_router
+    orders_router,
+    delivery_slots_router,
+    menu_router,
+    analytics_router,
+    system_router,
+    metrics_router
 ]
@@ -0,0 +1,59 @@
+from datetime import date
+from typing import Annotated, List, Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+
+from src.api.dependencies import admin_user, analytics_service
+from src.api.middleware import InstrumentedRoute
+from src.schemas.analytics import AnalyticsRefreshRead, SalesReport, TopProductRead
+from src.services.analytics import AnalyticsService
+
+router = APIRouter(
+    route_class=InstrumentedRoute,
+    prefix="/analytics",
+    tags=["Analytics"],
+    dependencies=[Depends(admin_user)]
+)
+
+
+def _check_period(date_from: date, date_to: date) -> None:
+    if date_from > date_to:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="date_from must not be after date_to")
+
+
+@router.get(
+    path="/sales"
+)
+async def get_sales(
+        date_from: date,
+        date_to: date,
+        service: Annotated[AnalyticsService, Depends(analytics_service)]
+) -> SalesReport:
+    # Выручка по дням, средний чек, доставка/самовывоз и доля позиций с топпингами; период включительно
+    _check_period(date_from, date_to)
+    return await service.get_sales(date_from=date_from, date_to=date_to)
+
+
+@router.get(
+    path="/top-products"
+)
+async def get_top_products(
+        date_from: date,
+        date_to: date,
+        service: Annotated[AnalyticsService, Depends(analytics_service)],
+        limit: Annotated[int, Query(ge=1, le=100)] = 10,
+        order_by: Literal["revenue", "quantity"] = "revenue"
+) -> List[TopProductRead]:
+    _check_period(date_from, date_to)
+    return await service.get_top_products(date_from=date_from, date_to=date_to, limit=limit, order_by=order_by)
+
+
+@router.post(
+    path="/refresh"
+)
+async def refresh_rollups(
+        service: Annotated[AnalyticsService, Depends(analytics_service)],
+        full: bool = False
+) -> AnalyticsRefreshRead:
+    # Обычно агрегаты пересчитываются в фоне, см. ANALYTICS_REFRESH_INTERVAL_SECONDS
+    return await service.refresh(full=full)
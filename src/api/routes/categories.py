@@ -1,36 +1,101 @@
-from fastapi import APIRouter, Depends
+from typing import Annotated, List
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+
+from src.api.dependencies import admin_user, categories_service, menu_snapshot_service
+from src.api.middleware import InstrumentedRoute
+from src.api.responses import etag_response
+from src.schemas.category import CategoryCreate, CategoryRead, CategoryUpdate
+from src.services.categories import (
+    CategoriesService,
+    CategoryAlreadyExistsError,
+    CategoryCycleError,
+    CategoryInUseError,
+    ParentCategoryNotFoundError,
+)
+from src.services.menu import MenuSnapshotService
 
 router = APIRouter(
+    route_class=InstrumentedRoute,
     prefix="/categories",
     tags=["Categories"]
 )
 
 @router.get(
-    path="/"
+    path="/",
+    response_model=List[CategoryRead]
 )
-async def get_categories():
-    pass
+async def get_categories(
+        request: Request,
+        menu: Annotated[MenuSnapshotService, Depends(menu_snapshot_service)]
+) -> Response:
+    # Дерево категорий отдаётся из снапшота в памяти, без обращения к БД
+    snapshot = await menu.get()
+    return etag_response(request, snapshot.categories)
 
 @router.get(
-    path="/{category_id}"
+    path="/{category_id}",
+    response_model=CategoryRead
 )
-async def get_category_by_id(category_id: int):
-    pass
+async def get_category_by_id(
+        category_id: int,
+        request: Request,
+        menu: Annotated[MenuSnapshotService, Depends(menu_snapshot_service)]
+) -> Response:
+    snapshot = await menu.get()
+    document = snapshot.category_by_id.get(category_id)
+    if document is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Category not found")
+    return etag_response(request, document)
 
 @router.post(
-    path="/"
+    path="/",
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(admin_user)]
 )
-async def create_category():
-    pass
+async def create_category(
+        category: CategoryCreate,
+        service: Annotated[CategoriesService, Depends(categories_service)]
+) -> CategoryRead:
+    try:
+        return await service.create_category(category)
+    except CategoryAlreadyExistsError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    except ParentCategoryNotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
 
 @router.patch(
-    path="/{category_id}"
+    path="/{category_id}",
+    dependencies=[Depends(admin_user)]
 )
-async def update_category(category_id: int):
-    pass
+async def update_category(
+        category_id: int,
+        category: CategoryUpdate,
+        service: Annotated[CategoriesService, Depends(categories_service)]
+) -> CategoryRead:
+    try:
+        updated = await service.update_category(category_id, category)
+    except CategoryAlreadyExistsError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    except (ParentCategoryNotFoundError, CategoryCycleError) as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+    if updated is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Category not found")
+    return updated
 
 @router.delete(
-    path="/{category_id}"
+    path="/{category_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    dependencies=[Depends(admin_user)]
 )
-async def delete_category(category_id: int):
-    pass
\ No newline at end of file
+async def delete_category(
+        category_id: int,
+        service: Annotated[CategoriesService, Depends(categories_service)]
+) -> Response:
+    try:
+        deleted = await service.delete_category(category_id)
+    except CategoryInUseError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    if not deleted:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Category not found")
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,45 @@
+from datetime import datetime
+from typing import Annotated, List
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+
+from src.api.dependencies import admin_user, delivery_slots_service
+from src.api.middleware import InstrumentedRoute
+from src.schemas.delivery_slot import DeliverySlotCapacityRead, DeliverySlotCapacityUpdate, DeliverySlotRead
+from src.services.delivery_slots import DeliverySlotsService, InvalidDeliveryTimeError
+from src.utils.enums import DeliveryType
+
+router = APIRouter(
+    route_class=InstrumentedRoute,
+    prefix="/delivery-slots",
+    tags=["Delivery slots"]
+)
+
+
+@router.get(
+    path="/"
+)
+async def get_available_slots(
+        service: Annotated[DeliverySlotsService, Depends(delivery_slots_service)],
+        delivery_type: DeliveryType = DeliveryType.DELIVERY,
+        hours: Annotated[int, Query(ge=1, le=168)] = 24
+) -> List[DeliverySlotRead]:
+    # Слоты со свободными местами на ближайшие hours часов (не дальше DELIVERY_HORIZON_HOURS);
+    # считаются по счётчикам слотов, заказы не читаются
+    return await service.get_available_slots(delivery_type=delivery_type, hours=hours)
+
+
+@router.put(
+    path="/{delivery_type}/{slot_start}",
+    dependencies=[Depends(admin_user)]
+)
+async def set_slot_capacity(
+        delivery_type: DeliveryType,
+        slot_start: datetime,
+        capacity: DeliverySlotCapacityUpdate,
+        service: Annotated[DeliverySlotsService, Depends(delivery_slots_service)]
+) -> DeliverySlotCapacityRead:
+    try:
+        return await service.set_capacity(delivery_type=delivery_type, slot_start=slot_start, capacity=capacity)
+    except InvalidDeliveryTimeError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
@@ -0,0 +1,80 @@
+from typing import Annotated, Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
+
+from src.api.dependencies import admin_user, menu_bulk_service
+from src.api.middleware import InstrumentedRoute
+from src.schemas.menu import MenuDocument, MenuImportReport
+from src.services.menu_bulk import MenuBulkService, export_menu
+from src.utils.config import settings
+from src.utils.menu_document import MenuDocumentError, parse_menu_csv, parse_menu_json
+
+router = APIRouter(
+    route_class=InstrumentedRoute,
+    prefix="/menu",
+    tags=["Menu"],
+    dependencies=[Depends(admin_user)]
+)
+
+MENU_MEDIA_TYPES = {"json": "application/json", "csv": "text/csv"}
+
+
+async def _read_body(request: Request, max_bytes: int) -> bytes:
+    # Тело читается частями и обрывается на лимите: Content-Length может не быть (chunked) или он может врать
+    too_large = HTTPException(
+        status_code=status.HTTP_413_CONTENT_TOO_LARGE,
+        detail=f"Menu document must not exceed {max_bytes} bytes",
+    )
+    content_length = request.headers.get("content-length", "")
+    if content_length.isdigit() and int(content_length) > max_bytes:
+        raise too_large
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > max_bytes:
+            raise too_large
+    return bytes(body)
+
+
+@router.post(
+    path="/import",
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {"schema": MenuDocument.model_json_schema()},
+                "text/csv": {"schema": {"type": "string"}},
+            },
+        }
+    }
+)
+async def import_menu(
+        request: Request,
+        service: Annotated[MenuBulkService, Depends(menu_bulk_service)],
+        dry_run: bool = False
+) -> MenuImportReport:
+    # Формат определяется по Content-Type: text/csv или JSON
+    body = await _read_body(request, settings.menu.IMPORT_MAX_BYTES)
+    try:
+        if request.headers.get("content-type", "").startswith("text/csv"):
+            document = parse_menu_csv(body.decode("utf-8-sig"))
+        else:
+            document = parse_menu_json(body)
+        return await service.import_document(document, dry_run=dry_run)
+    except (MenuDocumentError, UnicodeDecodeError) as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+
+
+@router.get(
+    path="/export",
+    response_class=StreamingResponse
+)
+async def export_menu_document(
+        format: Literal["json", "csv"] = "json"
+) -> StreamingResponse:
+    return StreamingResponse(
+        export_menu(format),
+        media_type=MENU_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="menu.{format}"'},
+    )
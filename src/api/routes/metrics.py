@@ -0,0 +1,52 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+
+from src.api.dependencies import admin_user
+from src.db.db import engine, replica_engine, replica_health
+from src.db.pool import get_pool_stats, replica_pool_stats
+from src.utils.metrics import metrics_registry
+
+# Метрики раскрывают маршруты и нагрузку: Prometheus ходит за ними с токеном администратора
+router = APIRouter(
+    tags=["System"],
+    dependencies=[Depends(admin_user)]
+)
+
+# Счётчики пула из get_pool_stats(), которые отдаются вместе с метриками запросов
+POOL_METRICS = [
+    ("checkouts", "counter", "Connections checked out of the pool."),
+    ("connects", "counter", "New database connections opened."),
+    ("invalidations", "counter", "Connections invalidated after an error."),
+    ("timeouts", "counter", "Checkouts that timed out waiting for a connection."),
+    ("wait_seconds_total", "counter", "Time spent waiting for a connection, requests and background tasks."),
+    ("checked_out", "gauge", "Connections in use right now."),
+    ("overflow", "gauge", "Connections opened above pool_size."),
+]
+
+
+@router.get(
+    path="/metrics",
+    response_class=PlainTextResponse,
+    include_in_schema=False
+)
+async def metrics() -> PlainTextResponse:
+    # Формат Prometheus text 0.0.4; метрики текущего воркера
+    pools = [("db_pool", get_pool_stats(engine))]
+    if replica_engine is not None:
+        pools.append(("db_replica_pool", get_pool_stats(replica_engine, replica_pool_stats)))
+    extra = [
+        (f"{prefix}_{name}", kind, help_text, pool[name])
+        for prefix, pool in pools
+        for name, kind, help_text in POOL_METRICS
+        if pool.get(name) is not None
+    ]
+    if replica_engine is not None:
+        extra.append((
+            "db_replica_available", "gauge",
+            "1 if reads go to the replica, 0 while it is skipped after an error.",
+            int(replica_health.available),
+        ))
+    return PlainTextResponse(
+        metrics_registry.render(extra),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
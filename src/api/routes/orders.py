@@ -1,6 +1,168 @@
-from fastapi import APIRouter, Depends
+import asyncio
+from datetime import datetime
+from typing import Annotated, List, Literal, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import StreamingResponse
+
+from src.api.dependencies import admin_user, current_user, order_events_hub, orders_service
+from src.api.middleware import InstrumentedRoute
+from src.db.db import session_maker_for
+from src.schemas.cart import CartCreate
+from src.schemas.order import OrderRead, OrderStatusEvent, OrderStatusUpdate
+from src.schemas.user import CurrentUser
+from src.services.delivery_slots import DeliverySlotFullError, InvalidDeliveryTimeError
+from src.services.order_events import OrderEventsHub, OrderEventsSubscription
+from src.services.order_export import export_orders
+from src.services.orders import (
+    CartValidationError,
+    IdempotencyKeyReusedError,
+    InvalidStatusTransitionError,
+    OrderNotFoundError,
+    OrdersService,
+)
+from src.utils.enums import OrderStatus
 
 router = APIRouter(
+    route_class=InstrumentedRoute,
     prefix="/orders",
     tags=["Orders"]
-)
\ No newline at end of file
+)
+
+# Как часто отправлять комментарий в SSE-поток, чтобы прокси не закрывали соединение
+SSE_KEEPALIVE_SECONDS = 15
+
+
+@router.post(
+    path="/",
+    status_code=status.HTTP_201_CREATED
+)
+async def place_order(
+        cart: CartCreate,
+        user: Annotated[CurrentUser, Depends(current_user)],
+        service: Annotated[OrdersService, Depends(orders_service)],
+        response: Response,
+        idempotency_key: Annotated[Optional[str], Header(min_length=1, max_length=255)] = None
+) -> OrderRead:
+    # С Idempotency-Key повтор запроса (ретрай клиента, двойное нажатие) вернёт уже созданный заказ
+    try:
+        if idempotency_key is None:
+            return await service.place_order(cart, user_id=user.id)
+        order, replayed = await service.place_order_idempotent(cart, user_id=user.id, idempotency_key=idempotency_key)
+    except (CartValidationError, IdempotencyKeyReusedError, InvalidDeliveryTimeError) as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+    except DeliverySlotFullError as e:
+        # Свободные слоты -- GET /delivery-slots/
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+    return order
+
+
+@router.get(
+    path="/queue",
+    dependencies=[Depends(admin_user)]
+)
+async def get_orders_queue(
+        service: Annotated[OrdersService, Depends(orders_service)],
+        order_status: Annotated[List[OrderStatus], Query(alias="status")] = [OrderStatus.PAID, OrderStatus.PREPARING],
+        limit: Annotated[int, Query(ge=1, le=500)] = 100
+) -> List[OrderRead]:
+    # Начальное состояние экрана кухни/курьеров, дальше изменения приходят через /orders/events
+    return await service.get_queue(statuses=order_status, limit=limit)
+
+
+@router.get(
+    path="/export",
+    response_class=StreamingResponse,
+    dependencies=[Depends(admin_user)]
+)
+async def export_orders_document(
+        date_from: datetime,
+        date_to: datetime,
+        format: Literal["csv", "ndjson"] = "csv"
+) -> StreamingResponse:
+    # Выгрузка для бухгалтерии за период [date_from, date_to), читается потоково
+    if date_from >= date_to:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="date_from must be before date_to")
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    filename = f"orders-{date_from:%Y%m%d}-{date_to:%Y%m%d}.{format}"
+    return StreamingResponse(
+        # Самое тяжёлое чтение в API, его и стоит уводить на реплику
+        export_orders(format, date_from=date_from, date_to=date_to, session_maker=session_maker_for(read_only=True)),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.patch(
+    path="/{order_id}/status",
+    dependencies=[Depends(admin_user)]
+)
+async def change_order_status(
+        order_id: int,
+        update: OrderStatusUpdate,
+        service: Annotated[OrdersService, Depends(orders_service)]
+) -> OrderStatusEvent:
+    try:
+        return await service.change_status(order_id=order_id, status=update.status)
+    except OrderNotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except InvalidStatusTransitionError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+
+
+async def _sse_stream(request: Request, hub: OrderEventsHub, subscription: OrderEventsSubscription):
+    try:
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.queue.get(), timeout=SSE_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    break
+                yield ": keep-alive\n\n"
+                continue
+            yield f"event: order_status\ndata: {event.model_dump_json()}\n\n"
+    finally:
+        hub.unsubscribe(subscription)
+
+
+@router.get(
+    path="/events",
+    dependencies=[Depends(admin_user)]
+)
+async def order_events_stream(
+        request: Request,
+        hub: Annotated[OrderEventsHub, Depends(order_events_hub)],
+        order_status: Annotated[List[OrderStatus], Query(alias="status")] = [],
+        order_id: Optional[int] = None
+) -> StreamingResponse:
+    # Server-Sent Events со сменами статусов, отфильтрованные по статусу и/или заказу
+    subscription = hub.subscribe(statuses=set(order_status), order_id=order_id)
+    return StreamingResponse(
+        _sse_stream(request, hub, subscription),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.websocket(
+    path="/ws",
+    dependencies=[Depends(admin_user)]
+)
+async def order_events_websocket(
+        websocket: WebSocket,
+        hub: Annotated[OrderEventsHub, Depends(order_events_hub)],
+        order_status: Annotated[List[OrderStatus], Query(alias="status")] = [],
+        order_id: Optional[int] = None
+) -> None:
+    await websocket.accept()
+    subscription = hub.subscribe(statuses=set(order_status), order_id=order_id)
+    try:
+        while True:
+            event = await subscription.queue.get()
+            await websocket.send_text(event.model_dump_json())
+    except WebSocketDisconnect:
+        pass
+    finally:
+        hub.unsubscribe(subscription)
@@ -1,36 +1,116 @@
-from fastapi import APIRouter, Depends
+from typing import Annotated, List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+
+from src.api.dependencies import admin_user, products_service, menu_snapshot_service
+from src.api.middleware import InstrumentedRoute
+from src.api.responses import etag_response
+from src.schemas.product import ProductCreate, ProductListItem, ProductRead, ProductSearchPage, ProductUpdate
+from src.services.products import (
+    SEARCH_MAX_OFFSET, ProductAlreadyExistsError, ProductsService, SubcategoryNotFoundError
+)
+from src.services.menu import MenuSnapshotService
 
 router = APIRouter(
+    route_class=InstrumentedRoute,
     prefix="/products",
     tags=["Products"]
 )
 
 @router.get(
-    path="/"
+    path="/",
+    response_model=List[ProductListItem]
+)
+async def get_products(
+        request: Request,
+        menu: Annotated[MenuSnapshotService, Depends(menu_snapshot_service)]
+) -> Response:
+    # Каталог продуктов отдаётся из снапшота в памяти, без обращения к БД
+    snapshot = await menu.get()
+    return etag_response(request, snapshot.products)
+
+# Объявлен раньше /{product_id}, иначе "search" разбирался бы как id
+@router.get(
+    path="/search"
 )
-async def get_products():
-    pass
+async def search_products(
+        q: Annotated[str, Query(min_length=2, max_length=100)],
+        service: Annotated[ProductsService, Depends(products_service)],
+        subcategory_id: Optional[int] = None,
+        price_min: Annotated[Optional[int], Query(ge=0, description="Amount in kopecks")] = None,
+        price_max: Annotated[Optional[int], Query(ge=0, description="Amount in kopecks")] = None,
+        limit: Annotated[int, Query(ge=1, le=50)] = 20,
+        offset: Annotated[int, Query(ge=0, le=SEARCH_MAX_OFFSET)] = 0
+) -> ProductSearchPage:
+    # Поиск по названию и описанию со стеммингом и опечатками; идёт в базу (реплику), а не в снапшот меню
+    return await service.search_products(
+        query=q,
+        limit=limit,
+        offset=offset,
+        subcategory_id=subcategory_id,
+        price_min=price_min,
+        price_max=price_max,
+    )
 
 @router.get(
-    path="/{product_id}"
+    path="/{product_id}",
+    response_model=ProductRead
 )
-async def get_product_by_id(product_id: int):
-    pass
+async def get_product_by_id(
+        product_id: int,
+        request: Request,
+        menu: Annotated[MenuSnapshotService, Depends(menu_snapshot_service)]
+) -> Response:
+    snapshot = await menu.get()
+    document = snapshot.product_by_id.get(product_id)
+    if document is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found")
+    return etag_response(request, document)
 
 @router.post(
-    path="/"
+    path="/",
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(admin_user)]
 )
-async def create_product():
-    pass
+async def create_product(
+        product: ProductCreate,
+        service: Annotated[ProductsService, Depends(products_service)]
+) -> ProductRead:
+    try:
+        return await service.create_product(product)
+    except ProductAlreadyExistsError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    except SubcategoryNotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
 
 @router.patch(
-    path="/{product_id}"
+    path="/{product_id}",
+    dependencies=[Depends(admin_user)]
 )
-async def update_product(product_id: int):
-    pass
+async def update_product(
+        product_id: int,
+        product: ProductUpdate,
+        service: Annotated[ProductsService, Depends(products_service)]
+) -> ProductRead:
+    try:
+        updated = await service.update_product(product_id, product)
+    except ProductAlreadyExistsError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    except SubcategoryNotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+    if updated is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found")
+    return updated
 
 @router.delete(
-    path="/{product_id}"
+    path="/{product_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    dependencies=[Depends(admin_user)]
 )
-async def delete_product(product_id: int):
-    pass
\ No newline at end of file
+async def delete_product(
+        product_id: int,
+        service: Annotated[ProductsService, Depends(products_service)]
+) -> Response:
+    if not await service.delete_product(product_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found")
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,26 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+
+from src.api.dependencies import admin_user
+from src.api.middleware import InstrumentedRoute
+from src.db.db import engine, replica_engine
+from src.db.pool import get_pool_stats, replica_pool_stats
+from src.schemas.system import PoolStatsRead
+
+router = APIRouter(
+    route_class=InstrumentedRoute,
+    prefix="/system",
+    tags=["System"],
+    dependencies=[Depends(admin_user)]
+)
+
+
+@router.get(
+    path="/pool"
+)
+async def pool_status(replica: bool = False) -> PoolStatsRead:
+    # Счётчики пула соединений текущего воркера; replica=true -- пул реплики
+    if not replica:
+        return get_pool_stats(engine)
+    if replica_engine is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Read replica is not configured")
+    return get_pool_stats(replica_engine, replica_pool_stats)
@@ -1,53 +1,153 @@
-from typing import Annotated, List
+from typing import Annotated, Optional
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+
+from src.api.dependencies import ACCESS_TOKEN_COOKIE, current_user, orders_service, users_service
+from src.api.middleware import InstrumentedRoute
+from src.schemas.order import OrderHistoryPage, OrderRead
+from src.schemas.user import AuthToken, CurrentUser, UserCreate, UserLogin, UserRead, UserUpdate
+from src.services.orders import OrderNotFoundError, OrdersService
+from src.services.users import InvalidCredentialsError, UserAlreadyExistsError, UserNotFoundError, UsersService
+from src.utils.config import settings
+from src.utils.pagination import InvalidCursorError
 
 router = APIRouter(
+    route_class=InstrumentedRoute,
     prefix="/users",
     tags=["Users"]
 )
 
 
+def _set_token_cookie(response: Response, token: AuthToken) -> None:
+    response.set_cookie(
+        key=ACCESS_TOKEN_COOKIE,
+        value=token.access_token,
+        max_age=settings.token.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+        httponly=True,
+        samesite="lax",
+    )
+
+
 @router.post(
-    path="/register"
+    path="/register",
+    status_code=status.HTTP_201_CREATED
 )
 async def register_user(
-
-):
-    pass
+        user: UserCreate,
+        response: Response,
+        service: Annotated[UsersService, Depends(users_service)]
+) -> AuthToken:
+    try:
+        token = await service.register_user(user)
+    except UserAlreadyExistsError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    _set_token_cookie(response, token)
+    return token
 
 
 @router.post(
     path="/login"
 )
 async def login_user(
+        credentials: UserLogin,
+        response: Response,
+        service: Annotated[UsersService, Depends(users_service)]
+) -> AuthToken:
+    try:
+        token = await service.login_user(credentials)
+    except InvalidCredentialsError as e:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=str(e))
+    _set_token_cookie(response, token)
+    return token
 
-):
-    pass
+
+@router.post(
+    path="/logout",
+    status_code=status.HTTP_204_NO_CONTENT
+)
+async def logout_user(
+        user: Annotated[CurrentUser, Depends(current_user)],
+        service: Annotated[UsersService, Depends(users_service)]
+) -> Response:
+    # Отзываем все выданные пользователю токены
+    await service.revoke_tokens(user.id)
+    response = Response(status_code=status.HTTP_204_NO_CONTENT)
+    response.delete_cookie(ACCESS_TOKEN_COOKIE)
+    return response
 
 
 @router.get(
     path="/me"
 )
 async def whoami(
-
-):
-    pass
+        user: Annotated[CurrentUser, Depends(current_user)],
+        service: Annotated[UsersService, Depends(users_service)]
+) -> UserRead:
+    try:
+        return await service.get_profile(user.id)
+    except UserNotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
 
 
 @router.patch(
     path="/me"
 )
 async def update_user(
-
-):
-    pass
+        update: UserUpdate,
+        user: Annotated[CurrentUser, Depends(current_user)],
+        service: Annotated[UsersService, Depends(users_service)]
+) -> UserRead:
+    try:
+        return await service.update_profile(user.id, update)
+    except UserNotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except UserAlreadyExistsError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
 
 
 @router.delete(
-    path="/me"
+    path="/me",
+    status_code=status.HTTP_204_NO_CONTENT
 )
 async def delete_user(
+        user: Annotated[CurrentUser, Depends(current_user)],
+        service: Annotated[UsersService, Depends(users_service)]
+) -> Response:
+    try:
+        await service.delete_user(user.id)
+    except UserNotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    response = Response(status_code=status.HTTP_204_NO_CONTENT)
+    response.delete_cookie(ACCESS_TOKEN_COOKIE)
+    return response
+
+
+@router.get(
+    path="/me/orders"
+)
+async def get_order_history(
+        user: Annotated[CurrentUser, Depends(current_user)],
+        service: Annotated[OrdersService, Depends(orders_service)],
+        limit: Annotated[int, Query(ge=1, le=100)] = 20,
+        cursor: Optional[str] = None
+) -> OrderHistoryPage:
+    # Постраничная история заказов: курсор берётся из next_cursor предыдущей страницы
+    try:
+        return await service.get_order_history(user_id=user.id, limit=limit, cursor=cursor)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
 
-):
-    pass
+@router.get(
+    path="/me/orders/{order_id}"
+)
+async def get_order(
+        order_id: int,
+        user: Annotated[CurrentUser, Depends(current_user)],
+        service: Annotated[OrdersService, Depends(orders_service)]
+) -> OrderRead:
+    # Полный заказ с позициями и оплатой; в истории только сводка
+    try:
+        return await service.get_user_order(user_id=user.id, order_id=order_id)
+    except OrderNotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
@@ -8,7 +8,13 @@ from src.models.models import (
     Order,
     OrderItem,
     OrderItemTopping,
-    Payment
+    Payment,
+    DailySales,
+    DailyProductSales,
+    AnalyticsRefreshState,
+    IdempotencyKey,
+    DeliverySlot,
+    Job
 )
 
-# This import is used for creating tables
\ No newline at end of file
+# This import registers all models in Base.metadata (used by Alembic autogenerate in migrations/env.py)
\ No newline at end of file
@@ -1,32 +1,64 @@
-from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.pool import NullPool
+from src.db.instrumentation import instrument_statements
+from src.db.pool import engine_options, instrument_pool, replica_pool_stats
+from src.db.replica import ReplicaHealth, ReplicaSession, instrument_replica
 from src.utils.config import settings
-import logging
 
 # Database configuration for connection
 DATABASE_URL = f"postgresql+asyncpg://{settings.db.DB_USER}:{settings.db.DB_PASSWORD}@{settings.db.DB_HOST}:{settings.db.DB_PORT}/{settings.db.DB_NAME}"
 
-# Async engine for PostgreSQL
-engine = create_async_engine(DATABASE_URL)
+# Async engine for PostgreSQL, pool settings come from DBSettings
+engine = create_async_engine(DATABASE_URL, **engine_options(settings.db))
+instrument_pool(engine)
+# Число выражений и время в базе для каждого запроса, см. src/api/middleware.py
+instrument_statements(engine)
 
 # Async sessions
 async_session_maker = async_sessionmaker(engine, expire_on_commit=False)
 
 
-# Base class for models in src/models/models.py
-class Base(DeclarativeBase):
-    pass
+def create_unpooled_engine() -> AsyncEngine:
+    """
+    Engine without a pool for short one-off commands such as migrations.
+
+    Connects like the application engine (same connect_args), so it also
+    works through pgbouncer in transaction mode.
+    """
+    return create_async_engine(DATABASE_URL, poolclass=NullPool, connect_args=engine_options(settings.db)["connect_args"])
 
+# Read replica for GET requests, see session_maker_for()
+replica_engine: Optional[AsyncEngine] = None
+replica_session_maker: Optional[async_sessionmaker] = None
+replica_health = ReplicaHealth(retry_seconds=settings.db.DB_REPLICA_RETRY_SECONDS)
+if settings.db.DB_REPLICA_HOST:
+    REPLICA_URL = f"postgresql+asyncpg://{settings.db.DB_USER}:{settings.db.DB_PASSWORD}@{settings.db.DB_REPLICA_HOST}:{settings.db.DB_REPLICA_PORT}/{settings.db.DB_NAME}"
+    replica_options = engine_options(settings.db, stats=replica_pool_stats)
+    replica_options["connect_args"]["timeout"] = settings.db.DB_REPLICA_CONNECT_TIMEOUT
+    replica_engine = create_async_engine(REPLICA_URL, **replica_options)
+    instrument_pool(replica_engine, stats=replica_pool_stats)
+    instrument_statements(replica_engine)
+    instrument_replica(replica_engine, replica_health)
+    replica_session_maker = async_sessionmaker(
+        replica_engine,
+        sync_session_class=ReplicaSession,
+        expire_on_commit=False,
+        info={"primary": engine.sync_engine, "replica_health": replica_health},
+    )
 
-# Database initialization and table creating
-async def init_db():
-    async with engine.begin() as conn:
-        logging.info("Creating tables POSTGRESQL!")
-        await conn.run_sync(Base.metadata.create_all)
-    logging.info("Tables created!")
 
+def session_maker_for(read_only: bool) -> async_sessionmaker:
+    """
+    Sessions for a unit of work: the replica for reads when it is configured, otherwise the primary.
+    """
+    if read_only and replica_session_maker is not None:
+        return replica_session_maker
+    return async_session_maker
 
-# Async sessions generator
-async def get_async_session():
-    async with async_session_maker() as session:
-        yield session
+
+# Base class for models in src/models/models.py
+class Base(DeclarativeBase):
+    pass
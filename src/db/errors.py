@@ -0,0 +1,29 @@
+from typing import Optional
+
+from sqlalchemy.exc import IntegrityError
+
+# SQLSTATE нарушений ограничений в PostgreSQL
+UNIQUE_VIOLATION = "23505"
+FOREIGN_KEY_VIOLATION = "23503"
+
+
+def unique_violation(error: IntegrityError) -> Optional[str]:
+    """
+    Name of the unique constraint the statement violated; None for other integrity errors.
+    """
+    return _violated_constraint(error, UNIQUE_VIOLATION)
+
+
+def foreign_key_violation(error: IntegrityError) -> Optional[str]:
+    """
+    Name of the foreign key the statement violated; None for other integrity errors.
+    """
+    return _violated_constraint(error, FOREIGN_KEY_VIOLATION)
+
+
+def _violated_constraint(error: IntegrityError, sqlstate: str) -> Optional[str]:
+    dbapi_error = error.orig
+    if getattr(dbapi_error, "pgcode", None) != sqlstate:
+        return None
+    # asyncpg передаёт имя ограничения в исходном исключении драйвера
+    return getattr(getattr(dbapi_error, "orig", None), "constraint_name", None)
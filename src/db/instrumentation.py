@@ -0,0 +1,40 @@
+import time
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from src.utils.metrics import current_request
+
+# Ключ в connection.info со временем начала выражений, которые сейчас выполняются
+_STARTED_KEY = "request_metrics_started"
+
+
+def instrument_statements(engine: AsyncEngine) -> None:
+    """
+    Attach cursor event listeners that count statements and DB time per request.
+
+    Listeners run in the context of the request that awaits the statement,
+    so they only touch the RequestMetrics of that request and do nothing
+    outside of requests.
+    """
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if current_request.get() is not None:
+            conn.info.setdefault(_STARTED_KEY, []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        metrics = current_request.get()
+        started = conn.info.get(_STARTED_KEY)
+        if metrics is not None and started:
+            metrics.record_statement(statement, time.perf_counter() - started.pop())
+
+    @event.listens_for(sync_engine, "handle_error")
+    def handle_error(exception_context):
+        # Упавшее выражение не доходит до after_cursor_execute
+        connection = exception_context.connection
+        started = connection.info.get(_STARTED_KEY) if connection is not None else None
+        if started:
+            started.pop()
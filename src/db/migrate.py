@@ -0,0 +1,48 @@
+import asyncio
+import logging
+from pathlib import Path
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import text
+
+from src.db.db import create_unpooled_engine
+
+ALEMBIC_INI = Path(__file__).resolve().parents[2] / "alembic.ini"
+
+# Ревизия, соответствующая схеме, которую раньше создавал Base.metadata.create_all
+BASELINE_REVISION = "0001"
+
+
+def alembic_config() -> Config:
+    return Config(str(ALEMBIC_INI))
+
+
+async def _created_by_create_all() -> bool:
+    """
+    Check whether the schema exists but has never been managed by Alembic.
+    """
+    engine = create_unpooled_engine()
+    try:
+        async with engine.connect() as conn:
+            result = await conn.execute(text(
+                "SELECT to_regclass('public.users') IS NOT NULL, "
+                "to_regclass('public.alembic_version') IS NOT NULL"
+            ))
+            has_tables, has_version_table = result.one()
+    finally:
+        await engine.dispose()
+    return has_tables and not has_version_table
+
+
+def run_migrations(revision: str = "head") -> None:
+    """
+    Apply migrations up to the given revision; run once per deploy, not per worker.
+    """
+    config = alembic_config()
+
+    if asyncio.run(_created_by_create_all()):
+        logging.info("Existing schema without migrations history, stamping revision %s", BASELINE_REVISION)
+        command.stamp(config, BASELINE_REVISION)
+
+    command.upgrade(config, revision)
@@ -0,0 +1,134 @@
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Dict
+from uuid import uuid4
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
+
+from src.utils.config import DBSettings
+from src.utils.metrics import record_pool_wait
+
+
+@dataclass
+class PoolStats:
+    """
+    Counters of the connection pool of one worker process.
+
+    wait_* counters measure how long checkout() took, including opening
+    a new connection when the pool had none idle. Together with overflow
+    and timeouts they show whether pool_size/max_overflow fit the load.
+    """
+    checkouts: int = 0
+    checkins: int = 0
+    connects: int = 0
+    invalidations: int = 0
+    timeouts: int = 0
+    wait_seconds_total: float = 0.0
+    wait_seconds_max: float = 0.0
+
+    def record_wait(self, seconds: float) -> None:
+        self.wait_seconds_total += seconds
+        if seconds > self.wait_seconds_max:
+            self.wait_seconds_max = seconds
+
+
+# Счётчики пулов primary и реплики, по одному на процесс
+pool_stats = PoolStats()
+replica_pool_stats = PoolStats()
+
+
+class InstrumentedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """
+    AsyncAdaptedQueuePool that measures time spent waiting for a connection.
+    """
+
+    stats: PoolStats = pool_stats
+
+    def _do_get(self) -> Any:
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            self.stats.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            self.stats.record_wait(waited)
+            record_pool_wait(waited)
+
+
+def engine_options(db: DBSettings, stats: PoolStats = pool_stats) -> Dict[str, Any]:
+    """
+    Build create_async_engine() keyword arguments from DBSettings.
+
+    :param stats: counters the pool of this engine feeds.
+    """
+    connect_args: Dict[str, Any] = {"statement_cache_size": db.DB_STATEMENT_CACHE_SIZE}
+    options: Dict[str, Any] = {
+        "pool_pre_ping": db.DB_POOL_PRE_PING,
+        "connect_args": connect_args,
+    }
+
+    if db.DB_STATEMENT_CACHE_SIZE == 0:
+        # pgbouncer в режиме transaction может отдать следующий запрос другому
+        # серверному соединению: отключаем и кеш SQLAlchemy, и даём выражениям
+        # уникальные имена, чтобы они не конфликтовали между клиентами
+        connect_args["prepared_statement_cache_size"] = 0
+        connect_args["prepared_statement_name_func"] = lambda: f"__asyncpg_{uuid4()}__"
+
+    if db.DB_POOL_MODE == "null":
+        options["poolclass"] = NullPool
+    else:
+        # Счётчики -- атрибут класса: engine.dispose() пересоздаёт пул через его класс
+        poolclass = type(InstrumentedAsyncQueuePool.__name__, (InstrumentedAsyncQueuePool,), {"stats": stats})
+        options.update(
+            poolclass=poolclass,
+            pool_size=db.DB_POOL_SIZE,
+            max_overflow=db.DB_MAX_OVERFLOW,
+            pool_timeout=db.DB_POOL_TIMEOUT,
+            pool_recycle=db.DB_POOL_RECYCLE,
+        )
+    return options
+
+
+def instrument_pool(engine: AsyncEngine, stats: PoolStats = pool_stats) -> None:
+    """
+    Attach pool event listeners that feed stats.
+    """
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        stats.connects += 1
+
+    @event.listens_for(sync_engine, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        stats.checkouts += 1
+
+    @event.listens_for(sync_engine, "checkin")
+    def on_checkin(dbapi_connection, connection_record):
+        stats.checkins += 1
+
+    @event.listens_for(sync_engine, "invalidate")
+    def on_invalidate(dbapi_connection, connection_record, exception):
+        stats.invalidations += 1
+
+
+def get_pool_stats(engine: AsyncEngine, counters: PoolStats = pool_stats) -> Dict[str, Any]:
+    """
+    Current pool counters together with the live pool state.
+    """
+    pool = engine.sync_engine.pool
+    stats: Dict[str, Any] = asdict(counters)
+    stats["pool_class"] = type(pool).__name__
+    if isinstance(pool, QueuePool):
+        stats.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=max(pool.overflow(), 0),
+        )
+    return stats
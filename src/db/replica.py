@@ -0,0 +1,76 @@
+import logging
+import time
+from typing import Any, Optional
+
+from sqlalchemy import Connection, Engine, event
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+
+class ReplicaHealth:
+    """
+    Whether reads may go to the replica.
+
+    After a connection error the replica is skipped for retry_seconds and
+    reads go to the primary; the first read after that tries it again.
+    """
+
+    def __init__(self, retry_seconds: float) -> None:
+        self.retry_seconds = retry_seconds
+        self.down_until = 0.0
+
+    @property
+    def available(self) -> bool:
+        return time.monotonic() >= self.down_until
+
+    def mark_down(self, error: BaseException) -> None:
+        if self.available:
+            logger.warning("Read replica is unavailable, reading from the primary for %ss: %s", self.retry_seconds, error)
+        self.down_until = time.monotonic() + self.retry_seconds
+
+
+class ReplicaSession(Session):
+    """
+    Session bound to the replica that falls back to the primary.
+
+    Expects info["primary"] (the primary sync Engine) and info["replica_health"].
+    The database is chosen on the first statement and kept for the whole
+    transaction. If the replica cannot be connected to, it is marked down and
+    the statement runs on the primary, so the request does not fail.
+    """
+
+    _read_bind: Optional[Engine] = None
+
+    def get_bind(self, mapper: Any = None, **kw: Any) -> Any:
+        if self._read_bind is None:
+            if self.info["replica_health"].available:
+                self._read_bind = super().get_bind(mapper, **kw)
+            else:
+                self._read_bind = self.info["primary"]
+        return self._read_bind
+
+    def _connection_for_bind(self, engine: Any, execution_options: Any = None, **kw: Any) -> Connection:
+        primary = self.info["primary"]
+        try:
+            return super()._connection_for_bind(engine, execution_options, **kw)
+        except (DBAPIError, OSError) as e:
+            # OSError -- asyncpg не смог открыть соединение (отказ, таймаут)
+            if engine is primary:
+                raise
+            self.info["replica_health"].mark_down(e)
+            self._read_bind = primary
+            return super()._connection_for_bind(primary, execution_options, **kw)
+
+
+def instrument_replica(engine: AsyncEngine, health: ReplicaHealth) -> None:
+    """
+    Mark the replica down when an established connection to it is lost.
+    """
+
+    @event.listens_for(engine.sync_engine, "handle_error")
+    def handle_error(exception_context):
+        if exception_context.is_disconnect:
+            health.mark_down(exception_context.original_exception)
@@ -0,0 +1,55 @@
+from types import TracebackType
+from typing import Optional, Type
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.db.db import async_session_maker
+
+
+class ReadOnlyTransactionError(RuntimeError):
+    """
+    A read-only unit of work was asked to commit.
+    """
+
+
+class UnitOfWork:
+    """
+    One database transaction per request or command.
+
+    Repositories only execute statements on `session` and never commit.
+    The service method that owns the use case calls commit() once at the
+    end, so several repository calls cost one commit and fail as a unit.
+    Leaving the block without commit() rolls everything back.
+
+    A read-only unit of work never commits: its transaction just ends when
+    the session is closed. commit() raises, so a write that slipped into a
+    read path fails loudly instead of being lost.
+    """
+
+    def __init__(self, session_maker: async_sessionmaker = async_session_maker, read_only: bool = False) -> None:
+        self.session_maker = session_maker
+        self.read_only = read_only
+        self.committed = False
+        self.session: AsyncSession
+
+    async def __aenter__(self) -> "UnitOfWork":
+        self.session = self.session_maker()
+        return self
+
+    async def __aexit__(
+            self,
+            exc_type: Optional[Type[BaseException]],
+            exc: Optional[BaseException],
+            traceback: Optional[TracebackType],
+    ) -> None:
+        # close() откатывает незакоммиченную транзакцию и возвращает соединение в пул
+        await self.session.close()
+
+    async def commit(self) -> None:
+        if self.read_only:
+            raise ReadOnlyTransactionError("Read-only unit of work cannot commit")
+        await self.session.commit()
+        self.committed = True
+
+    async def rollback(self) -> None:
+        await self.session.rollback()
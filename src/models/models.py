@@ -1,31 +1,41 @@
-from typing import List, Optional
-from datetime import datetime
+from typing import ClassVar, List, Optional, Type
+from datetime import date, datetime
 
 from sqlalchemy import (
+    BigInteger,
     Integer,
     String,
     ForeignKey,
     DateTime,
+    Date,
     Enum,
     Text,
-    Float,
     Boolean,
+    Index,
+    UniqueConstraint,
+    PrimaryKeyConstraint,
+    CheckConstraint,
+    Computed,
 )
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
+from pydantic import BaseModel
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 from sqlalchemy.sql import func
 
 from src.db.db import Base
-from src.schemas.user import UserRead
+from src.models.types import Money
+from src.schemas.user import UserRead, UserSummary
 from src.schemas.address import UserAddressRead
 from src.schemas.category import CategoryRead
 from src.schemas.topping import ToppingRead
 from src.schemas.product import ProductRead
 from src.schemas.product_topping import ProductToppingRead
-from src.schemas.order import OrderRead
+from src.schemas.order import OrderRead, OrderSummary
 from src.schemas.order_item import OrderItemRead
 from src.schemas.order_item_topping import OrderItemToppingRead
 from src.schemas.payment import PaymentRead
-from src.utils.enums import UserRole, OrderStatus, DeliveryType
+from src.schemas.serializer import DEFAULT_MAX_DEPTH, Include, to_read
+from src.utils.enums import UserRole, OrderStatus, DeliveryType, JobStatus, JobType
 
 
 class TimestampMixin:
@@ -40,9 +50,28 @@ class TimestampMixin:
     )
 
 
+class ReadModelMixin:
+    """
+    Миксин для сериализации модели в её *Read схему (__read_schema__).
+
+    Сериализуются только уже загруженные отношения, см. src/schemas/serializer.py.
+    Для списков у модели может быть плоская схема (__summary_schema__) без отношений.
+    """
+    __read_schema__: ClassVar[Type[BaseModel]]
+    __summary_schema__: ClassVar[Type[BaseModel]]
+
+    def to_read_model(self, include: Optional[Include] = None, max_depth: int = DEFAULT_MAX_DEPTH) -> BaseModel:
+        return to_read(self, include=include, max_depth=max_depth)
+
+    def to_summary_model(self) -> BaseModel:
+        return to_read(self, max_depth=0, schema=self.__summary_schema__)
+
+
 # Таблица пользователей
-class User(Base, TimestampMixin):
+class User(Base, ReadModelMixin, TimestampMixin):
     __tablename__ = "users"
+    __read_schema__ = UserRead
+    __summary_schema__ = UserSummary
 
     id: Mapped[int] = mapped_column(primary_key=True)
     name: Mapped[str] = mapped_column(String(100), nullable=False)
@@ -51,6 +80,10 @@ class User(Base, TimestampMixin):
     role: Mapped[UserRole] = mapped_column(
         Enum(UserRole, name="user_role"), nullable=False, default=UserRole.CUSTOMER
     )
+    # Увеличивается при отзыве токенов: токены со старой версией перестают приниматься
+    token_version: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    # Хеш пароля (scrypt с солью). У пользователей, заведённых до паролей, NULL -- войти они не могут
+    password_hash: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
 
     addresses: Mapped[List["UserAddress"]] = relationship(
         "UserAddress", back_populates="user", cascade="all, delete-orphan"
@@ -59,26 +92,14 @@ class User(Base, TimestampMixin):
         "Order", back_populates="user", cascade="all, delete-orphan"
     )
 
-    def to_read_model(self) -> UserRead:
-        return UserRead(
-            id=self.id,
-            name=self.name,
-            phone=self.phone,
-            email=self.email,
-            role=self.role,
-            addresses=[address.to_read_model() for address in self.addresses],
-            orders=[order.to_read_model() for order in self.orders],
-            created_at=self.created_at,
-            updated_at=self.updated_at,
-        )
-
 
 # Таблица адресов пользователей
-class UserAddress(Base, TimestampMixin):
+class UserAddress(Base, ReadModelMixin, TimestampMixin):
     __tablename__ = "user_addresses"
+    __read_schema__ = UserAddressRead
 
     id: Mapped[int] = mapped_column(primary_key=True)
-    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
     street: Mapped[str] = mapped_column(String(200), nullable=False)
     intercom: Mapped[Optional[str]] = mapped_column(String(20), nullable=True)
     floor: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
@@ -90,27 +111,17 @@ class UserAddress(Base, TimestampMixin):
         "Order", back_populates="address", cascade="all, delete-orphan"
     )
 
-    def to_read_model(self) -> UserAddressRead:
-        return UserAddressRead(
-            id=self.id,
-            user_id=self.user_id,
-            street=self.street,
-            intercom=self.intercom,
-            floor=self.floor,
-            apartment=self.apartment,
-            is_private_house=self.is_private_house,
-            created_at=self.created_at,
-            updated_at=self.updated_at,
-        )
-
 
 # Таблица категорий
-class Category(Base):
+class Category(Base, ReadModelMixin):
     __tablename__ = "categories"
+    __read_schema__ = CategoryRead
 
     id: Mapped[int] = mapped_column(primary_key=True)
     name: Mapped[str] = mapped_column(String(100), nullable=False)
-    parent_id: Mapped[Optional[int]] = mapped_column(ForeignKey("categories.id", ondelete="SET NULL"), nullable=True)
+    parent_id: Mapped[Optional[int]] = mapped_column(
+        ForeignKey("categories.id", ondelete="SET NULL"), nullable=True, index=True
+    )
 
     parent: Mapped[Optional["Category"]] = relationship(
         "Category", remote_side=[id], back_populates="subcategories"
@@ -122,23 +133,22 @@ class Category(Base):
         "Product", back_populates="subcategory", cascade="all, delete-orphan"
     )
 
-    def to_read_model(self) -> CategoryRead:
-        return CategoryRead(
-            id=self.id,
-            name=self.name,
-            parent_id=self.parent_id,
-            subcategories=[subcategory.to_read_model() for subcategory in self.subcategories],
-            products=[product.to_read_model() for product in self.products],
-        )
+
+# Уникальное имя среди соседей; у корневых категорий parent_id = NULL, поэтому coalesce
+Index("uq_categories_parent_id_name", func.coalesce(Category.parent_id, 0), Category.name, unique=True)
 
 
 # Таблица топпингов
-class Topping(Base):
+class Topping(Base, ReadModelMixin):
     __tablename__ = "toppings"
+    __read_schema__ = ToppingRead
+    __table_args__ = (
+        UniqueConstraint("name", name="uq_toppings_name"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     name: Mapped[str] = mapped_column(String(100), nullable=False)
-    price: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    price: Mapped[int] = mapped_column(Money, nullable=False, default=0)
 
     product_toppings: Mapped[List["ProductTopping"]] = relationship(
         "ProductTopping", back_populates="topping", cascade="all, delete-orphan"
@@ -147,80 +157,89 @@ class Topping(Base):
         "OrderItemTopping", back_populates="topping", cascade="all, delete-orphan"
     )
 
-    def to_read_model(self) -> ToppingRead:
-        return ToppingRead(
-            id=self.id,
-            name=self.name,
-            price=self.price,
-        )
+
+PRODUCT_SEARCH_VECTOR = (
+    "setweight(to_tsvector('russian', name), 'A') || "
+    "setweight(to_tsvector('russian', coalesce(description, '')), 'B')"
+)
 
 
 # Таблица продуктов
-class Product(Base):
+class Product(Base, ReadModelMixin):
     __tablename__ = "products"
+    __read_schema__ = ProductRead
+    # Ключ продукта при импорте меню
+    __table_args__ = (
+        UniqueConstraint("subcategory_id", "name", name="uq_products_subcategory_id_name"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     name: Mapped[str] = mapped_column(String(100), nullable=False)
-    subcategory_id: Mapped[int] = mapped_column(ForeignKey("categories.id", ondelete="CASCADE"), nullable=False)
-    price: Mapped[float] = mapped_column(Float, nullable=False)
+    subcategory_id: Mapped[int] = mapped_column(
+        ForeignKey("categories.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    price: Mapped[int] = mapped_column(Money, nullable=False)
     description: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    # Удалённый продукт скрывается из меню, но остаётся в истории заказов
+    is_active: Mapped[bool] = mapped_column(Boolean, default=True, server_default="true", nullable=False)
+    # Поисковый вектор с русским стеммингом, название важнее описания. Считается самой
+    # базой при записи; не загружается вместе с продуктом, нужен только в WHERE поиска
+    search_vector: Mapped[str] = mapped_column(
+        TSVECTOR,
+        Computed(PRODUCT_SEARCH_VECTOR, persisted=True),
+        deferred=True,
+    )
 
     subcategory: Mapped["Category"] = relationship("Category", back_populates="products")
+    # Позиции заказов не удаляются вместе с продуктом: в БД ограничение RESTRICT
     order_items: Mapped[List["OrderItem"]] = relationship(
-        "OrderItem", back_populates="product", cascade="all, delete-orphan"
+        "OrderItem", back_populates="product", passive_deletes="all"
     )
     available_toppings: Mapped[List["ProductTopping"]] = relationship(
         "ProductTopping", back_populates="product", cascade="all, delete-orphan"
     )
 
-    def to_read_model(self) -> ProductRead:
-        return ProductRead(
-            id=self.id,
-            name=self.name,
-            subcategory_id=self.subcategory_id,
-            price=self.price,
-            description=self.description,
-            subcategory=self.subcategory.to_read_model() if self.subcategory else None,
-            order_items=[item.to_read_model() for item in self.order_items],
-            available_toppings=[pt.to_read_model() for pt in self.available_toppings],
-        )
+
+# Полнотекстовый поиск по меню и поиск по названию с опечатками (pg_trgm)
+Index("ix_products_search_vector", Product.search_vector, postgresql_using="gin")
+Index("ix_products_name_trgm", Product.name, postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"})
 
 
 # Связующая таблица для продуктов и топпингов
-class ProductTopping(Base):
+class ProductTopping(Base, ReadModelMixin):
     __tablename__ = "product_toppings"
+    __read_schema__ = ProductToppingRead
+    # Уникальная пара также служит индексом по product_id
+    __table_args__ = (
+        UniqueConstraint("product_id", "topping_id", name="uq_product_toppings_product_id_topping_id"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     product_id: Mapped[int] = mapped_column(ForeignKey("products.id", ondelete="CASCADE"), nullable=False)
-    topping_id: Mapped[int] = mapped_column(ForeignKey("toppings.id", ondelete="CASCADE"), nullable=False)
+    topping_id: Mapped[int] = mapped_column(ForeignKey("toppings.id", ondelete="CASCADE"), nullable=False, index=True)
 
     product: Mapped["Product"] = relationship("Product", back_populates="available_toppings")
     topping: Mapped["Topping"] = relationship("Topping", back_populates="product_toppings")
 
-    def to_read_model(self) -> ProductToppingRead:
-        return ProductToppingRead(
-            id=self.id,
-            product_id=self.product_id,
-            topping_id=self.topping_id,
-            product=self.product.to_read_model() if self.product else None,
-            topping=self.topping.to_read_model() if self.topping else None,
-        )
-
 
 # Таблица заказов
-class Order(Base, TimestampMixin):
+class Order(Base, ReadModelMixin, TimestampMixin):
     __tablename__ = "orders"
+    __read_schema__ = OrderRead
+    __summary_schema__ = OrderSummary
 
     id: Mapped[int] = mapped_column(primary_key=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
-    address_id: Mapped[Optional[int]] = mapped_column(ForeignKey("user_addresses.id", ondelete="SET NULL"), nullable=True)
+    address_id: Mapped[Optional[int]] = mapped_column(
+        ForeignKey("user_addresses.id", ondelete="SET NULL"), nullable=True, index=True
+    )
     delivery_type: Mapped[DeliveryType] = mapped_column(
         Enum(DeliveryType, name="delivery_type"), nullable=False, default=DeliveryType.DELIVERY
     )
     status: Mapped[OrderStatus] = mapped_column(
         Enum(OrderStatus, name="order_status"), nullable=False, default=OrderStatus.PENDING
     )
-    total_amount: Mapped[float] = mapped_column(Float, nullable=False)
+    total_amount: Mapped[int] = mapped_column(Money, nullable=False)
     courier_comment: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     delivery_time: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
 
@@ -233,34 +252,23 @@ class Order(Base, TimestampMixin):
         "Payment", back_populates="order", uselist=False, cascade="all, delete-orphan"
     )
 
-    def to_read_model(self) -> OrderRead:
-        return OrderRead(
-            id=self.id,
-            user_id=self.user_id,
-            address_id=self.address_id,
-            delivery_type=self.delivery_type,
-            status=self.status,
-            total_amount=self.total_amount,
-            courier_comment=self.courier_comment,
-            delivery_time=self.delivery_time,
-            user=self.user.to_read_model() if self.user else None,
-            address=self.address.to_read_model() if self.address else None,
-            items=[item.to_read_model() for item in self.items],
-            payment=self.payment.to_read_model() if self.payment else None,
-            created_at=self.created_at,
-            updated_at=self.updated_at,
-        )
+
+# История заказов пользователя (новые сверху); индекс также покрывает поиск по user_id
+Index("ix_orders_user_id_created_at", Order.user_id, Order.created_at.desc())
+# Очередь кухни: заказы в нужном статусе по времени создания
+Index("ix_orders_status_created_at", Order.status, Order.created_at)
 
 
 # Таблица элементов заказа
-class OrderItem(Base):
+class OrderItem(Base, ReadModelMixin):
     __tablename__ = "order_items"
+    __read_schema__ = OrderItemRead
 
     id: Mapped[int] = mapped_column(primary_key=True)
-    order_id: Mapped[int] = mapped_column(ForeignKey("orders.id", ondelete="CASCADE"), nullable=False)
-    product_id: Mapped[int] = mapped_column(ForeignKey("products.id", ondelete="CASCADE"), nullable=False)
+    order_id: Mapped[int] = mapped_column(ForeignKey("orders.id", ondelete="CASCADE"), nullable=False, index=True)
+    product_id: Mapped[int] = mapped_column(ForeignKey("products.id", ondelete="RESTRICT"), nullable=False, index=True)
     quantity: Mapped[int] = mapped_column(Integer, nullable=False)
-    price: Mapped[float] = mapped_column(Float, nullable=False)
+    price: Mapped[int] = mapped_column(Money, nullable=False)
 
     order: Mapped["Order"] = relationship("Order", back_populates="items")
     product: Mapped["Product"] = relationship("Product", back_populates="order_items")
@@ -268,63 +276,153 @@ class OrderItem(Base):
         "OrderItemTopping", back_populates="order_item", cascade="all, delete-orphan"
     )
 
-    def to_read_model(self) -> OrderItemRead:
-        return OrderItemRead(
-            id=self.id,
-            order_id=self.order_id,
-            product_id=self.product_id,
-            quantity=self.quantity,
-            price=self.price,
-            order=self.order.to_read_model() if self.order else None,
-            product=self.product.to_read_model() if self.product else None,
-            toppings=[topping.to_read_model() for topping in self.toppings],
-        )
-
 
 # Связующая таблица для топпингов в заказе
-class OrderItemTopping(Base):
+class OrderItemTopping(Base, ReadModelMixin):
     __tablename__ = "order_item_toppings"
+    __read_schema__ = OrderItemToppingRead
 
     id: Mapped[int] = mapped_column(primary_key=True)
-    order_item_id: Mapped[int] = mapped_column(ForeignKey("order_items.id", ondelete="CASCADE"), nullable=False)
-    topping_id: Mapped[int] = mapped_column(ForeignKey("toppings.id", ondelete="CASCADE"), nullable=False)
-    price: Mapped[float] = mapped_column(Float, nullable=False)
+    order_item_id: Mapped[int] = mapped_column(
+        ForeignKey("order_items.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    topping_id: Mapped[int] = mapped_column(ForeignKey("toppings.id", ondelete="CASCADE"), nullable=False, index=True)
+    price: Mapped[int] = mapped_column(Money, nullable=False)
 
     order_item: Mapped["OrderItem"] = relationship("OrderItem", back_populates="toppings")
     topping: Mapped["Topping"] = relationship("Topping", back_populates="order_item_toppings")
 
-    def to_read_model(self) -> OrderItemToppingRead:
-        return OrderItemToppingRead(
-            id=self.id,
-            order_item_id=self.order_item_id,
-            topping_id=self.topping_id,
-            order_item=self.order_item.to_read_model() if self.order_item else None,
-            topping=self.topping.to_read_model() if self.topping else None,
-        )
-
 
 # Таблица оплат
-class Payment(Base, TimestampMixin):
+class Payment(Base, ReadModelMixin, TimestampMixin):
     __tablename__ = "payments"
+    __read_schema__ = PaymentRead
 
     id: Mapped[int] = mapped_column(primary_key=True)
-    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
     order_id: Mapped[int] = mapped_column(ForeignKey("orders.id", ondelete="CASCADE"), nullable=False, unique=True)
-    amount: Mapped[float] = mapped_column(Float, nullable=False)
+    amount: Mapped[int] = mapped_column(Money, nullable=False)
     status: Mapped[str] = mapped_column(String(50), nullable=False)
 
     user: Mapped["User"] = relationship("User")
     order: Mapped["Order"] = relationship("Order", back_populates="payment")
 
-    def to_read_model(self) -> PaymentRead:
-        return PaymentRead(
-            id=self.id,
-            user_id=self.user_id,
-            order_id=self.order_id,
-            amount=self.amount,
-            status=self.status,
-            user=self.user.to_read_model() if self.user else None,
-            order=self.order.to_read_model() if self.order else None,
-            created_at=self.created_at,
-            updated_at=self.updated_at,
-        )
+
+# Дневные агрегаты продаж для аналитики. Пересчитываются по дням, в которых
+# менялись заказы, см. src/repositories/analytics.py
+class DailySales(Base):
+    __tablename__ = "analytics_daily_sales"
+
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    orders_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    revenue: Mapped[int] = mapped_column(Money, nullable=False)
+    delivery_orders: Mapped[int] = mapped_column(Integer, nullable=False)
+    delivery_revenue: Mapped[int] = mapped_column(Money, nullable=False)
+    pickup_orders: Mapped[int] = mapped_column(Integer, nullable=False)
+    pickup_revenue: Mapped[int] = mapped_column(Money, nullable=False)
+    # Позиции заказов (строки order_items) и те из них, к которым добавлен хотя бы один топпинг
+    order_items_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    items_with_toppings: Mapped[int] = mapped_column(Integer, nullable=False)
+
+
+class DailyProductSales(Base):
+    __tablename__ = "analytics_daily_product_sales"
+    __table_args__ = (PrimaryKeyConstraint("day", "product_id"),)
+
+    day: Mapped[date] = mapped_column(Date, nullable=False)
+    product_id: Mapped[int] = mapped_column(ForeignKey("products.id", ondelete="CASCADE"), nullable=False, index=True)
+    quantity: Mapped[int] = mapped_column(Integer, nullable=False)
+    # Цена продукта и его топпингов, умноженная на количество
+    revenue: Mapped[int] = mapped_column(Money, nullable=False)
+
+
+class AnalyticsRefreshState(Base):
+    __tablename__ = "analytics_refresh_state"
+
+    name: Mapped[str] = mapped_column(String(50), primary_key=True)
+    # Заказы с updated_at не раньше этой отметки ещё не учтены в агрегатах
+    watermark: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    refreshed_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+
+# Поиск заказов, изменённых после последнего пересчёта аналитики
+Index("ix_orders_updated_at", Order.updated_at)
+
+
+# Ключи идемпотентности оформления заказа (заголовок Idempotency-Key). Повтор запроса
+# с тем же ключом получает сохранённый ответ вместо нового заказа, см. src/repositories/idempotency.py
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+
+    # Ключ генерирует клиент, поэтому уникален только в пределах пользователя
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    key: Mapped[str] = mapped_column(String(255), nullable=False)
+    # sha256 тела запроса: тот же ключ с другой корзиной -- ошибка клиента, а не повтор
+    request_hash: Mapped[str] = mapped_column(String(64), nullable=False)
+    order_id: Mapped[int] = mapped_column(ForeignKey("orders.id", ondelete="CASCADE"), nullable=False, index=True)
+    # Тело ответа 201 в том виде, в каком его получил клиент
+    response: Mapped[dict] = mapped_column(JSONB, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, index=True)
+
+    __table_args__ = (
+        PrimaryKeyConstraint("user_id", "key"),
+    )
+
+
+# Вместимость слотов доставки и самовывоза: счётчики кухни и курьеров по каждому
+# DeliveryType. Строка слота создаётся при первом заказе на него, а заказ занимает
+# место атомарным UPDATE ... RETURNING, см. src/repositories/delivery_slots.py
+class DeliverySlot(Base):
+    __tablename__ = "delivery_slots"
+
+    delivery_type: Mapped[DeliveryType] = mapped_column(Enum(DeliveryType, name="delivery_type"), nullable=False)
+    slot_start: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    kitchen_capacity: Mapped[int] = mapped_column(Integer, nullable=False)
+    kitchen_reserved: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    # Самовывоз курьеров не занимает, у его слотов courier_capacity = 0
+    courier_capacity: Mapped[int] = mapped_column(Integer, nullable=False)
+    courier_reserved: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+    # Вместимость можно уменьшить ниже занятого: новые заказы просто перестанут приниматься
+    __table_args__ = (
+        PrimaryKeyConstraint("delivery_type", "slot_start"),
+        CheckConstraint("kitchen_capacity >= 0 AND courier_capacity >= 0", name="ck_delivery_slots_capacity"),
+        CheckConstraint("kitchen_reserved >= 0 AND courier_reserved >= 0", name="ck_delivery_slots_reserved"),
+    )
+
+
+# Очередь фоновых задач (SMS, чеки): задача пишется в той же транзакции, что и заказ
+# или пользователь, и выполняется после коммита, см. src/services/jobs.py
+class Job(Base):
+    __tablename__ = "jobs"
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    job_type: Mapped[JobType] = mapped_column(Enum(JobType, name="job_type"), nullable=False)
+    payload: Mapped[dict] = mapped_column(JSONB, nullable=False)
+    status: Mapped[JobStatus] = mapped_column(
+        Enum(JobStatus, name="job_status"), nullable=False, default=JobStatus.QUEUED
+    )
+    # Сколько раз задачу брали в работу, включая текущую попытку
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    # Не раньше этого времени задачу можно взять (отложенный повтор)
+    run_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    # Когда задачу взяли в работу; по истечении JOBS_LEASE_SECONDS её может забрать другой процесс
+    locked_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    last_error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+
+# Выборка задач к запуску и задач с истёкшей арендой; частичные индексы не растут от упавших задач
+Index(
+    "ix_jobs_queued",
+    Job.job_type,
+    Job.run_at,
+    postgresql_where=Job.status == JobStatus.QUEUED,
+)
+Index(
+    "ix_jobs_running",
+    Job.job_type,
+    Job.locked_at,
+    postgresql_where=Job.status == JobStatus.RUNNING,
+)
@@ -0,0 +1,22 @@
+from typing import Any, Optional
+
+from sqlalchemy import BigInteger
+from sqlalchemy.types import TypeDecorator
+
+
+class Money(TypeDecorator):
+    """
+    Денежная сумма в копейках, хранится как BIGINT.
+
+    Принимает только целые числа, чтобы float-рубли не попадали в базу
+    молча умноженными или округлёнными.
+    """
+    impl = BigInteger
+    cache_ok = True
+
+    def process_bind_param(self, value: Any, dialect: Any) -> Optional[int]:
+        if value is None:
+            return None
+        if isinstance(value, bool) or not isinstance(value, int):
+            raise TypeError(f"Money values must be integer kopecks, got {value!r}")
+        return value
@@ -0,0 +1,214 @@
+from datetime import date, datetime, time, timedelta
+from typing import List, Literal, Optional, Sequence
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import BigInteger, Date, Row, cast, delete, func, insert, select, true
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.models.models import (
+    AnalyticsRefreshState,
+    DailyProductSales,
+    DailySales,
+    Order,
+    OrderItem,
+    OrderItemTopping,
+    Product,
+)
+from src.utils.enums import DeliveryType, OrderStatus
+
+# Имя строки в analytics_refresh_state и ключ advisory lock пересчёта
+REFRESH_STATE_NAME = "daily_sales"
+
+# В продажи попадают оплаченные заказы; неоплаченные и отменённые не учитываются
+SALES_STATUSES = (OrderStatus.PAID, OrderStatus.PREPARING, OrderStatus.DELIVERING, OrderStatus.COMPLETED)
+
+
+class AnalyticsRepository:
+    """
+    Daily sales rollups and their incremental refresh.
+
+    Rollups are rebuilt per local day: the rows of every touched day are
+    deleted and aggregated again from orders created on that day, so a
+    refresh costs as much as the orders of the touched days, not of the
+    whole history. Nothing here commits; the caller runs a refresh in one
+    transaction.
+    """
+
+    async def try_lock_refresh(self, session: AsyncSession) -> bool:
+        # Блокировка до конца транзакции; второй воркер не ждёт, а пропускает пересчёт
+        result = await session.execute(select(func.pg_try_advisory_xact_lock(func.hashtext(REFRESH_STATE_NAME))))
+        return bool(result.scalar_one())
+
+    async def get_db_now(self, session: AsyncSession) -> datetime:
+        # now() -- время начала транзакции, по нему же выставляется updated_at
+        return (await session.execute(select(func.now()))).scalar_one()
+
+    async def get_refresh_state(self, session: AsyncSession) -> Optional[AnalyticsRefreshState]:
+        return await session.get(AnalyticsRefreshState, REFRESH_STATE_NAME)
+
+    async def save_refresh_state(self, session: AsyncSession, watermark: datetime, refreshed_at: datetime) -> None:
+        stmt = pg_insert(AnalyticsRefreshState).values(
+            name=REFRESH_STATE_NAME, watermark=watermark, refreshed_at=refreshed_at
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[AnalyticsRefreshState.name],
+            set_={"watermark": stmt.excluded.watermark, "refreshed_at": stmt.excluded.refreshed_at},
+        )
+        await session.execute(stmt)
+
+    async def get_touched_days(self, session: AsyncSession, since: Optional[datetime], tz: str) -> List[date]:
+        """
+        Local days of orders changed at or after `since`; all days if it is None.
+        """
+        day = _local_day(tz)
+        stmt = select(day).distinct()
+        if since is not None:
+            stmt = stmt.where(Order.updated_at >= since)
+        return sorted((await session.execute(stmt)).scalars().all())
+
+    async def rebuild_days(self, session: AsyncSession, days: Sequence[date], tz: str) -> None:
+        """
+        Replace the rollup rows of the given local days with fresh aggregates.
+        """
+        if not days:
+            return
+        await session.execute(delete(DailySales).where(DailySales.day.in_(days)))
+        await session.execute(delete(DailyProductSales).where(DailyProductSales.day.in_(days)))
+
+        # Границы по created_at, чтобы выборка шла по индексу, а не по выражению с часовым поясом
+        zone = ZoneInfo(tz)
+        created_from = datetime.combine(min(days), time(), zone)
+        created_to = datetime.combine(max(days) + timedelta(days=1), time(), zone)
+        sales_orders = (
+            select(
+                Order.id,
+                _local_day(tz).label("day"),
+                Order.delivery_type,
+                Order.total_amount,
+            )
+            .where(
+                Order.created_at >= created_from,
+                Order.created_at < created_to,
+                _local_day(tz).in_(days),
+                Order.status.in_(SALES_STATUSES),
+            )
+            .cte("sales_orders")
+        )
+
+        item_toppings = (
+            select(
+                func.count(OrderItemTopping.id).label("toppings_count"),
+                func.coalesce(func.sum(OrderItemTopping.price), 0).label("toppings_price"),
+            )
+            .where(OrderItemTopping.order_item_id == OrderItem.id)
+            .lateral("item_toppings")
+        )
+        sales_items = (
+            select(
+                sales_orders.c.day,
+                OrderItem.product_id,
+                OrderItem.quantity,
+                (OrderItem.quantity * (OrderItem.price + item_toppings.c.toppings_price)).label("revenue"),
+                (item_toppings.c.toppings_count > 0).label("has_toppings"),
+            )
+            .select_from(sales_orders)
+            .join(OrderItem, OrderItem.order_id == sales_orders.c.id)
+            .join(item_toppings, true())
+            .cte("sales_items")
+        )
+
+        is_delivery = sales_orders.c.delivery_type == DeliveryType.DELIVERY
+        is_pickup = sales_orders.c.delivery_type == DeliveryType.PICKUP
+        order_totals = (
+            select(
+                sales_orders.c.day,
+                func.count().label("orders_count"),
+                func.sum(sales_orders.c.total_amount).label("revenue"),
+                func.count().filter(is_delivery).label("delivery_orders"),
+                func.coalesce(func.sum(sales_orders.c.total_amount).filter(is_delivery), 0).label("delivery_revenue"),
+                func.count().filter(is_pickup).label("pickup_orders"),
+                func.coalesce(func.sum(sales_orders.c.total_amount).filter(is_pickup), 0).label("pickup_revenue"),
+            )
+            .group_by(sales_orders.c.day)
+            .subquery()
+        )
+        item_totals = (
+            select(
+                sales_items.c.day,
+                func.count().label("order_items_count"),
+                func.count().filter(sales_items.c.has_toppings).label("items_with_toppings"),
+            )
+            .group_by(sales_items.c.day)
+            .subquery()
+        )
+        await session.execute(
+            insert(DailySales).from_select(
+                [
+                    "day", "orders_count", "revenue", "delivery_orders", "delivery_revenue",
+                    "pickup_orders", "pickup_revenue", "order_items_count", "items_with_toppings",
+                ],
+                select(
+                    order_totals.c.day,
+                    order_totals.c.orders_count,
+                    order_totals.c.revenue,
+                    order_totals.c.delivery_orders,
+                    order_totals.c.delivery_revenue,
+                    order_totals.c.pickup_orders,
+                    order_totals.c.pickup_revenue,
+                    func.coalesce(item_totals.c.order_items_count, 0),
+                    func.coalesce(item_totals.c.items_with_toppings, 0),
+                ).outerjoin(item_totals, item_totals.c.day == order_totals.c.day),
+            )
+        )
+        await session.execute(
+            insert(DailyProductSales).from_select(
+                ["day", "product_id", "quantity", "revenue"],
+                select(
+                    sales_items.c.day,
+                    sales_items.c.product_id,
+                    func.sum(sales_items.c.quantity),
+                    func.sum(sales_items.c.revenue),
+                ).group_by(sales_items.c.day, sales_items.c.product_id),
+            )
+        )
+
+    async def clear(self, session: AsyncSession) -> None:
+        await session.execute(delete(DailySales))
+        await session.execute(delete(DailyProductSales))
+
+    async def get_daily_sales(self, session: AsyncSession, date_from: date, date_to: date) -> List[DailySales]:
+        """
+        Rollup rows for date_from..date_to inclusive; days without sales are absent.
+        """
+        stmt = (
+            select(DailySales)
+            .where(DailySales.day >= date_from, DailySales.day <= date_to)
+            .order_by(DailySales.day)
+        )
+        return list((await session.execute(stmt)).scalars().all())
+
+    async def get_top_products(
+            self,
+            session: AsyncSession,
+            date_from: date,
+            date_to: date,
+            limit: int,
+            order_by: Literal["revenue", "quantity"] = "revenue",
+    ) -> Sequence[Row]:
+        quantity = cast(func.sum(DailyProductSales.quantity), BigInteger).label("quantity")
+        revenue = cast(func.sum(DailyProductSales.revenue), BigInteger).label("revenue")
+        stmt = (
+            select(DailyProductSales.product_id, Product.name, quantity, revenue)
+            .join(Product, Product.id == DailyProductSales.product_id)
+            .where(DailyProductSales.day >= date_from, DailyProductSales.day <= date_to)
+            .group_by(DailyProductSales.product_id, Product.name)
+            .order_by((revenue if order_by == "revenue" else quantity).desc(), DailyProductSales.product_id)
+            .limit(limit)
+        )
+        return (await session.execute(stmt)).all()
+
+
+def _local_day(tz: str):
+    # Дата заказа в часовом поясе заведения
+    return cast(func.timezone(tz, Order.created_at), Date)
@@ -0,0 +1,123 @@
+from typing import Dict, List, Optional
+
+from sqlalchemy import CTE, any_, delete, exists, func, insert, literal, select, update
+from sqlalchemy.dialects.postgresql import array
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from src.models.models import Category, Product, ProductTopping
+from src.schemas.category import CategoryRead
+from src.schemas.serializer import to_read
+
+TREE_PRODUCT_INCLUDE = ["available_toppings.topping"]
+
+
+class CategoriesRepository:
+    async def get_tree(
+            self,
+            session: AsyncSession,
+            root_id: Optional[int] = None,
+            max_depth: Optional[int] = None,
+            with_products: bool = False,
+    ) -> List[CategoryRead]:
+        """
+        Load a category subtree (or the whole forest) with one WITH RECURSIVE query.
+
+        :param root_id: category to start from; all root categories when None.
+        :param max_depth: how many levels below the root to load; unlimited when None.
+        :param with_products: attach products (with their toppings) to every node.
+            Products are loaded by a fixed number of extra queries, so the number
+            of round-trips does not depend on the depth of the tree.
+        :return: root nodes with nested subcategories.
+        """
+        tree = _tree_cte(root_id=root_id, max_depth=max_depth)
+        stmt = select(tree.c.id, tree.c.name, tree.c.parent_id, tree.c.depth).order_by(tree.c.depth, tree.c.id)
+        rows = (await session.execute(stmt)).all()
+
+        # Сборка дерева за O(n): строки идут по уровням, родитель всегда уже в индексе
+        nodes: Dict[int, CategoryRead] = {}
+        roots: List[CategoryRead] = []
+        for row in rows:
+            node = CategoryRead(id=row.id, name=row.name, parent_id=row.parent_id)
+            nodes[row.id] = node
+            if row.depth == 0:
+                roots.append(node)
+            else:
+                nodes[row.parent_id].subcategories.append(node)
+
+        if with_products and nodes:
+            products_stmt = (
+                select(Product)
+                .where(Product.subcategory_id.in_(list(nodes)), Product.is_active)
+                .options(selectinload(Product.available_toppings).selectinload(ProductTopping.topping))
+                .order_by(Product.id)
+            )
+            products = (await session.execute(products_stmt)).scalars().all()
+            for product in products:
+                nodes[product.subcategory_id].products.append(to_read(product, include=TREE_PRODUCT_INCLUDE))
+
+        return roots
+
+    async def is_in_subtree(self, session: AsyncSession, root_id: int, category_id: int) -> bool:
+        """
+        Whether category_id is root_id itself or one of its descendants.
+        """
+        tree = _tree_cte(root_id=root_id)
+        stmt = select(exists().where(tree.c.id == category_id))
+        return bool((await session.execute(stmt)).scalar())
+
+    async def lock_tree(self, session: AsyncSession) -> None:
+        """
+        Serialize moves within the category tree until the end of the transaction.
+
+        Two moves checked concurrently could each pass the cycle check and
+        together close a loop; under this lock the second one sees the first.
+        """
+        await session.execute(select(func.pg_advisory_xact_lock(func.hashtext("categories:tree"))))
+
+    async def create_category(self, session: AsyncSession, category_data: dict) -> Category:
+        stmt = insert(Category).values(**category_data).returning(Category)
+        result = await session.execute(stmt)
+        return result.scalars().one()
+
+    async def update_category(self, session: AsyncSession, category_id: int, category_data: dict) -> Optional[Category]:
+        stmt = update(Category).where(Category.id == category_id).values(**category_data).returning(Category)
+        result = await session.execute(stmt)
+        return result.scalars().one_or_none()
+
+    async def delete_category(self, session: AsyncSession, category_id: int) -> bool:
+        stmt = delete(Category).where(Category.id == category_id).returning(Category.id)
+        result = await session.execute(stmt)
+        return result.scalar_one_or_none() is not None
+
+
+def _tree_cte(root_id: Optional[int] = None, max_depth: Optional[int] = None) -> CTE:
+    # Поддерево root_id (без него -- весь лес) с глубиной и путём от корня у каждого узла
+    anchor = select(
+        Category.id,
+        Category.name,
+        Category.parent_id,
+        literal(0).label("depth"),
+        array([Category.id]).label("path"),
+    )
+    if root_id is None:
+        anchor = anchor.where(Category.parent_id.is_(None))
+    else:
+        anchor = anchor.where(Category.id == root_id)
+    tree = anchor.cte("category_tree", recursive=True)
+
+    children = (
+        select(
+            Category.id,
+            Category.name,
+            Category.parent_id,
+            (tree.c.depth + 1).label("depth"),
+            tree.c.path.op("||")(Category.id).label("path"),
+        )
+        .join(tree, Category.parent_id == tree.c.id)
+        # Защита от циклов в данных: узел не может встретиться на своём пути дважды
+        .where(~(Category.id == any_(tree.c.path)))
+    )
+    if max_depth is not None:
+        children = children.where(tree.c.depth < max_depth)
+    return tree.union_all(children)
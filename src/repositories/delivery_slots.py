@@ -0,0 +1,130 @@
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.models.models import DeliverySlot
+from src.utils.enums import DeliveryType
+
+
+class DeliverySlotsRepository:
+    """
+    Capacity counters of delivery and pickup slots.
+
+    A reservation is one conditional UPDATE ... RETURNING: it only succeeds
+    while the slot has room, and the row lock it takes serializes orders
+    for the same slot until their transactions end, so the counters never
+    go over capacity and orders never have to be counted. Nothing here commits.
+    """
+
+    async def get_slots(
+            self,
+            session: AsyncSession,
+            delivery_type: DeliveryType,
+            slot_from: datetime,
+            slot_to: datetime,
+    ) -> List[DeliverySlot]:
+        """
+        Load the counter rows of slots starting in [slot_from, slot_to).
+
+        Slots that nobody has ordered yet have no row.
+        """
+        stmt = (
+            select(DeliverySlot)
+            .where(
+                DeliverySlot.delivery_type == delivery_type,
+                DeliverySlot.slot_start >= slot_from,
+                DeliverySlot.slot_start < slot_to,
+            )
+            .order_by(DeliverySlot.slot_start)
+        )
+        return list((await session.execute(stmt)).scalars().all())
+
+    async def ensure_slot(
+            self,
+            session: AsyncSession,
+            delivery_type: DeliveryType,
+            slot_start: datetime,
+            kitchen_capacity: int,
+            courier_capacity: int,
+    ) -> None:
+        # Первый заказ на слот создаёт строку с вместимостью по умолчанию; существующую не трогаем
+        stmt = pg_insert(DeliverySlot).values(
+            delivery_type=delivery_type,
+            slot_start=slot_start,
+            kitchen_capacity=kitchen_capacity,
+            kitchen_reserved=0,
+            courier_capacity=courier_capacity,
+            courier_reserved=0,
+        )
+        await session.execute(stmt.on_conflict_do_nothing(index_elements=["delivery_type", "slot_start"]))
+
+    async def reserve(
+            self,
+            session: AsyncSession,
+            delivery_type: DeliveryType,
+            slot_start: datetime,
+            couriers: int,
+    ) -> Optional[DeliverySlot]:
+        """
+        Take one kitchen place and `couriers` courier places of the slot.
+
+        :return: the updated counters, or None if the slot is full.
+        """
+        stmt = (
+            update(DeliverySlot)
+            .where(
+                DeliverySlot.delivery_type == delivery_type,
+                DeliverySlot.slot_start == slot_start,
+                DeliverySlot.kitchen_reserved < DeliverySlot.kitchen_capacity,
+                DeliverySlot.courier_reserved + couriers <= DeliverySlot.courier_capacity,
+            )
+            .values(
+                kitchen_reserved=DeliverySlot.kitchen_reserved + 1,
+                courier_reserved=DeliverySlot.courier_reserved + couriers,
+            )
+            .returning(DeliverySlot)
+        )
+        return (await session.execute(stmt)).scalars().one_or_none()
+
+    async def release(
+            self,
+            session: AsyncSession,
+            delivery_type: DeliveryType,
+            slot_start: datetime,
+            couriers: int,
+    ) -> None:
+        # Заказы, оформленные до появления слотов, места не занимали: greatest() не даёт уйти ниже нуля
+        stmt = (
+            update(DeliverySlot)
+            .where(DeliverySlot.delivery_type == delivery_type, DeliverySlot.slot_start == slot_start)
+            .values(
+                kitchen_reserved=func.greatest(DeliverySlot.kitchen_reserved - 1, 0),
+                courier_reserved=func.greatest(DeliverySlot.courier_reserved - couriers, 0),
+            )
+        )
+        await session.execute(stmt)
+
+    async def set_capacity(
+            self,
+            session: AsyncSession,
+            delivery_type: DeliveryType,
+            slot_start: datetime,
+            kitchen_capacity: int,
+            courier_capacity: int,
+    ) -> DeliverySlot:
+        stmt = pg_insert(DeliverySlot).values(
+            delivery_type=delivery_type,
+            slot_start=slot_start,
+            kitchen_capacity=kitchen_capacity,
+            kitchen_reserved=0,
+            courier_capacity=courier_capacity,
+            courier_reserved=0,
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["delivery_type", "slot_start"],
+            set_={"kitchen_capacity": stmt.excluded.kitchen_capacity, "courier_capacity": stmt.excluded.courier_capacity},
+        ).returning(DeliverySlot)
+        return (await session.execute(stmt)).scalars().one()
@@ -0,0 +1,67 @@
+from datetime import timedelta
+from typing import Optional
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.models.models import IdempotencyKey
+
+
+class IdempotencyRepository:
+    """
+    Idempotency keys of order submissions.
+
+    Nothing here commits: the key is saved in the transaction that creates
+    the order, so either both are written or neither is.
+    """
+
+    async def get(self, session: AsyncSession, user_id: int, key: str) -> Optional[IdempotencyKey]:
+        # Поиск по первичному ключу; просроченный ключ считается отсутствующим, даже если ещё не удалён
+        stmt = select(IdempotencyKey).where(
+            IdempotencyKey.user_id == user_id,
+            IdempotencyKey.key == key,
+            IdempotencyKey.expires_at > func.now(),
+        )
+        return (await session.execute(stmt)).scalars().one_or_none()
+
+    async def lock(self, session: AsyncSession, user_id: int, key: str) -> None:
+        """
+        Wait until no other transaction is placing an order with this key.
+
+        The lock is held until the end of the transaction. Different keys
+        may share a lock (hashtext is 32-bit), which only makes them wait
+        for each other.
+        """
+        await session.execute(select(func.pg_advisory_xact_lock(func.hashtext(f"idempotency:{user_id}:{key}"))))
+
+    async def save(
+            self,
+            session: AsyncSession,
+            user_id: int,
+            key: str,
+            request_hash: str,
+            order_id: int,
+            response: dict,
+            ttl: timedelta,
+    ) -> None:
+        values = {
+            "user_id": user_id,
+            "key": key,
+            "request_hash": request_hash,
+            "order_id": order_id,
+            "response": response,
+            "created_at": func.now(),
+            "expires_at": func.now() + ttl,
+        }
+        # Конфликт возможен только с просроченным ключом, который ещё не удалён
+        stmt = pg_insert(IdempotencyKey).values(**values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[IdempotencyKey.user_id, IdempotencyKey.key],
+            set_={name: stmt.excluded[name] for name in values if name not in ("user_id", "key")},
+        )
+        await session.execute(stmt)
+
+    async def delete_expired(self, session: AsyncSession) -> int:
+        result = await session.execute(delete(IdempotencyKey).where(IdempotencyKey.expires_at <= func.now()))
+        return result.rowcount
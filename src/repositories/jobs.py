@@ -0,0 +1,79 @@
+from datetime import timedelta
+from typing import List
+
+from sqlalchemy import and_, delete, func, insert, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.models.models import Job
+from src.utils.enums import JobStatus, JobType
+
+
+class JobsRepository:
+    """
+    Background jobs stored in PostgreSQL.
+
+    Jobs are enqueued in the caller's transaction, so a job exists only if
+    the order or user it is about was committed. Workers claim jobs with
+    FOR UPDATE SKIP LOCKED: concurrent workers never get the same job and
+    never wait for each other. Nothing here commits.
+    """
+
+    async def enqueue(self, session: AsyncSession, job_type: JobType, payload: dict) -> None:
+        await session.execute(insert(Job).values(job_type=job_type, payload=payload))
+
+    async def claim(self, session: AsyncSession, job_type: JobType, limit: int, lease: timedelta) -> List[Job]:
+        """
+        Take up to `limit` due jobs of the type and mark them running.
+
+        Jobs that have been running longer than `lease` are taken again:
+        the worker that took them is assumed to be gone.
+        """
+        due = (
+            select(Job.id)
+            .where(
+                Job.job_type == job_type,
+                or_(
+                    and_(Job.status == JobStatus.QUEUED, Job.run_at <= func.now()),
+                    and_(Job.status == JobStatus.RUNNING, Job.locked_at < func.now() - lease),
+                ),
+            )
+            .order_by(Job.run_at, Job.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        stmt = (
+            update(Job)
+            .where(Job.id.in_(due.scalar_subquery()))
+            .values(status=JobStatus.RUNNING, attempts=Job.attempts + 1, locked_at=func.now())
+            .returning(Job)
+        )
+        return list((await session.execute(stmt)).scalars().all())
+
+    async def complete(self, session: AsyncSession, job_id: int, attempt: int) -> None:
+        # attempt -- защита от устаревшего исполнителя: задачу с истёкшей арендой уже мог взять другой
+        await session.execute(
+            delete(Job).where(Job.id == job_id, Job.attempts == attempt, Job.status == JobStatus.RUNNING)
+        )
+
+    async def retry(self, session: AsyncSession, job_id: int, attempt: int, delay: timedelta, error: str) -> None:
+        await session.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.attempts == attempt, Job.status == JobStatus.RUNNING)
+            .values(status=JobStatus.QUEUED, run_at=func.now() + delay, locked_at=None, last_error=error)
+        )
+
+    async def fail(self, session: AsyncSession, job_id: int, attempt: int, error: str) -> None:
+        await session.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.attempts == attempt, Job.status == JobStatus.RUNNING)
+            .values(status=JobStatus.FAILED, locked_at=None, last_error=error)
+        )
+
+    async def requeue_failed(self, session: AsyncSession) -> int:
+        # Попытки начинаются заново, например после починки провайдера
+        result = await session.execute(
+            update(Job)
+            .where(Job.status == JobStatus.FAILED)
+            .values(status=JobStatus.QUEUED, attempts=0, run_at=func.now())
+        )
+        return result.rowcount
@@ -0,0 +1,224 @@
+from typing import AsyncIterator, Dict, Iterable, List, Set, Tuple
+
+from sqlalchemy import Boolean, delete, func, insert, literal_column, or_, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from src.models.models import Category, Product, ProductTopping, Topping
+from src.schemas.menu import MenuEntityDiff
+
+CategoryPath = Tuple[str, ...]
+ProductKey = Tuple[int, str]
+
+# В RETURNING у только что вставленной строки xmax = 0, у обновлённой -- id транзакции
+_CREATED = literal_column("(xmax = 0)", Boolean).label("created")
+
+
+class MenuRepository:
+    """
+    Bulk upserts and export reads for the menu tables.
+
+    Upserts go through INSERT ... ON CONFLICT against the natural keys of
+    migration 0005 and do not commit: the caller imports the whole document
+    in one transaction. Multi-row parameter lists are sent by SQLAlchemy in
+    pages (insertmanyvalues), so the number of round-trips grows with the
+    document size divided by the page size.
+    """
+
+    async def upsert_categories(
+            self, session: AsyncSession, paths: Iterable[CategoryPath]
+    ) -> Tuple[Dict[CategoryPath, int], MenuEntityDiff]:
+        """
+        Create missing categories for every path and all its prefixes.
+
+        Parents are resolved by name path, one statement per tree level.
+        """
+        levels: Dict[int, Set[CategoryPath]] = {}
+        for path in paths:
+            for depth in range(1, len(path) + 1):
+                levels.setdefault(depth, set()).add(path[:depth])
+
+        ids: Dict[CategoryPath, int] = {}
+        diff = MenuEntityDiff()
+        for depth in sorted(levels):
+            level = sorted(levels[depth])
+            keys = {(ids[path[:-1]] if depth > 1 else None, path[-1]): path for path in level}
+            stmt = pg_insert(Category).values([{"parent_id": parent_id, "name": name} for parent_id, name in keys])
+            # DO UPDATE вместо DO NOTHING, чтобы RETURNING вернул и уже существующие строки
+            stmt = stmt.on_conflict_do_update(
+                # Литерал, а не параметр: иначе PostgreSQL не сопоставит выражение с индексом
+                index_elements=[func.coalesce(Category.parent_id, literal_column("0")), Category.name],
+                set_={"name": stmt.excluded.name},
+            ).returning(Category.id, Category.parent_id, Category.name, _CREATED)
+
+            for row in (await session.execute(stmt)).all():
+                ids[keys[(row.parent_id, row.name)]] = row.id
+                if row.created:
+                    diff.created += 1
+                else:
+                    diff.unchanged += 1
+        return ids, diff
+
+    async def upsert_toppings(
+            self, session: AsyncSession, toppings: List[dict]
+    ) -> Tuple[Dict[str, int], MenuEntityDiff]:
+        """
+        Insert new toppings and update the price of changed ones.
+        """
+        diff = MenuEntityDiff()
+        if not toppings:
+            return {}, diff
+
+        stmt = pg_insert(Topping)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Topping.name],
+            set_={"price": stmt.excluded.price},
+            where=Topping.price.is_distinct_from(stmt.excluded.price),
+        ).returning(Topping.id, Topping.name, _CREATED)
+
+        ids: Dict[str, int] = {}
+        for row in (await session.execute(stmt, toppings)).all():
+            ids[row.name] = row.id
+            if row.created:
+                diff.created += 1
+            else:
+                diff.updated += 1
+
+        # Строки без изменений ON CONFLICT ... WHERE не возвращает
+        unchanged = [topping["name"] for topping in toppings if topping["name"] not in ids]
+        ids.update(await self.get_topping_ids(session, unchanged))
+        diff.unchanged = len(unchanged)
+        return ids, diff
+
+    async def get_topping_ids(self, session: AsyncSession, names: Iterable[str]) -> Dict[str, int]:
+        names = list(names)
+        if not names:
+            return {}
+        result = await session.execute(select(Topping.name, Topping.id).where(Topping.name.in_(names)))
+        return dict(result.tuples().all())
+
+    async def upsert_products(
+            self, session: AsyncSession, products: List[dict]
+    ) -> Tuple[Dict[ProductKey, int], MenuEntityDiff]:
+        """
+        Insert new products and update price/description of changed ones.
+
+        Products are keyed by (subcategory_id, name). A deleted product that
+        is in the document again is restored.
+        """
+        diff = MenuEntityDiff()
+        if not products:
+            return {}, diff
+
+        stmt = pg_insert(Product)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Product.subcategory_id, Product.name],
+            set_={"price": stmt.excluded.price, "description": stmt.excluded.description, "is_active": True},
+            where=or_(
+                Product.price.is_distinct_from(stmt.excluded.price),
+                Product.description.is_distinct_from(stmt.excluded.description),
+                ~Product.is_active,
+            ),
+        ).returning(Product.id, Product.subcategory_id, Product.name, _CREATED)
+
+        ids: Dict[ProductKey, int] = {}
+        for row in (await session.execute(stmt, products)).all():
+            ids[(row.subcategory_id, row.name)] = row.id
+            if row.created:
+                diff.created += 1
+            else:
+                diff.updated += 1
+
+        unchanged = {(product["subcategory_id"], product["name"]) for product in products} - ids.keys()
+        if unchanged:
+            subcategory_ids = {subcategory_id for subcategory_id, _ in unchanged}
+            result = await session.execute(
+                select(Product.subcategory_id, Product.name, Product.id)
+                .where(Product.subcategory_id.in_(subcategory_ids))
+            )
+            for subcategory_id, name, product_id in result.tuples():
+                if (subcategory_id, name) in unchanged:
+                    ids[(subcategory_id, name)] = product_id
+        diff.unchanged = len(unchanged)
+        return ids, diff
+
+    async def replace_product_toppings(
+            self, session: AsyncSession, toppings_by_product: Dict[int, Set[int]]
+    ) -> MenuEntityDiff:
+        """
+        Make the toppings of every given product exactly the given sets.
+        """
+        diff = MenuEntityDiff()
+        if not toppings_by_product:
+            return diff
+
+        result = await session.execute(
+            select(ProductTopping.id, ProductTopping.product_id, ProductTopping.topping_id)
+            .where(ProductTopping.product_id.in_(list(toppings_by_product)))
+        )
+        existing = {(product_id, topping_id): link_id for link_id, product_id, topping_id in result.tuples()}
+        wanted = {
+            (product_id, topping_id)
+            for product_id, topping_ids in toppings_by_product.items()
+            for topping_id in topping_ids
+        }
+
+        stale = [link_id for pair, link_id in existing.items() if pair not in wanted]
+        if stale:
+            await session.execute(delete(ProductTopping).where(ProductTopping.id.in_(stale)))
+        new = [{"product_id": product_id, "topping_id": topping_id} for product_id, topping_id in wanted - existing.keys()]
+        if new:
+            await session.execute(insert(ProductTopping), new)
+
+        diff.created = len(new)
+        diff.removed = len(stale)
+        diff.unchanged = len(existing) - len(stale)
+        return diff
+
+    async def get_category_paths(self, session: AsyncSession) -> Dict[int, CategoryPath]:
+        """
+        Name path of every category, e.g. {7: ("Шашлык", "Свинина")}.
+        """
+        rows = (await session.execute(select(Category.id, Category.parent_id, Category.name))).all()
+        parents = {row.id: (row.parent_id, row.name) for row in rows}
+
+        paths: Dict[int, CategoryPath] = {}
+
+        def path_of(category_id: int, seen: Tuple[int, ...] = ()) -> CategoryPath:
+            if category_id in paths:
+                return paths[category_id]
+            parent_id, name = parents[category_id]
+            # Цикл в данных обрываем, как и в CategoriesRepository.get_tree
+            if parent_id is None or parent_id in seen or parent_id not in parents:
+                path: CategoryPath = (name,)
+            else:
+                path = path_of(parent_id, seen + (category_id,)) + (name,)
+            paths[category_id] = path
+            return path
+
+        for category_id in parents:
+            path_of(category_id)
+        return paths
+
+    async def get_toppings(self, session: AsyncSession) -> List[Topping]:
+        result = await session.execute(select(Topping).order_by(Topping.name))
+        return list(result.scalars().all())
+
+    async def stream_products(
+            self, session: AsyncSession, batch_size: int = 500
+    ) -> AsyncIterator[List[Product]]:
+        """
+        Yield all products on the menu with their topping links in batches,
+        without loading the whole catalog into memory.
+        """
+        stmt = (
+            select(Product)
+            .where(Product.is_active)
+            .options(selectinload(Product.available_toppings))
+            .order_by(Product.id)
+            .execution_options(yield_per=batch_size)
+        )
+        result = await session.stream(stmt)
+        async for partition in result.scalars().partitions():
+            yield list(partition)
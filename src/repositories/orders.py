@@ -0,0 +1,255 @@
+from datetime import datetime
+from typing import AsyncIterator, Collection, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Row, and_, exists, func, insert, select, true, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from sqlalchemy.orm.attributes import set_committed_value
+
+from src.models.models import (
+    Order, OrderItem, OrderItemTopping, Payment, Product, ProductTopping, Topping, UserAddress
+)
+from src.schemas.order import OrderStatusEvent
+from src.utils.enums import DeliveryType, OrderStatus
+
+
+class OrdersRepository:
+    async def get_cart_prices(
+            self,
+            session: AsyncSession,
+            product_ids: Sequence[int],
+            topping_ids: Sequence[int],
+            user_id: int,
+            address_id: Optional[int],
+    ) -> Tuple[Dict[int, int], Dict[Tuple[int, int], int], bool]:
+        """
+        Fetch product prices, prices of the requested toppings and check the
+        delivery address in one query.
+
+        :return: product_id -> price, (product_id, topping_id) -> price
+            for toppings that are available for that product (prices in
+            kopecks), and whether the address belongs to the user. Without an
+            address the check passes; if none of the products exist, it fails.
+        """
+        address_owned = true() if address_id is None else (
+            exists().where(UserAddress.id == address_id, UserAddress.user_id == user_id)
+        )
+        stmt = (
+            select(Product.id, Product.price, Topping.id, Topping.price, address_owned)
+            .outerjoin(
+                ProductTopping,
+                and_(ProductTopping.product_id == Product.id, ProductTopping.topping_id.in_(topping_ids)),
+            )
+            .outerjoin(Topping, Topping.id == ProductTopping.topping_id)
+            .where(Product.id.in_(product_ids), Product.is_active)
+        )
+        result = await session.execute(stmt)
+
+        product_prices: Dict[int, int] = {}
+        topping_prices: Dict[Tuple[int, int], int] = {}
+        address_valid = False
+        for product_id, product_price, topping_id, topping_price, address_valid in result.all():
+            product_prices[product_id] = product_price
+            if topping_id is not None:
+                topping_prices[(product_id, topping_id)] = topping_price
+        return product_prices, topping_prices, bool(address_valid)
+
+    async def create_order(
+            self,
+            session: AsyncSession,
+            order_data: dict,
+            items_data: List[dict],
+    ) -> Order:
+        """
+        Insert an order with its items and their toppings; the caller commits.
+
+        Every level is written by a single multi-row INSERT ... RETURNING, so
+        the number of round-trips does not depend on the size of the cart.
+
+        :param items_data: item columns plus a "toppings" list of topping columns.
+        """
+        order = (await session.execute(insert(Order).values(**order_data).returning(Order))).scalars().one()
+
+        item_rows = [
+            {key: value for key, value in item.items() if key != "toppings"} | {"order_id": order.id}
+            for item in items_data
+        ]
+        items = list((await session.execute(
+            insert(OrderItem).returning(OrderItem, sort_by_parameter_order=True), item_rows
+        )).scalars().all())
+
+        topping_rows = [
+            topping | {"order_item_id": item.id}
+            for item, item_data in zip(items, items_data)
+            for topping in item_data["toppings"]
+        ]
+        toppings: List[OrderItemTopping] = []
+        if topping_rows:
+            toppings = list((await session.execute(
+                insert(OrderItemTopping).returning(OrderItemTopping, sort_by_parameter_order=True), topping_rows
+            )).scalars().all())
+
+        # Отношения собираем из уже полученных строк, без повторных запросов
+        toppings_by_item: Dict[int, List[OrderItemTopping]] = {item.id: [] for item in items}
+        for topping in toppings:
+            toppings_by_item[topping.order_item_id].append(topping)
+        for item in items:
+            set_committed_value(item, "toppings", toppings_by_item[item.id])
+        set_committed_value(order, "items", items)
+        return order
+
+    async def get_user_orders_page(
+            self,
+            session: AsyncSession,
+            user_id: int,
+            limit: int,
+            after: Optional[Tuple[datetime, int]] = None,
+    ) -> List[Order]:
+        """
+        Load one page of a user's orders, newest first, with keyset pagination.
+
+        Only the order rows are loaded: the page lists order summaries, and
+        the details of one order come from get_user_order(). One extra row is
+        fetched to tell whether there is a next page.
+
+        :param after: (created_at, id) of the last order of the previous page.
+        """
+        stmt = (
+            select(Order)
+            .where(Order.user_id == user_id)
+            .order_by(Order.created_at.desc(), Order.id.desc())
+            .limit(limit + 1)
+        )
+        if after is not None:
+            stmt = stmt.where(tuple_(Order.created_at, Order.id) < tuple_(*after))
+
+        result = await session.execute(stmt)
+        return list(result.scalars().all())
+
+    async def get_user_order(self, session: AsyncSession, user_id: int, order_id: int) -> Optional[Order]:
+        """
+        Load one order of the user with its items, toppings, payment and address.
+        """
+        stmt = (
+            select(Order)
+            .where(Order.id == order_id, Order.user_id == user_id)
+            .options(
+                selectinload(Order.items).selectinload(OrderItem.toppings),
+                selectinload(Order.payment),
+                selectinload(Order.address),
+            )
+        )
+        result = await session.execute(stmt)
+        return result.scalar_one_or_none()
+
+    async def get_orders_by_status(
+            self,
+            session: AsyncSession,
+            statuses: Collection[OrderStatus],
+            limit: int,
+    ) -> List[Order]:
+        """
+        Load the oldest orders in the given statuses (kitchen/courier queue)
+        with their items and toppings.
+        """
+        stmt = (
+            select(Order)
+            .where(Order.status.in_(statuses))
+            .order_by(Order.created_at, Order.id)
+            .limit(limit)
+            .options(selectinload(Order.items).selectinload(OrderItem.toppings))
+        )
+        result = await session.execute(stmt)
+        return list(result.scalars().all())
+
+    async def get_order_state(
+            self, session: AsyncSession, order_id: int
+    ) -> Optional[Tuple[OrderStatus, DeliveryType, Optional[datetime]]]:
+        stmt = select(Order.status, Order.delivery_type, Order.delivery_time).where(Order.id == order_id)
+        row = (await session.execute(stmt)).one_or_none()
+        return (row.status, row.delivery_type, row.delivery_time) if row else None
+
+    async def change_status(
+            self,
+            session: AsyncSession,
+            order_id: int,
+            expected_status: OrderStatus,
+            status: OrderStatus,
+            channel: str,
+    ) -> Optional[OrderStatusEvent]:
+        """
+        Move an order from expected_status to status and publish the change.
+
+        The update only applies if the order is still in expected_status, so
+        two concurrent transitions cannot both succeed. NOTIFY is sent in the
+        same transaction and reaches listeners only after the commit.
+
+        :return: the published event, or None if the status has changed meanwhile.
+        """
+        stmt = (
+            update(Order)
+            .where(Order.id == order_id, Order.status == expected_status)
+            .values(status=status)
+            .returning(Order.id, Order.status, Order.delivery_type, Order.updated_at)
+        )
+        row = (await session.execute(stmt)).one_or_none()
+        if row is None:
+            return None
+
+        event = OrderStatusEvent(
+            order_id=row.id,
+            status=row.status,
+            previous_status=expected_status,
+            delivery_type=row.delivery_type,
+            changed_at=row.updated_at,
+        )
+        await session.execute(select(func.pg_notify(channel, event.model_dump_json())))
+        return event
+
+    async def stream_export_rows(
+            self,
+            session: AsyncSession,
+            date_from: datetime,
+            date_to: datetime,
+            batch_size: int,
+    ) -> AsyncIterator[Sequence[Row]]:
+        """
+        Stream orders created in [date_from, date_to) as flat rows, in batches.
+
+        One row per item topping (or per item without toppings), with the
+        order and payment columns repeated, ordered by order and item so that
+        the rows of one order are adjacent. Rows come from a server-side
+        cursor, and only one batch is held in memory at a time.
+        """
+        stmt = (
+            select(
+                Order.id.label("order_id"),
+                Order.created_at,
+                Order.user_id,
+                Order.status,
+                Order.delivery_type,
+                Order.total_amount,
+                Payment.status.label("payment_status"),
+                Payment.amount.label("payment_amount"),
+                OrderItem.id.label("item_id"),
+                OrderItem.product_id,
+                Product.name.label("product_name"),
+                OrderItem.quantity,
+                OrderItem.price.label("item_price"),
+                OrderItemTopping.topping_id,
+                Topping.name.label("topping_name"),
+                OrderItemTopping.price.label("topping_price"),
+            )
+            .select_from(Order)
+            .join(OrderItem, OrderItem.order_id == Order.id)
+            .join(Product, Product.id == OrderItem.product_id)
+            .outerjoin(OrderItemTopping, OrderItemTopping.order_item_id == OrderItem.id)
+            .outerjoin(Topping, Topping.id == OrderItemTopping.topping_id)
+            .outerjoin(Payment, Payment.order_id == Order.id)
+            .where(Order.created_at >= date_from, Order.created_at < date_to)
+            .order_by(Order.id, OrderItem.id, OrderItemTopping.id)
+            .execution_options(yield_per=batch_size)
+        )
+        result = await session.stream(stmt)
+        async for partition in result.partitions():
+            yield partition
@@ -0,0 +1,80 @@
+from typing import List, Optional
+
+from sqlalchemy import Row, func, insert, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.models.models import Product
+
+
+class ProductsRepository:
+    async def create_product(self, session: AsyncSession, product_data: dict) -> Product:
+        stmt = insert(Product).values(**product_data).returning(Product)
+        result = await session.execute(stmt)
+        return result.scalars().one()
+
+    async def update_product(self, session: AsyncSession, product_id: int, product_data: dict) -> Optional[Product]:
+        stmt = (
+            update(Product)
+            .where(Product.id == product_id, Product.is_active)
+            .values(**product_data)
+            .returning(Product)
+        )
+        result = await session.execute(stmt)
+        return result.scalars().one_or_none()
+
+    async def get_product(self, session: AsyncSession, product_id: int) -> Optional[Product]:
+        stmt = select(Product).where(Product.id == product_id, Product.is_active)
+        result = await session.execute(stmt)
+        return result.scalars().one_or_none()
+
+    async def delete_product(self, session: AsyncSession, product_id: int) -> bool:
+        """
+        Hide the product from the menu; its row stays for the order history.
+        """
+        stmt = (
+            update(Product)
+            .where(Product.id == product_id, Product.is_active)
+            .values(is_active=False)
+            .returning(Product.id)
+        )
+        result = await session.execute(stmt)
+        return result.scalar_one_or_none() is not None
+
+    async def search_products(
+            self,
+            session: AsyncSession,
+            query: str,
+            limit: int,
+            offset: int = 0,
+            subcategory_id: Optional[int] = None,
+            price_min: Optional[int] = None,
+            price_max: Optional[int] = None,
+    ) -> List[Row]:
+        """
+        Find products by words of the name and description or by a name with typos.
+
+        Words are matched with Russian stemming ("курицу" finds "Курица"),
+        and names also by trigram word similarity ("люлля" finds "Люля-кебаб").
+        Each condition is answered by its own GIN index. Results are ordered
+        by the sum of the full-text rank and the name similarity.
+
+        :return: rows of product columns and "rank", best first.
+        """
+        tsquery = func.websearch_to_tsquery("russian", query)
+        rank = (func.ts_rank(Product.search_vector, tsquery) + func.word_similarity(query, Product.name)).label("rank")
+        stmt = (
+            select(Product.id, Product.name, Product.subcategory_id, Product.price, Product.description, rank)
+            # name %> query -- то же, что query <% name, но в форме, которую понимает индекс
+            .where(or_(Product.search_vector.op("@@")(tsquery), Product.name.op("%>")(query)))
+            .where(Product.is_active)
+            .order_by(rank.desc(), Product.id)
+            .limit(limit)
+            .offset(offset)
+        )
+        if subcategory_id is not None:
+            stmt = stmt.where(Product.subcategory_id == subcategory_id)
+        if price_min is not None:
+            stmt = stmt.where(Product.price >= price_min)
+        if price_max is not None:
+            stmt = stmt.where(Product.price <= price_max)
+        return list((await session.execute(stmt)).all())
@@ -1,23 +1,56 @@
 from typing import Optional
 
-from sqlalchemy import insert, select, update, func
+from sqlalchemy import delete, insert, select, update, func
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
 from src.models.models import User
-from src.schemas.user import UserCreate, UserRead
+from src.schemas.user import UserCreate, UserRead, UserSummary
 
 
 class UsersRepository:
-    async def create_user(self, session: AsyncSession, user_data: dict) -> UserRead:
+    async def create_user(self, session: AsyncSession, user_data: dict) -> UserSummary:
         stmt = insert(User).values(**user_data).returning(User)
         result = await session.execute(stmt)
-        await session.commit()
 
         created_user = result.scalars().first()
-        # Преобразуем SQLAlchemy объект в pydantic-модель и сразу исключаем ленивые отношения
-        user_dict = UserRead.model_validate(created_user).model_dump(exclude={'addresses', 'orders'})
-        new_user = UserRead(**user_dict)
-        return new_user
+        # Ленивые отношения не загружены и в ответ не попадают
+        return created_user.to_summary_model()
+
+    async def get_user_by_phone(self, session: AsyncSession, phone: str) -> Optional[User]:
+        stmt = select(User).where(User.phone == phone)
+        result = await session.execute(stmt)
+        return result.scalar_one_or_none()
+
+    async def get_user_with_addresses(self, session: AsyncSession, user_id: int) -> Optional[User]:
+        stmt = select(User).where(User.id == user_id).options(selectinload(User.addresses))
+        result = await session.execute(stmt)
+        return result.scalar_one_or_none()
+
+    async def get_token_version(self, session: AsyncSession, user_id: int) -> Optional[int]:
+        stmt = select(User.token_version).where(User.id == user_id)
+        result = await session.execute(stmt)
+        return result.scalar_one_or_none()
+
+    async def bump_token_version(self, session: AsyncSession, user_id: int) -> Optional[int]:
+        stmt = (
+            update(User)
+            .where(User.id == user_id)
+            .values(token_version=User.token_version + 1)
+            .returning(User.token_version)
+        )
+        result = await session.execute(stmt)
+        return result.scalar_one_or_none()
+
+    async def update_user(self, session: AsyncSession, user_id: int, user_data: dict) -> Optional[User]:
+        stmt = update(User).where(User.id == user_id).values(**user_data).returning(User)
+        result = await session.execute(stmt)
+        return result.scalar_one_or_none()
+
+    async def delete_user(self, session: AsyncSession, user_id: int) -> bool:
+        stmt = delete(User).where(User.id == user_id).returning(User.id)
+        result = await session.execute(stmt)
+        return result.scalar_one_or_none() is not None
 
     #
     # @staticmethod
@@ -1,16 +1,22 @@
 from .common import TimestampSchema
-from .user import UserBase, UserCreate, UserRead
+from .user import UserBase, UserCreate, UserUpdate, UserLogin, UserSummary, UserRead, CurrentUser, AuthToken
 from .address import UserAddressBase, UserAddressCreate, UserAddressRead
-from .category import CategoryBase, CategoryCreate, CategoryRead
+from .category import CategoryBase, CategoryCreate, CategoryUpdate, CategoryRead
 from .topping import ToppingBase, ToppingCreate, ToppingRead
-from .product import ProductBase, ProductCreate, ProductRead
+from .product import ProductBase, ProductCreate, ProductUpdate, ProductListItem, ProductRead, ProductSearchHit, ProductSearchPage
 from .product_topping import ProductToppingBase, ProductToppingCreate, ProductToppingRead
-from .order import OrderBase, OrderCreate, OrderRead
+from .order import OrderBase, OrderCreate, OrderSummary, OrderRead, OrderHistoryPage, OrderStatusUpdate, OrderStatusEvent
 from .order_item import OrderItemBase, OrderItemCreate, OrderItemRead
 from .order_item_topping import OrderItemToppingBase, OrderItemToppingCreate, OrderItemToppingRead
 from .payment import PaymentBase, PaymentCreate, PaymentRead
+from .cart import CartItem, CartCreate
+from .system import PoolStatsRead
+from .menu import MenuTopping, MenuProduct, MenuDocument, MenuEntityDiff, MenuImportReport
+from .analytics import DailySalesRead, SalesTotals, SalesReport, TopProductRead, AnalyticsRefreshRead
+from .delivery_slot import DeliverySlotRead, DeliverySlotCapacityUpdate, DeliverySlotCapacityRead
 
-# Обновляем forward-ссылки после импорта всех схем
+# Обновляем forward-ссылки глубоких *Read схем после импорта всех схем.
+# Плоские *Summary/*ListItem схемы ссылок не содержат и в этом не нуждаются
 UserRead.model_rebuild()
 UserAddressRead.model_rebuild()
 CategoryRead.model_rebuild()
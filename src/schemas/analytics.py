@@ -0,0 +1,62 @@
+from datetime import date, datetime
+from typing import List, Optional
+
+from pydantic import BaseModel, ConfigDict
+
+from src.schemas.money import Money
+
+
+class DailySalesRead(BaseModel):
+    day: date
+    orders_count: int
+    revenue: Money
+    delivery_orders: int
+    delivery_revenue: Money
+    pickup_orders: int
+    pickup_revenue: Money
+    order_items_count: int
+    items_with_toppings: int
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class SalesTotals(BaseModel):
+    orders_count: int = 0
+    revenue: Money = 0
+    # Средний чек, округлённый вниз до копейки
+    average_check: Money = 0
+    delivery_orders: int = 0
+    delivery_revenue: Money = 0
+    pickup_orders: int = 0
+    pickup_revenue: Money = 0
+    # Доли от 0 до 1: заказы с доставкой и позиции, к которым добавили топпинг
+    delivery_share: float = 0.0
+    topping_attach_rate: float = 0.0
+
+
+class SalesReport(BaseModel):
+    # Период включительно, дни в часовом поясе ANALYTICS_TIMEZONE
+    date_from: date
+    date_to: date
+    totals: SalesTotals
+    # Только дни с продажами
+    days: List[DailySalesRead] = []
+    # Время последнего пересчёта агрегатов; None -- пересчёта ещё не было
+    refreshed_at: Optional[datetime] = None
+
+
+class TopProductRead(BaseModel):
+    product_id: int
+    name: str
+    quantity: int
+    # Вместе с топпингами
+    revenue: Money
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class AnalyticsRefreshRead(BaseModel):
+    # False -- пересчёт уже идёт в другом воркере
+    refreshed: bool
+    days: List[date] = []
+    refreshed_at: Optional[datetime] = None
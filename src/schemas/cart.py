@@ -0,0 +1,24 @@
+from __future__ import annotations
+from typing import List, Optional
+from pydantic import BaseModel, ConfigDict, Field
+from datetime import datetime
+
+from src.utils.enums import DeliveryType
+
+class CartItem(BaseModel):
+    product_id: int
+    quantity: int = Field(gt=0)
+    topping_ids: List[int] = []
+
+    model_config = ConfigDict(from_attributes=True)
+
+class CartCreate(BaseModel):
+    # Цены в корзине не передаются: заказ оценивается на сервере по Product.price и Topping.price.
+    # Пользователь берётся из токена
+    address_id: Optional[int] = None
+    delivery_type: DeliveryType = DeliveryType.DELIVERY
+    courier_comment: Optional[str] = None
+    delivery_time: Optional[datetime] = None
+    items: List[CartItem] = Field(min_length=1)
+
+    model_config = ConfigDict(from_attributes=True)
@@ -1,6 +1,8 @@
 from __future__ import annotations
 from typing import Optional, List
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, field_validator
+
+from src.schemas.common import reject_null
 
 class CategoryBase(BaseModel):
     name: str
@@ -11,6 +13,13 @@ class CategoryBase(BaseModel):
 class CategoryCreate(CategoryBase):
     pass
 
+class CategoryUpdate(BaseModel):
+    name: Optional[str] = None
+    # null переносит категорию в корень
+    parent_id: Optional[int] = None
+
+    _name_not_null = field_validator("name")(reject_null)
+
 class CategoryRead(CategoryBase):
     id: int
     # Forward ссылки на вложенные категории и продукты
@@ -1,5 +1,6 @@
 from __future__ import annotations
 from datetime import datetime
+from typing import Any
 from pydantic import BaseModel, ConfigDict
 
 class TimestampSchema(BaseModel):
@@ -7,3 +8,10 @@ class TimestampSchema(BaseModel):
     updated_at: datetime
 
     model_config = ConfigDict(from_attributes=True)
+
+
+def reject_null(value: Any) -> Any:
+    # Для частичных обновлений: поле можно не передавать, но null в NOT NULL колонку не пишем
+    if value is None:
+        raise ValueError("Field may be omitted but cannot be null")
+    return value
@@ -0,0 +1,30 @@
+from datetime import datetime
+
+from pydantic import BaseModel, ConfigDict, Field
+
+from src.utils.enums import DeliveryType
+
+
+class DeliverySlotRead(BaseModel):
+    delivery_type: DeliveryType
+    slot_start: datetime
+    slot_end: datetime
+    # Сколько ещё заказов примет слот: меньшее из свободных мест кухни и курьеров
+    available: int
+
+
+class DeliverySlotCapacityUpdate(BaseModel):
+    kitchen_capacity: int = Field(ge=0)
+    # Для самовывоза не используется
+    courier_capacity: int = Field(default=0, ge=0)
+
+
+class DeliverySlotCapacityRead(BaseModel):
+    delivery_type: DeliveryType
+    slot_start: datetime
+    kitchen_capacity: int
+    kitchen_reserved: int
+    courier_capacity: int
+    courier_reserved: int
+
+    model_config = ConfigDict(from_attributes=True)
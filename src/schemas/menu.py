@@ -0,0 +1,41 @@
+from __future__ import annotations
+from typing import List, Optional
+from pydantic import BaseModel, Field
+
+from src.schemas.money import Money
+
+# Документ меню для массового импорта/экспорта. Строки связываются по именам,
+# а не по id, чтобы один и тот же документ можно было загрузить в любую базу
+
+class MenuTopping(BaseModel):
+    name: str = Field(min_length=1, max_length=100)
+    price: Money
+
+class MenuProduct(BaseModel):
+    # Путь категории от корня, например ["Шашлык", "Свинина"]
+    category: List[str] = Field(min_length=1)
+    name: str = Field(min_length=1, max_length=100)
+    price: Money
+    description: Optional[str] = None
+    # Имена топпингов; список заменяет текущие топпинги продукта целиком
+    toppings: List[str] = []
+
+class MenuDocument(BaseModel):
+    # Пути категорий, которые нужно создать даже без продуктов
+    categories: List[List[str]] = []
+    toppings: List[MenuTopping] = []
+    products: List[MenuProduct] = []
+
+class MenuEntityDiff(BaseModel):
+    created: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    removed: int = 0
+
+class MenuImportReport(BaseModel):
+    # При dry_run изменения откатываются, отчёт показывает, что было бы сделано
+    dry_run: bool = False
+    categories: MenuEntityDiff = Field(default_factory=MenuEntityDiff)
+    toppings: MenuEntityDiff = Field(default_factory=MenuEntityDiff)
+    products: MenuEntityDiff = Field(default_factory=MenuEntityDiff)
+    product_toppings: MenuEntityDiff = Field(default_factory=MenuEntityDiff)
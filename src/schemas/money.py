@@ -0,0 +1,5 @@
+from typing import Annotated
+from pydantic import Field
+
+# Денежная сумма в копейках. strict=True не даёт передать рубли дробным числом
+Money = Annotated[int, Field(strict=True, ge=0, description="Amount in kopecks")]
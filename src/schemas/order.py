@@ -3,6 +3,7 @@ from typing import Optional, List
 from pydantic import BaseModel, ConfigDict
 from datetime import datetime
 
+from src.schemas.money import Money
 from src.utils.enums import DeliveryType, OrderStatus
 
 class OrderBase(BaseModel):
@@ -10,7 +11,7 @@ class OrderBase(BaseModel):
     address_id: Optional[int] = None
     delivery_type: DeliveryType = DeliveryType.DELIVERY
     status: OrderStatus = OrderStatus.PENDING
-    total_amount: float
+    total_amount: Money
     courier_comment: Optional[str] = None
     delivery_time: Optional[datetime] = None
 
@@ -19,6 +20,12 @@ class OrderBase(BaseModel):
 class OrderCreate(OrderBase):
     pass
 
+class OrderSummary(OrderBase):
+    # Плоская схема для списков; позиции и оплата -- в OrderRead
+    id: int
+    created_at: datetime
+    updated_at: datetime
+
 class OrderRead(OrderBase):
     id: int
     user: Optional["UserRead"] = None
@@ -29,3 +36,21 @@ class OrderRead(OrderBase):
     updated_at: datetime
 
     model_config = ConfigDict(from_attributes=True)
+
+class OrderHistoryPage(BaseModel):
+    orders: List[OrderSummary] = []
+    # Курсор следующей страницы; None -- страниц больше нет
+    next_cursor: Optional[str] = None
+
+class OrderStatusUpdate(BaseModel):
+    status: OrderStatus
+
+class OrderStatusEvent(BaseModel):
+    # Событие смены статуса, рассылается через PostgreSQL NOTIFY подписчикам кухни и курьеров
+    order_id: int
+    status: OrderStatus
+    previous_status: OrderStatus
+    delivery_type: DeliveryType
+    changed_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
@@ -2,11 +2,13 @@ from __future__ import annotations
 from typing import Optional, List
 from pydantic import BaseModel, ConfigDict
 
+from src.schemas.money import Money
+
 class OrderItemBase(BaseModel):
     order_id: int
     product_id: int
     quantity: int
-    price: float
+    price: Money
 
     model_config = ConfigDict(from_attributes=True)
 
@@ -2,10 +2,12 @@ from __future__ import annotations
 from typing import Optional
 from pydantic import BaseModel, ConfigDict
 
+from src.schemas.money import Money
+
 class OrderItemToppingBase(BaseModel):
     order_item_id: int
     topping_id: int
-    price: float
+    price: Money
 
     model_config = ConfigDict(from_attributes=True)
 
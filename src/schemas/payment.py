@@ -3,10 +3,12 @@ from typing import Optional
 from pydantic import BaseModel, ConfigDict
 from datetime import datetime
 
+from src.schemas.money import Money
+
 class PaymentBase(BaseModel):
     user_id: int
     order_id: int
-    amount: float
+    amount: Money
     status: str
 
     model_config = ConfigDict(from_attributes=True)
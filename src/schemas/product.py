@@ -1,11 +1,14 @@
 from __future__ import annotations
 from typing import Optional, List
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, field_validator
+
+from src.schemas.common import reject_null
+from src.schemas.money import Money
 
 class ProductBase(BaseModel):
     name: str
     subcategory_id: int
-    price: float
+    price: Money
     description: Optional[str] = None
 
     model_config = ConfigDict(from_attributes=True)
@@ -13,6 +16,30 @@ class ProductBase(BaseModel):
 class ProductCreate(ProductBase):
     pass
 
+class ProductUpdate(BaseModel):
+    name: Optional[str] = None
+    subcategory_id: Optional[int] = None
+    price: Optional[Money] = None
+    description: Optional[str] = None
+
+    _not_null = field_validator("name", "subcategory_id", "price")(reject_null)
+
+class ProductListItem(ProductBase):
+    # Плоская схема для списков: только поля продукта и id топпингов,
+    # сами топпинги отдаются в GET /products/{product_id}
+    id: int
+    topping_ids: List[int] = []
+
+class ProductSearchHit(ProductBase):
+    id: int
+    # Релевантность: ранг полнотекстового поиска плюс похожесть названия на запрос
+    rank: float
+
+class ProductSearchPage(BaseModel):
+    items: List[ProductSearchHit] = []
+    # offset следующей страницы; None -- страниц больше нет
+    next_offset: Optional[int] = None
+
 class ProductRead(ProductBase):
     id: int
     # Forward ссылки на связанные схемы
@@ -0,0 +1,169 @@
+"""
+Сериализация ORM-объектов из src/models/models.py в *Read схемы.
+
+Сериализатор никогда не ходит в базу: он читает только то, что уже лежит
+в состоянии объекта (state.dict). Незагруженные отношения пропускаются и
+получают значение по умолчанию из схемы, поэтому на AsyncSession не бывает
+MissingGreenlet, а объём ответа задаётся явно.
+
+Глубина обхода задаётся одним из двух способов:
+
+* ``include`` -- граф отношений, которые нужно включить, например
+  ``{"items": {"toppings": {}}, "payment": {}}`` или в виде путей
+  ``["items.toppings", "payment"]``;
+* ``max_depth`` -- сколько уровней уже загруженных отношений обходить,
+  если ``include`` не задан.
+
+Объект, который уже есть на текущем пути обхода (Order -> user -> orders -> ...),
+повторно не сериализуется, так что циклы отношений не приводят к рекурсии.
+"""
+import time
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, Type, Union
+
+from pydantic import BaseModel
+from sqlalchemy import inspect
+
+from src.utils.metrics import record_serialization
+
+IncludeGraph = Dict[str, "IncludeGraph"]
+Include = Union[IncludeGraph, Iterable[str]]
+
+# Глубина по умолчанию для to_read_model(): поля объекта и отношения первого уровня
+DEFAULT_MAX_DEPTH = 1
+
+_SKIP = object()
+
+
+def build_include(*paths: str) -> IncludeGraph:
+    """
+    Build an include graph from dotted relationship paths.
+
+    ``build_include("items.toppings", "payment")`` returns
+    ``{"items": {"toppings": {}}, "payment": {}}``.
+    """
+    graph: IncludeGraph = {}
+    for path in paths:
+        node = graph
+        for part in path.split("."):
+            node = node.setdefault(part, {})
+    return graph
+
+
+def to_read(
+        obj: Any,
+        include: Optional[Include] = None,
+        max_depth: int = DEFAULT_MAX_DEPTH,
+        schema: Optional[Type[BaseModel]] = None,
+) -> BaseModel:
+    """
+    Serialize a mapped object into its *Read schema using only loaded state.
+
+    :param obj: ORM instance; its class must define ``__read_schema__``
+        unless ``schema`` is given explicitly.
+    :param include: relationships to include (graph or dotted paths).
+        When set, ``max_depth`` is ignored.
+    :param max_depth: number of loaded relationship levels to follow
+        when ``include`` is not set.
+    :param schema: schema to build instead of ``obj.__read_schema__``.
+    """
+    started = time.perf_counter()
+    if include is not None and not isinstance(include, dict):
+        include = build_include(*include)
+    result = _serialize(obj, schema or type(obj).__read_schema__, include, max_depth, set())
+    record_serialization(time.perf_counter() - started)
+    return result
+
+
+def to_read_list(
+        objs: Iterable[Any],
+        include: Optional[Include] = None,
+        max_depth: int = DEFAULT_MAX_DEPTH,
+        schema: Optional[Type[BaseModel]] = None,
+) -> List[BaseModel]:
+    """
+    Serialize a sequence of mapped objects, see :func:`to_read`.
+    """
+    started = time.perf_counter()
+    if include is not None and not isinstance(include, dict):
+        include = build_include(*include)
+    result = [
+        _serialize(obj, schema or type(obj).__read_schema__, include, max_depth, set())
+        for obj in objs
+    ]
+    record_serialization(time.perf_counter() - started)
+    return result
+
+
+@lru_cache(maxsize=None)
+def _plan(schema: Type[BaseModel], model: type) -> Tuple[Tuple[str, Any], ...]:
+    # Для каждой пары (схема, модель) один раз определяем, какие поля схемы
+    # являются отношениями, а какие -- обычными колонками
+    relationships = inspect(model).relationships
+    return tuple(
+        (name, relationships[name] if name in relationships else None)
+        for name in schema.model_fields
+    )
+
+
+def _serialize(
+        obj: Any,
+        schema: Type[BaseModel],
+        include: Optional[IncludeGraph],
+        depth: int,
+        path: Set[int],
+) -> BaseModel:
+    loaded = inspect(obj).dict
+    path.add(id(obj))
+
+    data = {}
+    for name, relationship in _plan(schema, type(obj)):
+        if relationship is None:
+            if name in loaded:
+                data[name] = loaded[name]
+            continue
+
+        value = _serialize_relationship(loaded, name, relationship, include, depth, path)
+        if value is not _SKIP:
+            data[name] = value
+
+    path.discard(id(obj))
+    return schema(**data)
+
+
+def _serialize_relationship(
+        loaded: dict,
+        name: str,
+        relationship: Any,
+        include: Optional[IncludeGraph],
+        depth: int,
+        path: Set[int],
+) -> Any:
+    # Незагруженное отношение не трогаем -- иначе это ленивый запрос
+    if name not in loaded:
+        return _SKIP
+
+    if include is not None:
+        if name not in include:
+            return _SKIP
+        child_include = include[name]
+    elif depth <= 0:
+        return _SKIP
+    else:
+        child_include = None
+
+    value = loaded[name]
+    target_schema = relationship.mapper.class_.__read_schema__
+
+    if relationship.uselist:
+        return [
+            _serialize(item, target_schema, child_include, depth - 1, path)
+            for item in value
+            if id(item) not in path
+        ]
+
+    if value is None:
+        return None
+    if id(value) in path:
+        return _SKIP
+    return _serialize(value, target_schema, child_include, depth - 1, path)
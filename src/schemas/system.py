@@ -0,0 +1,18 @@
+from typing import Optional
+from pydantic import BaseModel
+
+class PoolStatsRead(BaseModel):
+    # Счётчики пула соединений одного воркера, см. src/db/pool.py
+    checkouts: int
+    checkins: int
+    connects: int
+    invalidations: int
+    timeouts: int
+    wait_seconds_total: float
+    wait_seconds_max: float
+    pool_class: str
+    # Только для QueuePool; у NullPool их нет
+    size: Optional[int] = None
+    checked_in: Optional[int] = None
+    checked_out: Optional[int] = None
+    overflow: Optional[int] = None
@@ -2,9 +2,11 @@ from __future__ import annotations
 from typing import Optional
 from pydantic import BaseModel, ConfigDict
 
+from src.schemas.money import Money
+
 class ToppingBase(BaseModel):
     name: str
-    price: float
+    price: Money
 
     model_config = ConfigDict(from_attributes=True)
 
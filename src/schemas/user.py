@@ -1,8 +1,10 @@
 from __future__ import annotations
 from typing import List, Optional
-from pydantic import BaseModel, EmailStr, ConfigDict, constr
+from pydantic import BaseModel, EmailStr, ConfigDict, Field, constr, field_validator
 from datetime import datetime
 
+from src.schemas.common import reject_null
+
 from src.utils.enums import UserRole
 
 # Регулярное выражение для проверки русского номера телефона
@@ -18,14 +20,40 @@ class UserBase(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 class UserCreate(UserBase):
-    pass
+    # Хранится только хеш, в схемы чтения пароль не попадает
+    password: str = Field(min_length=8, max_length=128)
+
+class UserSummary(UserBase):
+    # Плоская схема без адресов, например для ответа на вход
+    id: int
 
 class UserRead(UserBase):
     id: int
     # Forward-ссылки оформлены как строки – они будут разрешены после вызова model_rebuild()
+    # Заказы сюда не входят: история отдаётся постранично через /users/me/orders
     addresses: Optional[List["UserAddressRead"]] = []
-    orders: Optional[List["OrderRead"]] = []
     created_at: datetime
     updated_at: datetime
 
     model_config = ConfigDict(from_attributes=True)
+
+class UserUpdate(BaseModel):
+    name: Optional[str] = None
+    email: Optional[EmailStr] = None
+
+    _not_null = field_validator("name", "email")(reject_null)
+
+class UserLogin(BaseModel):
+    phone: str
+    password: str = Field(max_length=128)
+
+class CurrentUser(BaseModel):
+    # Пользователь, восстановленный из claims токена без обращения к БД
+    id: int
+    role: UserRole
+    token_version: int
+
+class AuthToken(BaseModel):
+    access_token: str
+    token_type: str = "bearer"
+    user: UserSummary
@@ -0,0 +1,167 @@
+import asyncio
+import logging
+from datetime import date, timedelta
+from typing import List, Literal, Optional, Sequence
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from src.db.db import async_session_maker
+from src.db.unit_of_work import UnitOfWork
+from src.models.models import DailySales
+from src.repositories.analytics import AnalyticsRepository
+from src.schemas.analytics import AnalyticsRefreshRead, DailySalesRead, SalesReport, SalesTotals, TopProductRead
+from src.utils.config import settings
+
+
+class AnalyticsService:
+    """
+    Sales analytics answered from daily rollups.
+
+    Reads never touch orders: they sum at most one rollup row per day (and
+    per product for the top list). The rollups lag behind orders by up to
+    ANALYTICS_REFRESH_INTERVAL_SECONDS, see refresh().
+    """
+
+    def __init__(
+            self, uow: UnitOfWork,
+            analytics_repo: AnalyticsRepository,
+            tz: str = settings.analytics.TIMEZONE,
+            overlap_seconds: int = settings.analytics.REFRESH_OVERLAP_SECONDS,
+    ) -> None:
+        self.uow = uow
+        self.session = uow.session
+        self.analytics_repo = analytics_repo
+        self.tz = tz
+        self.overlap = timedelta(seconds=overlap_seconds)
+
+    async def refresh(self, full: bool = False) -> AnalyticsRefreshRead:
+        """
+        Re-aggregate the days that have orders changed since the last refresh.
+
+        A status change bumps orders.updated_at, so paid and cancelled orders
+        reach the rollups of their creation day. Deleted orders are only
+        noticed by a full refresh.
+
+        :param full: rebuild every day from scratch.
+        """
+        try:
+            if not await self.analytics_repo.try_lock_refresh(self.session):
+                await self.uow.rollback()
+                return AnalyticsRefreshRead(refreshed=False)
+
+            started_at = await self.analytics_repo.get_db_now(self.session)
+            state = None if full else await self.analytics_repo.get_refresh_state(self.session)
+            days = await self.analytics_repo.get_touched_days(
+                self.session, since=state.watermark if state else None, tz=self.tz
+            )
+            if full:
+                await self.analytics_repo.clear(self.session)
+            await self.analytics_repo.rebuild_days(self.session, days, tz=self.tz)
+            # Заказы, закоммиченные чуть позже начала этой транзакции, попадут в следующий пересчёт
+            await self.analytics_repo.save_refresh_state(
+                self.session, watermark=started_at - self.overlap, refreshed_at=started_at
+            )
+        except Exception:
+            await self.uow.rollback()
+            raise
+
+        await self.uow.commit()
+        logging.info("Analytics rollups refreshed for %s day(s)", len(days))
+        return AnalyticsRefreshRead(refreshed=True, days=days, refreshed_at=started_at)
+
+    async def get_sales(self, date_from: date, date_to: date) -> SalesReport:
+        rows = await self.analytics_repo.get_daily_sales(self.session, date_from=date_from, date_to=date_to)
+        state = await self.analytics_repo.get_refresh_state(self.session)
+        return SalesReport(
+            date_from=date_from,
+            date_to=date_to,
+            totals=_totals(rows),
+            days=[DailySalesRead.model_validate(row) for row in rows],
+            refreshed_at=state.refreshed_at if state else None,
+        )
+
+    async def get_top_products(
+            self,
+            date_from: date,
+            date_to: date,
+            limit: int = 10,
+            order_by: Literal["revenue", "quantity"] = "revenue",
+    ) -> List[TopProductRead]:
+        rows = await self.analytics_repo.get_top_products(
+            self.session, date_from=date_from, date_to=date_to, limit=limit, order_by=order_by
+        )
+        return [TopProductRead.model_validate(row) for row in rows]
+
+
+def _totals(rows: Sequence[DailySales]) -> SalesTotals:
+    orders_count = sum(row.orders_count for row in rows)
+    revenue = sum(row.revenue for row in rows)
+    delivery_orders = sum(row.delivery_orders for row in rows)
+    order_items_count = sum(row.order_items_count for row in rows)
+    return SalesTotals(
+        orders_count=orders_count,
+        revenue=revenue,
+        average_check=revenue // orders_count if orders_count else 0,
+        delivery_orders=delivery_orders,
+        delivery_revenue=sum(row.delivery_revenue for row in rows),
+        pickup_orders=sum(row.pickup_orders for row in rows),
+        pickup_revenue=sum(row.pickup_revenue for row in rows),
+        delivery_share=delivery_orders / orders_count if orders_count else 0.0,
+        topping_attach_rate=(
+            sum(row.items_with_toppings for row in rows) / order_items_count if order_items_count else 0.0
+        ),
+    )
+
+
+class AnalyticsRefresher:
+    """
+    Periodic refresh of the rollups in the background of every worker.
+
+    All workers run the loop; the advisory lock in AnalyticsRepository lets
+    one of them do the work and the others skip that round.
+    """
+
+    def __init__(
+            self,
+            session_maker: async_sessionmaker = async_session_maker,
+            interval_seconds: int = settings.analytics.REFRESH_INTERVAL_SECONDS,
+            tz: str = settings.analytics.TIMEZONE,
+    ) -> None:
+        self.session_maker = session_maker
+        self.interval_seconds = interval_seconds
+        self.tz = tz
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None and self.interval_seconds > 0:
+            self._task = asyncio.create_task(self._refresh_forever())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def refresh_once(self, full: bool = False) -> AnalyticsRefreshRead:
+        async with UnitOfWork(self.session_maker) as uow:
+            return await AnalyticsService(
+                uow=uow, analytics_repo=AnalyticsRepository(), tz=self.tz
+            ).refresh(full=full)
+
+    async def _refresh_forever(self) -> None:
+        while True:
+            try:
+                await self.refresh_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logging.exception("Analytics refresh failed, retrying in %ss", self.interval_seconds)
+            await asyncio.sleep(self.interval_seconds)
+
+
+# Один фоновый пересчёт на процесс
+analytics_refresher = AnalyticsRefresher()
@@ -0,0 +1,141 @@
+from typing import Optional
+
+from sqlalchemy.exc import IntegrityError
+
+from src.db.errors import foreign_key_violation, unique_violation
+from src.db.unit_of_work import UnitOfWork
+from src.models.models import Category
+from src.repositories.categories import CategoriesRepository
+from src.schemas.category import CategoryCreate, CategoryRead, CategoryUpdate
+from src.services.menu import MenuSnapshotService
+
+# Позиции заказов держат свои продукты, а с ними и категорию
+ORDERED_PRODUCT_FOREIGN_KEY = "order_items_product_id_fkey"
+PARENT_FOREIGN_KEY = "categories_parent_id_fkey"
+# Уникальный индекс по (coalesce(parent_id, 0), name) из миграции 0005
+CATEGORY_UNIQUE_INDEX = "uq_categories_parent_id_name"
+
+
+class CategoryAlreadyExistsError(ValueError):
+    """
+    A category with this name already exists under the same parent.
+    """
+
+
+class ParentCategoryNotFoundError(LookupError):
+    """
+    The parent category does not exist.
+    """
+
+
+class CategoryCycleError(ValueError):
+    """
+    The new parent is the category itself or one of its descendants.
+    """
+
+
+class CategoryInUseError(ValueError):
+    """
+    The category holds products that appear in orders.
+    """
+
+
+class CategoriesService:
+    """
+    Service layer for managing menu categories.
+
+    Every successful write rebuilds the menu snapshot, so readers of
+    GET /categories and GET /products see the change right away.
+    """
+
+    def __init__(
+            self, uow: UnitOfWork,
+            categories_repo: CategoriesRepository,
+            menu: MenuSnapshotService
+    ) -> None:
+        self.uow = uow
+        self.session = uow.session
+        self.categories_repo = categories_repo
+        self.menu = menu
+
+    async def create_category(self, category: CategoryCreate) -> CategoryRead:
+        """
+        :raises CategoryAlreadyExistsError: the parent already has a category with this name.
+        :raises ParentCategoryNotFoundError: parent_id points to no category.
+        """
+        try:
+            created = await self.categories_repo.create_category(
+                session=self.session, category_data=category.model_dump()
+            )
+            await self.uow.commit()
+        except IntegrityError as e:
+            await self.uow.rollback()
+            error = _write_error(e)
+            if error is None:
+                raise
+            raise error from e
+        await self.menu.rebuild()
+        return created.to_read_model(max_depth=0)
+
+    async def update_category(self, category_id: int, category: CategoryUpdate) -> Optional[CategoryRead]:
+        """
+        :raises CategoryAlreadyExistsError: the parent already has a category with this name.
+        :raises ParentCategoryNotFoundError: parent_id points to no category.
+        :raises CategoryCycleError: the category would become its own ancestor.
+        """
+        category_data = category.model_dump(exclude_unset=True)
+        if not category_data:
+            existing = await self.session.get(Category, category_id)
+            return existing.to_read_model(max_depth=0) if existing else None
+
+        parent_id = category_data.get("parent_id")
+        if parent_id is not None:
+            await self.categories_repo.lock_tree(session=self.session)
+            if await self.categories_repo.is_in_subtree(
+                    session=self.session, root_id=category_id, category_id=parent_id
+            ):
+                raise CategoryCycleError("Category cannot be moved under itself or its subcategory")
+
+        try:
+            updated = await self.categories_repo.update_category(
+                session=self.session, category_id=category_id, category_data=category_data
+            )
+            if updated is None:
+                return None
+            await self.uow.commit()
+        except IntegrityError as e:
+            await self.uow.rollback()
+            error = _write_error(e)
+            if error is None:
+                raise
+            raise error from e
+        await self.menu.rebuild()
+        return updated.to_read_model(max_depth=0)
+
+    async def delete_category(self, category_id: int) -> bool:
+        """
+        Delete the category with its products.
+
+        :raises CategoryInUseError: some of its products were ordered; delete
+            those products instead, they stay in the order history.
+        """
+        try:
+            deleted = await self.categories_repo.delete_category(session=self.session, category_id=category_id)
+        except IntegrityError as e:
+            await self.uow.rollback()
+            if foreign_key_violation(e) != ORDERED_PRODUCT_FOREIGN_KEY:
+                raise
+            raise CategoryInUseError(f"Category {category_id} has products that were ordered") from e
+        if deleted:
+            await self.uow.commit()
+            await self.menu.rebuild()
+        return deleted
+
+
+def _write_error(error: IntegrityError) -> Optional[Exception]:
+    # Нарушения из-за клиентского ввода -- в доменные ошибки, остальные пробрасываются как есть
+    if unique_violation(error) == CATEGORY_UNIQUE_INDEX:
+        return CategoryAlreadyExistsError("Category with this name already exists under this parent")
+    if foreign_key_violation(error) == PARENT_FOREIGN_KEY:
+        return ParentCategoryNotFoundError("Parent category not found")
+    return None
@@ -0,0 +1,200 @@
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from src.db.unit_of_work import UnitOfWork
+from src.repositories.delivery_slots import DeliverySlotsRepository
+from src.schemas.delivery_slot import DeliverySlotCapacityRead, DeliverySlotCapacityUpdate, DeliverySlotRead
+from src.utils.config import settings
+from src.utils.enums import DeliveryType
+
+DEFAULT_KITCHEN_CAPACITY = {
+    DeliveryType.DELIVERY: settings.delivery.KITCHEN_DELIVERY_CAPACITY,
+    DeliveryType.PICKUP: settings.delivery.KITCHEN_PICKUP_CAPACITY,
+}
+DEFAULT_COURIER_CAPACITY = {
+    DeliveryType.DELIVERY: settings.delivery.COURIER_CAPACITY,
+    DeliveryType.PICKUP: 0,
+}
+
+
+class InvalidDeliveryTimeError(ValueError):
+    """
+    The delivery time has no time zone or is outside the bookable window.
+    """
+
+
+class DeliverySlotFullError(ValueError):
+    """
+    The delivery slot has no free kitchen or courier capacity.
+    """
+
+
+def _couriers(delivery_type: DeliveryType) -> int:
+    # Заказ на доставку занимает одно место курьера, самовывоз -- ни одного
+    return 1 if delivery_type == DeliveryType.DELIVERY else 0
+
+
+class DeliverySlotsService:
+    """
+    Delivery and pickup slot scheduler.
+
+    Time is cut into SLOT_MINUTES slots, and every slot has kitchen and
+    courier capacity per DeliveryType, kept as counters in delivery_slots.
+    Every order takes a place in a slot inside the order transaction: the
+    slot of its delivery time, or the first bookable slot for an order
+    "as soon as possible". A full slot rejects the order and a rolled back
+    order frees the place. Available slots are computed from the counters
+    alone, without looking at orders.
+    """
+
+    def __init__(
+            self, uow: UnitOfWork,
+            slots_repo: DeliverySlotsRepository,
+            slot_minutes: int = settings.delivery.SLOT_MINUTES,
+            lead_minutes: int = settings.delivery.LEAD_MINUTES,
+            horizon_hours: int = settings.delivery.HORIZON_HOURS,
+            kitchen_capacity: Dict[DeliveryType, int] = DEFAULT_KITCHEN_CAPACITY,
+            courier_capacity: Dict[DeliveryType, int] = DEFAULT_COURIER_CAPACITY,
+    ) -> None:
+        self.uow = uow
+        self.session = uow.session
+        self.slots_repo = slots_repo
+        self.slot = timedelta(minutes=slot_minutes)
+        self.lead = timedelta(minutes=lead_minutes)
+        self.horizon = timedelta(hours=horizon_hours)
+        self.kitchen_capacity = kitchen_capacity
+        self.courier_capacity = courier_capacity
+
+    def _slot_start(self, moment: datetime) -> datetime:
+        step = self.slot.total_seconds()
+        return datetime.fromtimestamp(moment.timestamp() // step * step, tz=timezone.utc)
+
+    def _bookable_range(self, now: datetime) -> Tuple[datetime, datetime]:
+        # Первый слот, до начала которого осталось не меньше lead, и конец горизонта
+        first = self._slot_start(now + self.lead)
+        if first < now + self.lead:
+            first += self.slot
+        return first, now + self.horizon
+
+    def get_slot_start(self, delivery_time: datetime, now: Optional[datetime] = None) -> datetime:
+        """
+        Return the start of the slot the delivery time falls into.
+
+        :raises InvalidDeliveryTimeError: the time has no time zone, the slot
+            starts sooner than LEAD_MINUTES or later than HORIZON_HOURS from now.
+        """
+        if delivery_time.tzinfo is None:
+            raise InvalidDeliveryTimeError("delivery_time must include a time zone offset")
+        first, last = self._bookable_range(now or datetime.now(timezone.utc))
+        slot_start = self._slot_start(delivery_time)
+        if not first <= slot_start < last:
+            raise InvalidDeliveryTimeError(
+                f"delivery_time must be between {first.isoformat()} and {last.isoformat()}"
+            )
+        return slot_start
+
+    def get_asap_slot_start(self, now: Optional[datetime] = None) -> datetime:
+        """
+        Return the start of the first bookable slot, taken by an order without a delivery time.
+        """
+        first, _ = self._bookable_range(now or datetime.now(timezone.utc))
+        return first
+
+    async def reserve(self, delivery_type: DeliveryType, slot_start: datetime) -> None:
+        """
+        Take a place in the slot; the caller's transaction commits it.
+
+        :raises DeliverySlotFullError: the slot is full.
+        """
+        await self.slots_repo.ensure_slot(
+            session=self.session,
+            delivery_type=delivery_type,
+            slot_start=slot_start,
+            kitchen_capacity=self.kitchen_capacity[delivery_type],
+            courier_capacity=self.courier_capacity[delivery_type],
+        )
+        slot = await self.slots_repo.reserve(
+            session=self.session,
+            delivery_type=delivery_type,
+            slot_start=slot_start,
+            couriers=_couriers(delivery_type),
+        )
+        if slot is None:
+            raise DeliverySlotFullError(f"Delivery slot {slot_start.isoformat()} is full, choose another time")
+
+    async def release(self, delivery_type: DeliveryType, slot_start: datetime) -> None:
+        """
+        Give back the place of a cancelled order; the caller's transaction commits it.
+        """
+        await self.slots_repo.release(
+            session=self.session,
+            delivery_type=delivery_type,
+            slot_start=slot_start,
+            couriers=_couriers(delivery_type),
+        )
+
+    async def get_available_slots(self, delivery_type: DeliveryType, hours: int) -> List[DeliverySlotRead]:
+        """
+        Return the bookable slots of the next `hours` hours that have free places.
+
+        One range read of the counters; slots without a row have not been
+        ordered yet and have the default capacity.
+        """
+        now = datetime.now(timezone.utc)
+        first, last = self._bookable_range(now)
+        last = min(last, now + timedelta(hours=hours))
+        slots = {
+            slot.slot_start: slot
+            for slot in await self.slots_repo.get_slots(
+                session=self.session, delivery_type=delivery_type, slot_from=first, slot_to=last
+            )
+        }
+
+        available_slots = []
+        slot_start = first
+        while slot_start < last:
+            slot = slots.get(slot_start)
+            if slot is None:
+                kitchen_free = self.kitchen_capacity[delivery_type]
+                courier_free = self.courier_capacity[delivery_type]
+            else:
+                kitchen_free = slot.kitchen_capacity - slot.kitchen_reserved
+                courier_free = slot.courier_capacity - slot.courier_reserved
+            available = min(kitchen_free, courier_free) if _couriers(delivery_type) else kitchen_free
+            if available > 0:
+                available_slots.append(
+                    DeliverySlotRead(
+                        delivery_type=delivery_type,
+                        slot_start=slot_start,
+                        slot_end=slot_start + self.slot,
+                        available=available,
+                    )
+                )
+            slot_start += self.slot
+        return available_slots
+
+    async def set_capacity(
+            self, delivery_type: DeliveryType, slot_start: datetime, capacity: DeliverySlotCapacityUpdate
+    ) -> DeliverySlotCapacityRead:
+        """
+        Set the capacity of one slot, e.g. more couriers on Friday evening.
+
+        Places already taken stay taken even if the new capacity is lower.
+
+        :raises InvalidDeliveryTimeError: slot_start has no time zone or is
+            not the start of a slot.
+        """
+        if slot_start.tzinfo is None:
+            raise InvalidDeliveryTimeError("slot_start must include a time zone offset")
+        if self._slot_start(slot_start) != slot_start:
+            raise InvalidDeliveryTimeError(f"slot_start must be a multiple of {self.slot} from midnight UTC")
+        slot = await self.slots_repo.set_capacity(
+            session=self.session,
+            delivery_type=delivery_type,
+            slot_start=slot_start,
+            kitchen_capacity=capacity.kitchen_capacity,
+            courier_capacity=capacity.courier_capacity if _couriers(delivery_type) else 0,
+        )
+        result = DeliverySlotCapacityRead.model_validate(slot)
+        await self.uow.commit()
+        return result
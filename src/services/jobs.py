@@ -0,0 +1,191 @@
+import asyncio
+import logging
+import random
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Awaitable, Callable, Dict, List, Set
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from src.db.db import async_session_maker
+from src.db.unit_of_work import UnitOfWork
+from src.models.models import Job
+from src.repositories.jobs import JobsRepository
+from src.repositories.orders import OrdersRepository
+from src.repositories.users import UsersRepository
+from src.services.orders import ORDER_DETAIL_INCLUDE
+from src.services.providers import receipt_provider, sms_provider
+from src.utils.config import settings
+from src.utils.enums import JobType
+
+JobHandler = Callable[[dict], Awaitable[None]]
+
+
+@dataclass
+class JobSpec:
+    handler: JobHandler
+    # Сколько задач этого типа процесс выполняет одновременно
+    concurrency: int
+
+
+class JobRunner:
+    """
+    In-process executor of background jobs from the jobs table.
+
+    Every process that starts the runner (API workers, `python main.py
+    jobs-worker`) runs one loop per job type. A loop claims as many due jobs
+    as it has free slots and runs them concurrently; SKIP LOCKED spreads the
+    jobs across processes, and the concurrency limit applies per process.
+
+    A failed attempt is retried after an exponential backoff with jitter,
+    up to max_attempts; then the job is marked FAILED. A job is delivered
+    at least once: if its process dies, the job is taken again after the
+    lease, so handlers must be safe to repeat.
+    """
+
+    def __init__(
+            self,
+            session_maker: async_sessionmaker = async_session_maker,
+            enabled: bool = settings.jobs.ENABLED,
+            poll_interval_seconds: float = settings.jobs.POLL_INTERVAL_SECONDS,
+            lease_seconds: int = settings.jobs.LEASE_SECONDS,
+            max_attempts: int = settings.jobs.MAX_ATTEMPTS,
+            backoff_base_seconds: float = settings.jobs.BACKOFF_BASE_SECONDS,
+            backoff_max_seconds: float = settings.jobs.BACKOFF_MAX_SECONDS,
+    ) -> None:
+        self.session_maker = session_maker
+        self.enabled = enabled
+        self.poll_interval_seconds = poll_interval_seconds
+        self.lease = timedelta(seconds=lease_seconds)
+        self.max_attempts = max_attempts
+        self.backoff_base_seconds = backoff_base_seconds
+        self.backoff_max_seconds = backoff_max_seconds
+        self.jobs_repo = JobsRepository()
+        self.specs: Dict[JobType, JobSpec] = {}
+        self._loops: List[asyncio.Task] = []
+        self._running: Set[asyncio.Task] = set()
+
+    def register(self, job_type: JobType, handler: JobHandler, concurrency: int = 1) -> None:
+        self.specs[job_type] = JobSpec(handler=handler, concurrency=concurrency)
+
+    def start(self) -> None:
+        if self._loops or not self.enabled:
+            return
+        self._loops = [asyncio.create_task(self._run_forever(job_type)) for job_type in self.specs]
+
+    async def stop(self) -> None:
+        # Прерванные задачи остаются RUNNING и по истечении аренды достаются другому процессу
+        tasks = self._loops + list(self._running)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._loops = []
+        self._running.clear()
+
+    def backoff(self, attempt: int) -> timedelta:
+        delay = min(self.backoff_base_seconds * 2 ** (attempt - 1), self.backoff_max_seconds)
+        # Разброс, чтобы задачи, упавшие вместе (провайдер недоступен), не повторялись разом
+        return timedelta(seconds=delay * random.uniform(0.5, 1.0))
+
+    async def _claim(self, job_type: JobType, limit: int) -> List[Job]:
+        async with UnitOfWork(self.session_maker) as uow:
+            jobs = await self.jobs_repo.claim(session=uow.session, job_type=job_type, limit=limit, lease=self.lease)
+            await uow.commit()
+        return jobs
+
+    async def _run_forever(self, job_type: JobType) -> None:
+        spec = self.specs[job_type]
+        running: Set[asyncio.Task] = set()
+        while True:
+            free = spec.concurrency - len(running)
+            if free > 0:
+                try:
+                    jobs = await self._claim(job_type, free)
+                except asyncio.CancelledError:
+                    raise
+                except Exception:
+                    logging.exception("Claiming %s jobs failed, retrying in %ss", job_type.value, self.poll_interval_seconds)
+                    jobs = []
+                for job in jobs:
+                    task = asyncio.create_task(self._execute(spec, job))
+                    for tasks in (running, self._running):
+                        tasks.add(task)
+                        task.add_done_callback(tasks.discard)
+
+            if len(running) >= spec.concurrency:
+                # Все места заняты: новые задачи берём, как только освободится одно
+                await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            elif running:
+                await asyncio.wait(running, timeout=self.poll_interval_seconds, return_when=asyncio.FIRST_COMPLETED)
+            else:
+                await asyncio.sleep(self.poll_interval_seconds)
+
+    async def _execute(self, spec: JobSpec, job: Job) -> None:
+        try:
+            try:
+                await asyncio.wait_for(spec.handler(job.payload), timeout=self.lease.total_seconds())
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                await self._record_failure(job, f"{type(e).__name__}: {e}")
+            else:
+                async with UnitOfWork(self.session_maker) as uow:
+                    await self.jobs_repo.complete(session=uow.session, job_id=job.id, attempt=job.attempts)
+                    await uow.commit()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # Результат не записан: задача будет выполнена ещё раз после аренды
+            logging.exception("Could not record the result of %s job %s", job.job_type.value, job.id)
+
+    async def _record_failure(self, job: Job, error: str) -> None:
+        async with UnitOfWork(self.session_maker) as uow:
+            if job.attempts < self.max_attempts:
+                delay = self.backoff(job.attempts)
+                logging.warning(
+                    "%s job %s failed (attempt %s of %s), retrying in %.0fs: %s",
+                    job.job_type.value, job.id, job.attempts, self.max_attempts, delay.total_seconds(), error,
+                )
+                await self.jobs_repo.retry(
+                    session=uow.session, job_id=job.id, attempt=job.attempts, delay=delay, error=error
+                )
+            else:
+                logging.error("%s job %s failed after %s attempts: %s", job.job_type.value, job.id, job.attempts, error)
+                await self.jobs_repo.fail(session=uow.session, job_id=job.id, attempt=job.attempts, error=error)
+            await uow.commit()
+
+
+async def send_sms(payload: dict) -> None:
+    await sms_provider.send_sms(phone=payload["phone"], text=payload["text"])
+
+
+async def send_order_receipt(payload: dict) -> None:
+    # Читаем с primary: задачу могут взять раньше, чем заказ дойдёт до реплики
+    async with UnitOfWork(read_only=True) as uow:
+        order = await OrdersRepository().get_user_order(
+            session=uow.session, user_id=payload["user_id"], order_id=payload["order_id"]
+        )
+        customer = await UsersRepository().get_user_with_addresses(session=uow.session, user_id=payload["user_id"])
+    if order is None or customer is None:
+        # Заказ или пользователь удалены -- чек отправлять некому
+        logging.warning("Order %s of user %s not found, receipt skipped", payload["order_id"], payload["user_id"])
+        return
+    await receipt_provider.send_receipt(
+        order=order.to_read_model(include=ORDER_DETAIL_INCLUDE), customer=customer.to_summary_model()
+    )
+
+
+async def requeue_failed_jobs(session_maker: async_sessionmaker = async_session_maker) -> int:
+    """
+    Queue the FAILED jobs again, used by `python main.py jobs-requeue-failed`.
+    """
+    async with UnitOfWork(session_maker) as uow:
+        requeued = await JobsRepository().requeue_failed(session=uow.session)
+        await uow.commit()
+    return requeued
+
+
+# Один исполнитель фоновых задач на процесс
+job_runner = JobRunner()
+job_runner.register(JobType.SEND_SMS, send_sms, concurrency=settings.jobs.SMS_CONCURRENCY)
+job_runner.register(JobType.SEND_ORDER_RECEIPT, send_order_receipt, concurrency=settings.jobs.RECEIPT_CONCURRENCY)
@@ -0,0 +1,156 @@
+import asyncio
+import hashlib
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.db.db import async_session_maker
+from src.repositories.categories import CategoriesRepository
+from src.schemas.category import CategoryRead
+from src.schemas.product import ProductListItem, ProductRead
+from src.utils.config import settings
+
+
+@dataclass(frozen=True)
+class EncodedDocument:
+    """
+    JSON document encoded once and served as is, with its ETag.
+    """
+    body: bytes
+    etag: str
+
+    @classmethod
+    def encode(cls, body: bytes) -> "EncodedDocument":
+        digest = hashlib.blake2b(body, digest_size=16).hexdigest()
+        return cls(body=body, etag=f'"{digest}"')
+
+
+@dataclass(frozen=True)
+class MenuSnapshot:
+    """
+    Immutable, pre-encoded view of the whole menu.
+
+    The ETag of every document depends only on its content, so all workers
+    that built the same menu hand out the same ETag.
+    """
+    version: int
+    built_at: float
+    categories: EncodedDocument
+    products: EncodedDocument
+    category_by_id: Dict[int, EncodedDocument] = field(default_factory=dict)
+    product_by_id: Dict[int, EncodedDocument] = field(default_factory=dict)
+
+
+class MenuSnapshotService:
+    """
+    Service that keeps the menu in memory as pre-encoded JSON.
+
+    The menu (category tree, products and their toppings) is read on every
+    page view but changes a few times a day. The snapshot is built once and
+    replaced as a whole after each write, so readers either see the old
+    snapshot or the new one and never touch the database.
+    """
+
+    def __init__(
+            self,
+            session_maker: async_sessionmaker = async_session_maker,
+            categories_repo: Optional[CategoriesRepository] = None,
+            ttl_seconds: int = settings.menu.SNAPSHOT_TTL_SECONDS,
+    ) -> None:
+        self.session_maker = session_maker
+        self.categories_repo = categories_repo or CategoriesRepository()
+        self.ttl_seconds = ttl_seconds
+
+        self._snapshot: Optional[MenuSnapshot] = None
+        self._version = 0
+        self._lock = asyncio.Lock()
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    async def get(self) -> MenuSnapshot:
+        """
+        Return the current snapshot, building it on the first call.
+
+        A snapshot older than ttl_seconds is still returned immediately,
+        while a fresh one is built in the background.
+        """
+        snapshot = self._snapshot
+        if snapshot is None:
+            return await self.rebuild()
+
+        if time.monotonic() - snapshot.built_at > self.ttl_seconds and self._refresh_task is None:
+            self._refresh_task = asyncio.create_task(self._background_refresh())
+        return snapshot
+
+    async def rebuild(self) -> MenuSnapshot:
+        """
+        Build a new snapshot from the database and swap it in atomically.
+        """
+        async with self._lock:
+            async with self.session_maker() as session:
+                snapshot = await self._build(session)
+            self._snapshot = snapshot
+            logging.info("Menu snapshot v%s built", snapshot.version)
+            return snapshot
+
+    async def _background_refresh(self) -> None:
+        try:
+            await self.rebuild()
+        except Exception:
+            logging.exception("Menu snapshot refresh failed, serving the previous one")
+        finally:
+            self._refresh_task = None
+
+    async def _build(self, session: AsyncSession) -> MenuSnapshot:
+        # Всё дерево с продуктами загружается фиксированным числом запросов
+        roots = await self.categories_repo.get_tree(session, with_products=True)
+
+        nodes: Dict[int, CategoryRead] = {}
+        product_reads: List[ProductRead] = []
+        stack = list(roots)
+        while stack:
+            node = stack.pop()
+            nodes[node.id] = node
+            product_reads.extend(node.products)
+            stack.extend(node.subcategories)
+        product_reads.sort(key=lambda product: product.id)
+
+        self._version += 1
+        return MenuSnapshot(
+            version=self._version,
+            built_at=time.monotonic(),
+            categories=EncodedDocument.encode(_categories_adapter.dump_json(roots)),
+            products=EncodedDocument.encode(
+                _products_adapter.dump_json([_list_item(product) for product in product_reads])
+            ),
+            category_by_id={
+                category_id: EncodedDocument.encode(node.model_dump_json().encode())
+                for category_id, node in nodes.items()
+            },
+            product_by_id={
+                product.id: EncodedDocument.encode(product.model_dump_json().encode())
+                for product in product_reads
+            },
+        )
+
+
+def _list_item(product: ProductRead) -> ProductListItem:
+    # Каталог отдаётся плоским списком, полный продукт -- в product_by_id
+    return ProductListItem(
+        id=product.id,
+        name=product.name,
+        subcategory_id=product.subcategory_id,
+        price=product.price,
+        description=product.description,
+        topping_ids=[link.topping_id for link in product.available_toppings],
+    )
+
+
+_categories_adapter = TypeAdapter(List[CategoryRead])
+_products_adapter = TypeAdapter(List[ProductListItem])
+
+# Один снапшот на процесс
+menu_snapshot = MenuSnapshotService()
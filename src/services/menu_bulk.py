@@ -0,0 +1,201 @@
+import json
+import logging
+from collections import Counter
+from pathlib import Path
+from typing import AsyncIterator, Dict, Optional, Set, TextIO
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from src.db.db import async_session_maker
+from src.db.unit_of_work import UnitOfWork
+from src.repositories.menu import MenuRepository
+from src.schemas.menu import MenuDocument, MenuImportReport, MenuProduct, MenuTopping
+from src.services.menu import MenuSnapshotService
+from src.utils.streaming import csv_lines
+from src.utils.menu_document import (
+    CSV_COLUMNS,
+    TOPPINGS_SEPARATOR,
+    MenuDocumentError,
+    join_category_path,
+    parse_menu_csv,
+    parse_menu_json,
+)
+
+# Сколько продуктов экспорт читает и отдаёт клиенту за раз
+EXPORT_BATCH_SIZE = 500
+
+
+class MenuBulkService:
+    """
+    Bulk import of a whole menu document.
+
+    The document is applied in one transaction: categories level by level,
+    then toppings, products and product toppings, each as a batched upsert.
+    Existing rows that are not in the document are left alone, except for the
+    toppings of imported products, which are replaced by the document's list.
+    """
+
+    def __init__(
+            self, uow: UnitOfWork,
+            menu_repo: MenuRepository,
+            menu: Optional[MenuSnapshotService] = None
+    ) -> None:
+        self.uow = uow
+        self.session = uow.session
+        self.menu_repo = menu_repo
+        self.menu = menu
+
+    async def import_document(self, document: MenuDocument, dry_run: bool = False) -> MenuImportReport:
+        """
+        Upsert the document and report what was created, updated and removed.
+
+        :param dry_run: roll the transaction back instead of committing it.
+        :raises MenuDocumentError: the document has duplicates or unknown toppings.
+        """
+        _check_duplicates(document)
+        report = MenuImportReport(dry_run=dry_run)
+        try:
+            category_paths = {tuple(path) for path in document.categories if path}
+            category_paths.update(tuple(product.category) for product in document.products)
+            category_ids, report.categories = await self.menu_repo.upsert_categories(
+                session=self.session, paths=category_paths
+            )
+
+            topping_ids, report.toppings = await self.menu_repo.upsert_toppings(
+                session=self.session, toppings=[topping.model_dump() for topping in document.toppings]
+            )
+            # Продукты могут ссылаться на топпинги, которые уже есть в базе, но не в документе
+            referenced = {name for product in document.products for name in product.toppings}
+            topping_ids.update(await self.menu_repo.get_topping_ids(
+                session=self.session, names=referenced - topping_ids.keys()
+            ))
+            unknown = referenced - topping_ids.keys()
+            if unknown:
+                raise MenuDocumentError(f"Unknown toppings: {', '.join(sorted(unknown))}")
+
+            product_ids, report.products = await self.menu_repo.upsert_products(
+                session=self.session,
+                products=[
+                    {
+                        "subcategory_id": category_ids[tuple(product.category)],
+                        "name": product.name,
+                        "price": product.price,
+                        "description": product.description,
+                    }
+                    for product in document.products
+                ],
+            )
+
+            toppings_by_product: Dict[int, Set[int]] = {
+                product_ids[(category_ids[tuple(product.category)], product.name)]:
+                    {topping_ids[name] for name in product.toppings}
+                for product in document.products
+            }
+            report.product_toppings = await self.menu_repo.replace_product_toppings(
+                session=self.session, toppings_by_product=toppings_by_product
+            )
+        except Exception:
+            await self.uow.rollback()
+            raise
+
+        if dry_run:
+            await self.uow.rollback()
+            return report
+
+        await self.uow.commit()
+        logging.info("Menu imported: %s", report.model_dump_json())
+        # Без снапшота (импорт из CLI) воркеры API подхватят меню по MENU_SNAPSHOT_TTL_SECONDS
+        if self.menu is not None:
+            await self.menu.rebuild()
+        return report
+
+
+async def export_menu(
+        fmt: str,
+        session_maker: async_sessionmaker = async_session_maker,
+        menu_repo: Optional[MenuRepository] = None,
+) -> AsyncIterator[str]:
+    """
+    Stream the whole menu as a document accepted by MenuBulkService.
+
+    Uses its own session, because the response is still being written after
+    the request dependencies have been closed. Products are read in batches
+    of EXPORT_BATCH_SIZE, so memory use does not depend on the catalog size.
+
+    :param fmt: "json" or "csv".
+    """
+    menu_repo = menu_repo or MenuRepository()
+    async with session_maker() as session:
+        category_paths = await menu_repo.get_category_paths(session)
+        toppings = await menu_repo.get_toppings(session)
+        topping_names = {topping.id: topping.name for topping in toppings}
+        # Выгружаются все пути, чтобы пустые категории тоже попали в документ
+        paths = sorted(category_paths.values())
+
+        if fmt == "csv":
+            yield csv_lines(
+                [CSV_COLUMNS]
+                + [["category", join_category_path(path), "", "", "", ""] for path in paths]
+                + [["topping", "", topping.name, topping.price, "", ""] for topping in toppings]
+            )
+        else:
+            yield '{"categories":' + json.dumps([list(path) for path in paths], ensure_ascii=False)
+            yield ',"toppings":[' + ",".join(
+                MenuTopping(name=topping.name, price=topping.price).model_dump_json() for topping in toppings
+            ) + "]"
+            yield ',"products":['
+
+        first = True
+        async for products in menu_repo.stream_products(session, batch_size=EXPORT_BATCH_SIZE):
+            items = [
+                MenuProduct(
+                    category=list(category_paths[product.subcategory_id]),
+                    name=product.name,
+                    price=product.price,
+                    description=product.description,
+                    toppings=sorted(topping_names[link.topping_id] for link in product.available_toppings),
+                )
+                for product in products
+            ]
+            if fmt == "csv":
+                yield csv_lines(
+                    ["product", join_category_path(item.category), item.name, item.price,
+                     item.description or "", TOPPINGS_SEPARATOR.join(item.toppings)]
+                    for item in items
+                )
+            else:
+                chunk = ",".join(item.model_dump_json() for item in items)
+                yield chunk if first else "," + chunk
+            first = False
+
+        if fmt != "csv":
+            yield "]}"
+
+
+async def import_menu_file(path: Path, dry_run: bool = False) -> MenuImportReport:
+    """
+    Import a .json or .csv menu file, used by `python main.py menu-import`.
+    """
+    body = path.read_bytes()
+    document = parse_menu_csv(body.decode("utf-8-sig")) if path.suffix == ".csv" else parse_menu_json(body)
+    async with UnitOfWork() as uow:
+        return await MenuBulkService(uow=uow, menu_repo=MenuRepository()).import_document(
+            document, dry_run=dry_run
+        )
+
+
+async def export_menu_file(output: TextIO, fmt: str) -> None:
+    """
+    Write the menu document to a file, used by `python main.py menu-export`.
+    """
+    async for chunk in export_menu(fmt):
+        output.write(chunk)
+
+
+def _check_duplicates(document: MenuDocument) -> None:
+    toppings = Counter(topping.name for topping in document.toppings)
+    products = Counter((tuple(product.category), product.name) for product in document.products)
+    duplicates = [name for name, count in toppings.items() if count > 1]
+    duplicates += [join_category_path(path + (name,)) for (path, name), count in products.items() if count > 1]
+    if duplicates:
+        raise MenuDocumentError(f"Duplicate entries in the menu document: {', '.join(sorted(duplicates))}")
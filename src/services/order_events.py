@@ -0,0 +1,133 @@
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import FrozenSet, Optional, Set
+
+import asyncpg
+from sqlalchemy.engine import URL
+
+from src.db.db import engine
+from src.schemas.order import OrderStatusEvent
+from src.utils.enums import OrderStatus
+
+# Канал PostgreSQL NOTIFY для смены статусов заказов
+ORDER_STATUS_CHANNEL = "order_status"
+
+RECONNECT_DELAY_SECONDS = 1.0
+MAX_RECONNECT_DELAY_SECONDS = 30.0
+
+
+@dataclass(eq=False)
+class OrderEventsSubscription:
+    """
+    Queue of status events for one screen, filtered by status and/or order id.
+
+    A subscriber that does not keep up loses the oldest events rather than
+    slowing down the others.
+    """
+    statuses: FrozenSet[OrderStatus] = frozenset()
+    order_id: Optional[int] = None
+    queue: asyncio.Queue = field(default_factory=lambda: asyncio.Queue(maxsize=100))
+
+    def matches(self, event: OrderStatusEvent) -> bool:
+        if self.order_id is not None and event.order_id != self.order_id:
+            return False
+        # Экран получает и заказы, которые уходят из его статусов, чтобы убрать их из очереди
+        if self.statuses and event.status not in self.statuses and event.previous_status not in self.statuses:
+            return False
+        return True
+
+    def put(self, event: OrderStatusEvent) -> None:
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(event)
+
+
+class OrderEventsHub:
+    """
+    Fan-out of order status changes to WebSocket/SSE subscribers.
+
+    Each worker keeps a single LISTEN connection to PostgreSQL, separate from
+    the engine pool, and dispatches every notification to the matching
+    subscriptions in memory. LISTEN needs a session-level connection, so behind
+    pgbouncer in transaction mode DATABASE_HOST must point to PostgreSQL directly.
+    """
+
+    def __init__(self, channel: str = ORDER_STATUS_CHANNEL, url: Optional[URL] = None) -> None:
+        self.channel = channel
+        # По умолчанию слушаем базу приложения
+        self.url = url or engine.url
+        self._subscriptions: Set[OrderEventsSubscription] = set()
+        self._task: Optional[asyncio.Task] = None
+        self._stopped = asyncio.Event()
+
+    def subscribe(
+            self,
+            statuses: Optional[Set[OrderStatus]] = None,
+            order_id: Optional[int] = None,
+    ) -> OrderEventsSubscription:
+        subscription = OrderEventsSubscription(statuses=frozenset(statuses or ()), order_id=order_id)
+        self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: OrderEventsSubscription) -> None:
+        self._subscriptions.discard(subscription)
+
+    def _dispatch(self, event: OrderStatusEvent) -> None:
+        for subscription in list(self._subscriptions):
+            if subscription.matches(event):
+                subscription.put(event)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._stopped.clear()
+            self._task = asyncio.create_task(self._listen_forever())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._stopped.set()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _listen_forever(self) -> None:
+        delay = RECONNECT_DELAY_SECONDS
+        while not self._stopped.is_set():
+            try:
+                await self._listen()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logging.exception("Order events listener failed, reconnecting in %.0fs", delay)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, MAX_RECONNECT_DELAY_SECONDS)
+
+    async def _listen(self) -> None:
+        url = self.url.set(drivername="postgresql").render_as_string(hide_password=False)
+        connection = await asyncpg.connect(url)
+        lost = asyncio.Event()
+        connection.add_termination_listener(lambda _: lost.set())
+        try:
+            await connection.add_listener(self.channel, self._on_notification)
+            logging.info("Listening for order events on channel %s", self.channel)
+            await lost.wait()
+            raise ConnectionError("Order events listener connection lost")
+        finally:
+            if not connection.is_closed():
+                await connection.close()
+
+    def _on_notification(self, connection, pid, channel, payload: str) -> None:
+        try:
+            event = OrderStatusEvent.model_validate_json(payload)
+        except ValueError:
+            logging.warning("Malformed order event payload: %s", payload)
+            return
+        self._dispatch(event)
+
+
+# Один слушатель на процесс
+order_events = OrderEventsHub()
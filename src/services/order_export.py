@@ -0,0 +1,156 @@
+from datetime import datetime, timezone
+from typing import AsyncIterator, Optional, Sequence, TextIO
+
+from sqlalchemy import Row
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from src.db.db import async_session_maker, session_maker_for
+from src.repositories.orders import OrdersRepository
+from src.utils.streaming import csv_lines, ndjson_lines
+
+# Сколько строк читается из серверного курсора за раз
+EXPORT_BATCH_SIZE = 5000
+
+# CSV: строка на позицию заказа (line_type=item) и на каждый её топпинг (line_type=topping).
+# Суммы в копейках; колонки заказа и оплаты повторяются в каждой строке
+ORDER_EXPORT_CSV_COLUMNS = [
+    "order_id", "created_at", "user_id", "status", "delivery_type", "total_amount",
+    "payment_status", "payment_amount",
+    "line_type", "item_id", "product_id", "product_name", "quantity", "price",
+    "topping_id", "topping_name",
+]
+
+
+async def export_orders(
+        fmt: str,
+        date_from: datetime,
+        date_to: datetime,
+        session_maker: async_sessionmaker = async_session_maker,
+        orders_repo: Optional[OrdersRepository] = None,
+) -> AsyncIterator[str]:
+    """
+    Stream orders created in [date_from, date_to) for accounting.
+
+    Rows are read through a server-side cursor and written out batch by
+    batch, so memory use does not depend on the number of orders. Uses its
+    own session, because the response is still being written after the
+    request dependencies have been closed.
+
+    :param fmt: "csv" (one line per item and per item topping) or
+        "ndjson" (one order with nested items per line).
+    """
+    orders_repo = orders_repo or OrdersRepository()
+    encode = _CsvLines() if fmt == "csv" else _NdjsonOrders()
+    async with session_maker() as session:
+        if fmt == "csv":
+            yield csv_lines([ORDER_EXPORT_CSV_COLUMNS])
+
+        async for rows in orders_repo.stream_export_rows(
+                session=session, date_from=_as_utc(date_from), date_to=_as_utc(date_to), batch_size=EXPORT_BATCH_SIZE
+        ):
+            chunk = encode(rows)
+            if chunk:
+                yield chunk
+
+    tail = encode.flush()
+    if tail:
+        yield tail
+
+
+async def export_orders_file(output: TextIO, fmt: str, date_from: datetime, date_to: datetime) -> None:
+    """
+    Write the export to a file, used by `python main.py orders-export`.
+    """
+    async for chunk in export_orders(
+            fmt, date_from=date_from, date_to=date_to, session_maker=session_maker_for(read_only=True)
+    ):
+        output.write(chunk)
+
+
+def _as_utc(value: datetime) -> datetime:
+    # Время без часового пояса считается UTC
+    return value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
+
+
+class _CsvLines:
+    """
+    Turns flat export rows into CSV lines, remembering the last item across batches.
+    """
+
+    def __init__(self) -> None:
+        self._last_item_id: Optional[int] = None
+
+    def __call__(self, rows: Sequence[Row]) -> str:
+        lines = []
+        for row in rows:
+            order = [
+                row.order_id, row.created_at.isoformat(), row.user_id, row.status.value,
+                row.delivery_type.value, row.total_amount, row.payment_status, row.payment_amount,
+            ]
+            if row.item_id != self._last_item_id:
+                self._last_item_id = row.item_id
+                lines.append(order + [
+                    "item", row.item_id, row.product_id, row.product_name, row.quantity, row.item_price, "", "",
+                ])
+            if row.topping_id is not None:
+                lines.append(order + [
+                    "topping", row.item_id, row.product_id, row.product_name, row.quantity, row.topping_price,
+                    row.topping_id, row.topping_name,
+                ])
+        return csv_lines(lines)
+
+    def flush(self) -> str:
+        return ""
+
+
+class _NdjsonOrders:
+    """
+    Groups adjacent export rows into one JSON document per order.
+
+    The last order of a batch may continue in the next one, so it is kept
+    until a row of another order arrives or flush() is called.
+    """
+
+    def __init__(self) -> None:
+        self._order: Optional[dict] = None
+
+    def __call__(self, rows: Sequence[Row]) -> str:
+        done = []
+        for row in rows:
+            if self._order is None or self._order["order_id"] != row.order_id:
+                if self._order is not None:
+                    done.append(self._order)
+                self._order = {
+                    "order_id": row.order_id,
+                    "created_at": row.created_at,
+                    "user_id": row.user_id,
+                    "status": row.status,
+                    "delivery_type": row.delivery_type,
+                    "total_amount": row.total_amount,
+                    "payment": (
+                        {"status": row.payment_status, "amount": row.payment_amount}
+                        if row.payment_status is not None else None
+                    ),
+                    "items": [],
+                }
+            items = self._order["items"]
+            if not items or items[-1]["item_id"] != row.item_id:
+                items.append({
+                    "item_id": row.item_id,
+                    "product_id": row.product_id,
+                    "product_name": row.product_name,
+                    "quantity": row.quantity,
+                    "price": row.item_price,
+                    "toppings": [],
+                })
+            if row.topping_id is not None:
+                items[-1]["toppings"].append({
+                    "topping_id": row.topping_id,
+                    "topping_name": row.topping_name,
+                    "price": row.topping_price,
+                })
+        return ndjson_lines(done)
+
+    def flush(self) -> str:
+        order, self._order = self._order, None
+        return ndjson_lines([order]) if order is not None else ""
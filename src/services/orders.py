@@ -0,0 +1,296 @@
+import hashlib
+from datetime import timedelta
+from typing import Collection, List, Optional, Tuple
+
+from src.db.unit_of_work import UnitOfWork
+
+from src.repositories.idempotency import IdempotencyRepository
+from src.repositories.jobs import JobsRepository
+from src.repositories.orders import OrdersRepository
+from src.schemas.cart import CartCreate
+from src.schemas.order import OrderHistoryPage, OrderRead, OrderStatusEvent
+from src.services.delivery_slots import DeliverySlotsService
+from src.services.order_events import ORDER_STATUS_CHANNEL
+from src.utils.config import settings
+from src.utils.enums import ORDER_STATUS_TRANSITIONS, DeliveryType, JobType, OrderStatus
+from src.utils.pagination import decode_cursor, encode_cursor
+
+PLACED_ORDER_INCLUDE = ["items.toppings"]
+ORDER_DETAIL_INCLUDE = ["address", "items.toppings", "payment"]
+ORDER_QUEUE_INCLUDE = ["items.toppings"]
+
+
+class CartValidationError(ValueError):
+    """
+    The cart references a product, topping or address that cannot be ordered.
+    """
+
+
+class IdempotencyKeyReusedError(ValueError):
+    """
+    The idempotency key was already used for a different cart.
+    """
+
+
+class OrderNotFoundError(LookupError):
+    """
+    The order does not exist.
+    """
+
+
+class InvalidStatusTransitionError(ValueError):
+    """
+    The order cannot move to the requested status from its current one.
+    """
+
+
+class OrdersService:
+    """
+    Service layer for placing and managing orders.
+    """
+
+    def __init__(
+            self, uow: UnitOfWork,
+            orders_repo: OrdersRepository,
+            idempotency_repo: IdempotencyRepository,
+            slots: DeliverySlotsService,
+            jobs_repo: JobsRepository,
+            idempotency_key_ttl: timedelta = timedelta(hours=settings.idempotency.KEY_TTL_HOURS)
+    ) -> None:
+        self.uow = uow
+        self.session = uow.session
+        self.orders_repo = orders_repo
+        self.idempotency_repo = idempotency_repo
+        self.slots = slots
+        self.jobs_repo = jobs_repo
+        self.idempotency_key_ttl = idempotency_key_ttl
+
+    async def place_order(self, cart: CartCreate, user_id: int) -> OrderRead:
+        """
+        Price the cart on the server and write the order in one transaction.
+
+        The order takes a place in the slot of its delivery_time, or in the
+        first bookable slot if it has none, and delivery_time is stored as
+        the start of that slot. The receipt is
+        sent by a background job after the commit.
+
+        :raises CartValidationError: unknown product, a topping that is not
+            available for the product, a delivery without an address or an
+            address of another user.
+        :raises InvalidDeliveryTimeError: delivery_time is outside the bookable window.
+        :raises DeliverySlotFullError: the delivery slot is full.
+        """
+        order = await self._create_order(cart, user_id)
+        await self.uow.commit()
+        return order
+
+    async def place_order_idempotent(
+            self, cart: CartCreate, user_id: int, idempotency_key: str
+    ) -> Tuple[OrderRead, bool]:
+        """
+        Place the order once per idempotency key of the user.
+
+        A retry with the same key and cart gets the stored order back with
+        a single primary key lookup. Concurrent requests with the same key
+        wait on an advisory lock, and only the first one creates the order.
+        Only placed orders are stored, so a rejected cart can be retried.
+
+        :return: the order and whether it was placed by an earlier request.
+        :raises IdempotencyKeyReusedError: the key was used for another cart.
+        :raises CartValidationError, InvalidDeliveryTimeError, DeliverySlotFullError:
+            see place_order().
+        """
+        request_hash = hashlib.sha256(cart.model_dump_json().encode()).hexdigest()
+
+        stored = await self.idempotency_repo.get(session=self.session, user_id=user_id, key=idempotency_key)
+        if stored is None:
+            await self.idempotency_repo.lock(session=self.session, user_id=user_id, key=idempotency_key)
+            # Пока ждали блокировку, такой же запрос мог успеть закоммитить заказ
+            stored = await self.idempotency_repo.get(session=self.session, user_id=user_id, key=idempotency_key)
+
+        if stored is not None:
+            stored_hash, response = stored.request_hash, stored.response
+            # Завершаем транзакцию и отпускаем блокировку, если её брали
+            await self.uow.rollback()
+            if stored_hash != request_hash:
+                raise IdempotencyKeyReusedError("Idempotency key was already used for a different order")
+            return OrderRead.model_validate(response), True
+
+        order = await self._create_order(cart, user_id)
+        await self.idempotency_repo.save(
+            session=self.session,
+            user_id=user_id,
+            key=idempotency_key,
+            request_hash=request_hash,
+            order_id=order.id,
+            response=order.model_dump(mode="json"),
+            ttl=self.idempotency_key_ttl,
+        )
+        await self.uow.commit()
+        return order, False
+
+    async def _create_order(self, cart: CartCreate, user_id: int) -> OrderRead:
+        if cart.delivery_type == DeliveryType.DELIVERY and cart.address_id is None:
+            raise CartValidationError("Delivery address is required for delivery orders")
+
+        # Заказ "как можно скорее" тоже занимает место -- в первом доступном слоте,
+        # иначе такие заказы перегружали бы кухню и курьеров сверх вместимости
+        if cart.delivery_time is not None:
+            slot_start = self.slots.get_slot_start(cart.delivery_time)
+        else:
+            slot_start = self.slots.get_asap_slot_start()
+
+        product_ids = {item.product_id for item in cart.items}
+        topping_ids = {topping_id for item in cart.items for topping_id in item.topping_ids}
+        product_prices, topping_prices, address_valid = await self.orders_repo.get_cart_prices(
+            session=self.session,
+            product_ids=list(product_ids),
+            topping_ids=list(topping_ids),
+            user_id=user_id,
+            address_id=cart.address_id,
+        )
+
+        # Суммы в копейках: только целочисленная арифметика, без ошибок округления
+        total_amount = 0
+        items_data: List[dict] = []
+        for item in cart.items:
+            if item.product_id not in product_prices:
+                raise CartValidationError(f"Product {item.product_id} not found")
+
+            price = product_prices[item.product_id]
+            toppings = []
+            for topping_id in item.topping_ids:
+                topping_price = topping_prices.get((item.product_id, topping_id))
+                if topping_price is None:
+                    raise CartValidationError(
+                        f"Topping {topping_id} is not available for product {item.product_id}"
+                    )
+                toppings.append({"topping_id": topping_id, "price": topping_price})
+
+            total_amount += item.quantity * (price + sum(topping["price"] for topping in toppings))
+            items_data.append({
+                "product_id": item.product_id,
+                "quantity": item.quantity,
+                "price": price,
+                "toppings": toppings,
+            })
+
+        # Чужой или несуществующий адрес: иначе заказ упал бы на внешнем ключе с 500
+        if not address_valid:
+            raise CartValidationError(f"Address {cart.address_id} not found")
+
+        order_data = cart.model_dump(exclude={"items"}) | {
+            "user_id": user_id,
+            "status": OrderStatus.PENDING,
+            "total_amount": total_amount,
+            "delivery_time": slot_start,
+        }
+        order = await self.orders_repo.create_order(
+            session=self.session, order_data=order_data, items_data=items_data
+        )
+        await self.jobs_repo.enqueue(
+            session=self.session,
+            job_type=JobType.SEND_ORDER_RECEIPT,
+            payload={"order_id": order.id, "user_id": user_id},
+        )
+        # Слот занимаем последним: его строка заблокирована до коммита, и чем позже
+        # она заблокирована, тем меньше ждут заказы на тот же слот
+        await self.slots.reserve(delivery_type=cart.delivery_type, slot_start=slot_start)
+        return order.to_read_model(include=PLACED_ORDER_INCLUDE)
+
+    async def get_order_history(
+            self, user_id: int, limit: int, cursor: Optional[str] = None
+    ) -> OrderHistoryPage:
+        """
+        Return one page of the user's order history, newest first.
+
+        :raises InvalidCursorError: the cursor is malformed.
+        """
+        after = decode_cursor(cursor) if cursor else None
+        orders = await self.orders_repo.get_user_orders_page(
+            session=self.session, user_id=user_id, limit=limit, after=after
+        )
+
+        next_cursor = None
+        if len(orders) > limit:
+            orders = orders[:limit]
+            next_cursor = encode_cursor(orders[-1].created_at, orders[-1].id)
+
+        return OrderHistoryPage(
+            orders=[order.to_summary_model() for order in orders],
+            next_cursor=next_cursor,
+        )
+
+    async def get_user_order(self, user_id: int, order_id: int) -> OrderRead:
+        """
+        Return one order of the user with items, payment and address.
+
+        :raises OrderNotFoundError: there is no such order or it belongs to another user.
+        """
+        order = await self.orders_repo.get_user_order(session=self.session, user_id=user_id, order_id=order_id)
+        if order is None:
+            raise OrderNotFoundError(f"Order {order_id} not found")
+        return order.to_read_model(include=ORDER_DETAIL_INCLUDE)
+
+    async def get_queue(self, statuses: Collection[OrderStatus], limit: int) -> List[OrderRead]:
+        """
+        Return the oldest orders in the given statuses, e.g. the kitchen queue.
+
+        Screens load the queue once and then follow changes through
+        the order status event stream instead of polling.
+        """
+        orders = await self.orders_repo.get_orders_by_status(
+            session=self.session, statuses=statuses, limit=limit
+        )
+        return [order.to_read_model(include=ORDER_QUEUE_INCLUDE) for order in orders]
+
+    async def change_status(self, order_id: int, status: OrderStatus) -> OrderStatusEvent:
+        """
+        Move the order through the OrderStatus state machine and publish the change.
+
+        A cancelled order gives back its place in the delivery slot.
+
+        :raises OrderNotFoundError: the order does not exist.
+        :raises InvalidStatusTransitionError: the transition is not allowed,
+            or the status was changed concurrently.
+        """
+        state = await self.orders_repo.get_order_state(session=self.session, order_id=order_id)
+        if state is None:
+            raise OrderNotFoundError(f"Order {order_id} not found")
+
+        current_status, delivery_type, delivery_time = state
+        if status not in ORDER_STATUS_TRANSITIONS[current_status]:
+            raise InvalidStatusTransitionError(
+                f"Cannot change order status from {current_status.value} to {status.value}"
+            )
+        # Курьер участвует только в доставке, самовывоз минует статус DELIVERING
+        if current_status == OrderStatus.PREPARING and status in (OrderStatus.DELIVERING, OrderStatus.COMPLETED):
+            expected = OrderStatus.DELIVERING if delivery_type == DeliveryType.DELIVERY else OrderStatus.COMPLETED
+            if status != expected:
+                raise InvalidStatusTransitionError(
+                    f"Cannot change {delivery_type.value} order status from {current_status.value} to {status.value}"
+                )
+
+        event = await self.orders_repo.change_status(
+            session=self.session,
+            order_id=order_id,
+            expected_status=current_status,
+            status=status,
+            channel=ORDER_STATUS_CHANNEL,
+        )
+        if event is None:
+            raise InvalidStatusTransitionError(f"Order {order_id} status was changed concurrently, retry")
+        if status == OrderStatus.CANCELLED and delivery_time is not None:
+            await self.slots.release(delivery_type=delivery_type, slot_start=delivery_time)
+        await self.uow.commit()
+        return event
+
+
+async def delete_expired_idempotency_keys() -> int:
+    """
+    Delete expired idempotency keys, used by `python main.py idempotency-cleanup`.
+    """
+    async with UnitOfWork() as uow:
+        deleted = await IdempotencyRepository().delete_expired(session=uow.session)
+        await uow.commit()
+    return deleted
@@ -0,0 +1,142 @@
+from typing import Optional
+
+from sqlalchemy.exc import IntegrityError
+
+from src.db.errors import foreign_key_violation, unique_violation
+from src.db.unit_of_work import UnitOfWork
+from src.repositories.products import ProductsRepository
+from src.schemas.product import ProductCreate, ProductRead, ProductSearchHit, ProductSearchPage, ProductUpdate
+from src.services.menu import MenuSnapshotService
+
+# Дальше поиск не листается: глубокий OFFSET дорог, а релевантность там уже никому не нужна
+SEARCH_MAX_OFFSET = 1000
+
+SUBCATEGORY_FOREIGN_KEY = "products_subcategory_id_fkey"
+PRODUCT_UNIQUE_CONSTRAINT = "uq_products_subcategory_id_name"
+
+
+class ProductAlreadyExistsError(ValueError):
+    """
+    A product with this name already exists in the subcategory.
+    """
+
+
+class SubcategoryNotFoundError(LookupError):
+    """
+    The product's subcategory does not exist.
+    """
+
+
+class ProductsService:
+    """
+    Service layer for managing menu products.
+
+    Every successful write rebuilds the menu snapshot, so readers of
+    GET /categories and GET /products see the change right away.
+    """
+
+    def __init__(
+            self, uow: UnitOfWork,
+            products_repo: ProductsRepository,
+            menu: MenuSnapshotService
+    ) -> None:
+        self.uow = uow
+        self.session = uow.session
+        self.products_repo = products_repo
+        self.menu = menu
+
+    async def search_products(
+            self,
+            query: str,
+            limit: int,
+            offset: int = 0,
+            subcategory_id: Optional[int] = None,
+            price_min: Optional[int] = None,
+            price_max: Optional[int] = None,
+    ) -> ProductSearchPage:
+        """
+        Return one page of products matching the query, most relevant first.
+
+        Pages end at SEARCH_MAX_OFFSET: the page after which the next offset
+        would exceed it is returned as the last one.
+        """
+        # Одна лишняя строка показывает, есть ли следующая страница, если до неё вообще можно дойти
+        has_reachable_next = offset + limit <= SEARCH_MAX_OFFSET
+        rows = await self.products_repo.search_products(
+            session=self.session,
+            query=query,
+            limit=limit + 1 if has_reachable_next else limit,
+            offset=offset,
+            subcategory_id=subcategory_id,
+            price_min=price_min,
+            price_max=price_max,
+        )
+        return ProductSearchPage(
+            items=[ProductSearchHit.model_validate(row) for row in rows[:limit]],
+            next_offset=offset + limit if has_reachable_next and len(rows) > limit else None,
+        )
+
+    async def create_product(self, product: ProductCreate) -> ProductRead:
+        """
+        :raises ProductAlreadyExistsError: the subcategory already has a product with this name.
+        :raises SubcategoryNotFoundError: subcategory_id points to no category.
+        """
+        try:
+            created = await self.products_repo.create_product(
+                session=self.session, product_data=product.model_dump()
+            )
+            await self.uow.commit()
+        except IntegrityError as e:
+            await self.uow.rollback()
+            error = _write_error(e)
+            if error is None:
+                raise
+            raise error from e
+        await self.menu.rebuild()
+        return created.to_read_model(max_depth=0)
+
+    async def update_product(self, product_id: int, product: ProductUpdate) -> Optional[ProductRead]:
+        """
+        :raises ProductAlreadyExistsError: the subcategory already has a product with this name.
+        :raises SubcategoryNotFoundError: subcategory_id points to no category.
+        """
+        product_data = product.model_dump(exclude_unset=True)
+        if not product_data:
+            existing = await self.products_repo.get_product(session=self.session, product_id=product_id)
+            return existing.to_read_model(max_depth=0) if existing else None
+
+        try:
+            updated = await self.products_repo.update_product(
+                session=self.session, product_id=product_id, product_data=product_data
+            )
+            if updated is None:
+                return None
+            await self.uow.commit()
+        except IntegrityError as e:
+            await self.uow.rollback()
+            error = _write_error(e)
+            if error is None:
+                raise
+            raise error from e
+        await self.menu.rebuild()
+        return updated.to_read_model(max_depth=0)
+
+    async def delete_product(self, product_id: int) -> bool:
+        """
+        Soft-delete the product: it leaves the menu, search and new orders,
+        while past orders still show it.
+        """
+        deleted = await self.products_repo.delete_product(session=self.session, product_id=product_id)
+        if deleted:
+            await self.uow.commit()
+            await self.menu.rebuild()
+        return deleted
+
+
+def _write_error(error: IntegrityError) -> Optional[Exception]:
+    # Нарушения из-за клиентского ввода -- в доменные ошибки, остальные пробрасываются как есть
+    if unique_violation(error) == PRODUCT_UNIQUE_CONSTRAINT:
+        return ProductAlreadyExistsError("Product with this name already exists in this subcategory")
+    if foreign_key_violation(error) == SUBCATEGORY_FOREIGN_KEY:
+        return SubcategoryNotFoundError("Subcategory not found")
+    return None
@@ -0,0 +1,104 @@
+import asyncio
+import logging
+import random
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Protocol
+
+from src.schemas.order import OrderRead
+from src.schemas.user import UserSummary
+from src.utils.config import settings
+
+# Сколько последних отправок помнит поддельный провайдер
+FAKE_SENT_HISTORY = 1000
+
+
+class ProviderError(RuntimeError):
+    """
+    An external provider did not accept the request; the job is retried.
+    """
+
+
+class SmsProvider(Protocol):
+    async def send_sms(self, phone: str, text: str) -> None: ...
+
+
+class ReceiptProvider(Protocol):
+    async def send_receipt(self, order: OrderRead, customer: UserSummary) -> None: ...
+
+
+@dataclass
+class SentSms:
+    phone: str
+    text: str
+
+
+class LoggingSmsProvider:
+    """
+    SMS provider for an installation without a gateway: logs the message and sends nothing.
+    """
+
+    async def send_sms(self, phone: str, text: str) -> None:
+        logging.info("SMS to %s not sent, no gateway configured: %s", phone, text)
+
+
+class LoggingReceiptProvider:
+    """
+    Receipt provider for an installation without a fiscal data operator: logs the receipt and sends nothing.
+    """
+
+    async def send_receipt(self, order: OrderRead, customer: UserSummary) -> None:
+        logging.info(
+            "Receipt for order %s (%s kopecks) to %s not sent, no provider configured",
+            order.id, order.total_amount, customer.email,
+        )
+
+
+class FakeProvider:
+    """
+    Local stand-in for an external provider.
+
+    Waits like a network call, fails a configurable share of calls with
+    ProviderError to exercise retries, and keeps the last FAKE_SENT_HISTORY
+    sends in memory.
+    """
+
+    def __init__(self, failure_rate: float = 0.0, latency_seconds: float = 0.05) -> None:
+        self.failure_rate = failure_rate
+        self.latency_seconds = latency_seconds
+
+    async def _call(self, name: str) -> None:
+        await asyncio.sleep(self.latency_seconds)
+        if random.random() < self.failure_rate:
+            raise ProviderError(f"{name} is temporarily unavailable")
+
+
+class FakeSmsProvider(FakeProvider):
+    def __init__(self, failure_rate: float = 0.0, latency_seconds: float = 0.05) -> None:
+        super().__init__(failure_rate, latency_seconds)
+        self.sent: Deque[SentSms] = deque(maxlen=FAKE_SENT_HISTORY)
+
+    async def send_sms(self, phone: str, text: str) -> None:
+        await self._call("SMS provider")
+        self.sent.append(SentSms(phone=phone, text=text))
+        logging.info("Fake SMS to %s: %s", phone, text)
+
+
+class FakeReceiptProvider(FakeProvider):
+    def __init__(self, failure_rate: float = 0.0, latency_seconds: float = 0.05) -> None:
+        super().__init__(failure_rate, latency_seconds)
+        self.sent: Deque[int] = deque(maxlen=FAKE_SENT_HISTORY)
+
+    async def send_receipt(self, order: OrderRead, customer: UserSummary) -> None:
+        await self._call("Receipt provider")
+        self.sent.append(order.id)
+        logging.info("Fake receipt for order %s (%s kopecks) to %s", order.id, order.total_amount, customer.email)
+
+
+# Провайдеры процесса. Настоящие (SMS-шлюз, ОФД) подключаются здесь же и реализуют те же протоколы
+if settings.jobs.PROVIDERS == "fake":
+    sms_provider: SmsProvider = FakeSmsProvider(failure_rate=settings.jobs.FAKE_PROVIDER_FAILURE_RATE)
+    receipt_provider: ReceiptProvider = FakeReceiptProvider(failure_rate=settings.jobs.FAKE_PROVIDER_FAILURE_RATE)
+else:
+    sms_provider = LoggingSmsProvider()
+    receipt_provider = LoggingReceiptProvider()
@@ -1,9 +1,41 @@
+import asyncio
 from typing import Any, Dict, List, Optional
 
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import IntegrityError
 
-from src.schemas.user import UserCreate
+from src.db.errors import unique_violation
+from src.db.unit_of_work import UnitOfWork
+
+from src.schemas.user import AuthToken, CurrentUser, UserCreate, UserLogin, UserRead, UserSummary, UserUpdate
+from src.repositories.jobs import JobsRepository
 from src.repositories.users import UsersRepository
+from src.utils.enums import JobType, UserRole
+from src.utils.security import (
+    InvalidTokenError, TokenCache, create_access_token, decode_access_token, hash_password, token_cache, verify_password
+)
+
+
+# Уникальные ограничения users (имена по умолчанию PostgreSQL) -> поле для сообщения.
+# Конфликтом (409) считаются только они, остальные ошибки целостности пробрасываются
+USER_UNIQUE_CONSTRAINTS = {"users_phone_key": "phone", "users_email_key": "email"}
+
+
+class UserAlreadyExistsError(ValueError):
+    """
+    A user with this phone or email is already registered.
+    """
+
+
+class UserNotFoundError(LookupError):
+    """
+    The user does not exist.
+    """
+
+
+class InvalidCredentialsError(ValueError):
+    """
+    The phone is not registered or the password does not match.
+    """
 
 
 class UsersService:
@@ -16,16 +48,21 @@ class UsersService:
     """
 
     def __init__(
-            self, session: AsyncSession,
-            users_repo: UsersRepository
+            self, uow: UnitOfWork,
+            users_repo: UsersRepository,
+            jobs_repo: JobsRepository,
+            tokens: TokenCache = token_cache
     ) -> None:
         """
         Initialize the UsersService with a user repository.
         """
-        self.session = session
+        self.uow = uow
+        self.session = uow.session
         self.users_repo = users_repo
+        self.jobs_repo = jobs_repo
+        self.tokens = tokens
 
-    async def register_user(self, user: UserCreate):
+    async def register_user(self, user: UserCreate) -> AuthToken:
         # Логика проверки зарегистрирован ли юзер
         # Если зарегистрирован -- выдаём, ответ, что юзер уже зарегистрирован и логиним его
 
@@ -35,13 +72,108 @@ class UsersService:
         # 3. При успехе - идём в бд и записываем юзера
         # 4. Создаём jwt-токен, записываем его в куки
         # 5. Выдаём 200 и ответ
-        created_user = await self.users_repo.create_user(session=self.session, user_data=user)
-        return {
-            "status": 200,
-            "user": created_user
-        }
-        # pass
-
-    async def login_user(self):
+        if await self.users_repo.get_user_by_phone(session=self.session, phone=user.phone):
+            raise UserAlreadyExistsError("User with this phone is already registered")
+
+        try:
+            # Роль при регистрации всегда CUSTOMER, администраторов назначают вручную
+            user_data = user.model_dump(exclude={"password"}) | {"role": UserRole.CUSTOMER}
+            # scrypt занимает десятки миллисекунд -- считаем вне event loop
+            user_data["password_hash"] = await asyncio.to_thread(hash_password, user.password)
+            created_user = await self.users_repo.create_user(session=self.session, user_data=user_data)
+            # SMS уходит фоновой задачей после коммита, ответ провайдера не ждём
+            await self.jobs_repo.enqueue(
+                session=self.session,
+                job_type=JobType.SEND_SMS,
+                payload={"phone": created_user.phone, "text": f"{created_user.name}, добро пожаловать в Goar Cafe!"},
+            )
+            await self.uow.commit()
+        except IntegrityError as e:
+            await self.uow.rollback()
+            field = USER_UNIQUE_CONSTRAINTS.get(unique_violation(e))
+            if field is None:
+                raise
+            raise UserAlreadyExistsError(f"User with this {field} is already registered") from e
+
+        # Новый пользователь начинает с token_version = 0
+        return self._issue_token(created_user, token_version=0)
+
+    async def login_user(self, credentials: UserLogin) -> AuthToken:
         # Логика проверки зарегистрирован ли юзер
-        pass
+        # Подтверждение телефона по смс -- как в register_user, п. 2
+        user = await self.users_repo.get_user_by_phone(session=self.session, phone=credentials.phone)
+        # Хеш проверяется и для неизвестного телефона, ответ одинаковый: не выдаём, кто зарегистрирован
+        password_hash = user.password_hash if user is not None else None
+        if not await asyncio.to_thread(verify_password, credentials.password, password_hash):
+            raise InvalidCredentialsError("Incorrect phone or password")
+        return self._issue_token(user.to_summary_model(), token_version=user.token_version)
+
+    async def authenticate(self, access_token: str) -> CurrentUser:
+        """
+        Resolve the current user from an access token.
+
+        A token seen recently is answered from the in-process cache with no
+        signature check and no database access. Otherwise the signature is
+        verified once and token_version is compared with the users table,
+        which is how revoked tokens are rejected.
+
+        :raises InvalidTokenError: the token is invalid, expired or revoked.
+        """
+        key = self.tokens.key(access_token)
+        cached_user = self.tokens.get(key)
+        if cached_user is not None:
+            return cached_user
+
+        user, expires_at = decode_access_token(access_token)
+        token_version = await self.users_repo.get_token_version(session=self.session, user_id=user.id)
+        if token_version is None or token_version != user.token_version:
+            raise InvalidTokenError("Token has been revoked")
+
+        self.tokens.put(key, user, expires_at)
+        return user
+
+    async def revoke_tokens(self, user_id: int) -> None:
+        """
+        Invalidate every token issued to the user so far.
+
+        Other workers stop accepting them once their cache entries expire
+        (TOKEN_CACHE_TTL_SECONDS).
+        """
+        await self.users_repo.bump_token_version(session=self.session, user_id=user_id)
+        await self.uow.commit()
+        self.tokens.evict_user(user_id)
+
+    async def get_profile(self, user_id: int) -> UserRead:
+        user = await self.users_repo.get_user_with_addresses(session=self.session, user_id=user_id)
+        if user is None:
+            raise UserNotFoundError("User not found")
+        return user.to_read_model(include=["addresses"])
+
+    async def update_profile(self, user_id: int, user: UserUpdate) -> UserRead:
+        user_data = user.model_dump(exclude_unset=True)
+        if not user_data:
+            return await self.get_profile(user_id)
+
+        try:
+            updated = await self.users_repo.update_user(session=self.session, user_id=user_id, user_data=user_data)
+            await self.uow.commit()
+        except IntegrityError as e:
+            await self.uow.rollback()
+            field = USER_UNIQUE_CONSTRAINTS.get(unique_violation(e))
+            if field is None:
+                raise
+            raise UserAlreadyExistsError(f"User with this {field} is already registered") from e
+        if updated is None:
+            raise UserNotFoundError("User not found")
+        return updated.to_read_model(max_depth=0)
+
+    async def delete_user(self, user_id: int) -> None:
+        if not await self.users_repo.delete_user(session=self.session, user_id=user_id):
+            raise UserNotFoundError("User not found")
+        await self.uow.commit()
+        self.tokens.evict_user(user_id)
+
+    @staticmethod
+    def _issue_token(user: UserSummary, token_version: int) -> AuthToken:
+        access_token = create_access_token(user_id=user.id, role=user.role, token_version=token_version)
+        return AuthToken(access_token=access_token, user=user)
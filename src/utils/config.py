@@ -1,4 +1,5 @@
 import os
+from typing import Literal, Optional
 
 from dotenv import load_dotenv
 from pydantic import BaseModel
@@ -10,6 +11,16 @@ load_dotenv()
 class RunSettings(BaseModel):
     host: str = "0.0.0.0"
     port: int = 8000
+    # По умолчанию по воркеру на каждое ядро
+    workers: int = int(os.getenv("RUN_WORKERS", os.cpu_count() or 1))
+    # "auto" выбирает uvloop/httptools, если они установлены
+    loop: Literal["auto", "asyncio", "uvloop"] = os.getenv("RUN_LOOP", "auto")
+    http: Literal["auto", "h11", "httptools"] = os.getenv("RUN_HTTP", "auto")
+    timeout_keep_alive: int = int(os.getenv("RUN_TIMEOUT_KEEP_ALIVE", "5"))
+    backlog: int = int(os.getenv("RUN_BACKLOG", "2048"))
+    # Сколько секунд ждать завершения текущих запросов при остановке
+    timeout_graceful_shutdown: int = int(os.getenv("RUN_TIMEOUT_GRACEFUL_SHUTDOWN", "30"))
+    reload: bool = os.getenv("RUN_RELOAD", "false").lower() in ("1", "true", "yes")
 
 
 class DBSettings(BaseModel):
@@ -20,16 +31,118 @@ class DBSettings(BaseModel):
     DB_PORT: str = os.getenv("DATABASE_PORT", "5432")
     DATABASE_URL: str = f"postgresql+asyncpg://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 
+    # Настройки пула соединений
+    # "queue" -- обычный пул в каждом воркере, "null" -- без пула, для pgbouncer в режиме transaction pooling
+    DB_POOL_MODE: Literal["queue", "null"] = os.getenv("DATABASE_POOL_MODE", "queue")
+    DB_POOL_SIZE: int = int(os.getenv("DATABASE_POOL_SIZE", "10"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DATABASE_MAX_OVERFLOW", "10"))
+    DB_POOL_TIMEOUT: float = float(os.getenv("DATABASE_POOL_TIMEOUT", "30"))
+    DB_POOL_RECYCLE: int = int(os.getenv("DATABASE_POOL_RECYCLE", "1800"))
+    DB_POOL_PRE_PING: bool = os.getenv("DATABASE_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+    # Кеш подготовленных выражений asyncpg; за pgbouncer в режиме transaction должен быть 0
+    DB_STATEMENT_CACHE_SIZE: int = int(os.getenv("DATABASE_STATEMENT_CACHE_SIZE", "100"))
+
+    # Реплика для чтения (streaming replication), те же база, пользователь и пароль.
+    # Без DATABASE_REPLICA_HOST всё идёт в primary. Пул реплики настраивается так же, как primary
+    DB_REPLICA_HOST: Optional[str] = os.getenv("DATABASE_REPLICA_HOST") or None
+    DB_REPLICA_PORT: str = os.getenv("DATABASE_REPLICA_PORT", DB_PORT)
+    # Сколько ждать соединения с репликой, прежде чем читать с primary
+    DB_REPLICA_CONNECT_TIMEOUT: float = float(os.getenv("DATABASE_REPLICA_CONNECT_TIMEOUT", "2"))
+    # Сколько после ошибки реплики все чтения идут в primary
+    DB_REPLICA_RETRY_SECONDS: float = float(os.getenv("DATABASE_REPLICA_RETRY_SECONDS", "30"))
+    # Сколько после записи клиент читает с primary, чтобы увидеть свои изменения несмотря на отставание реплики
+    DB_READ_YOUR_WRITES_SECONDS: int = int(os.getenv("DATABASE_READ_YOUR_WRITES_SECONDS", "10"))
+
 
 class TokenSettings(BaseModel):
     SECRET_KEY: str = os.getenv("SECRET_KEY")
+    ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24
+    # Кеш проверенных токенов в памяти воркера: размер и время жизни записи.
+    # TTL ограничивает, как долго отозванный токен принимается другими воркерами
+    TOKEN_CACHE_SIZE: int = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+    TOKEN_CACHE_TTL_SECONDS: int = int(os.getenv("TOKEN_CACHE_TTL_SECONDS", "60"))
+
+
+class MenuSettings(BaseModel):
+    # Через сколько секунд снапшот меню пересобирается в фоне, чтобы подхватить
+    # изменения, сделанные через другие воркеры
+    SNAPSHOT_TTL_SECONDS: int = int(os.getenv("MENU_SNAPSHOT_TTL_SECONDS", "60"))
+    # Предельный размер тела POST /menu/import. Документ разбирается целиком в памяти воркера;
+    # меню на десятки тысяч продуктов занимает единицы мегабайт
+    IMPORT_MAX_BYTES: int = int(os.getenv("MENU_IMPORT_MAX_BYTES", str(10 * 1024 * 1024)))
+
+
+class AnalyticsSettings(BaseModel):
+    # Часовой пояс, в котором заказы раскладываются по дням
+    TIMEZONE: str = os.getenv("ANALYTICS_TIMEZONE", "Asia/Tomsk")
+    # Как часто каждый воркер пробует пересчитать агрегаты; 0 -- только вручную
+    REFRESH_INTERVAL_SECONDS: int = int(os.getenv("ANALYTICS_REFRESH_INTERVAL_SECONDS", "300"))
+    # Запас на транзакции, которые закоммитились позже, чем начались:
+    # заказы, изменённые за это время до пересчёта, будут пересчитаны ещё раз
+    REFRESH_OVERLAP_SECONDS: int = int(os.getenv("ANALYTICS_REFRESH_OVERLAP_SECONDS", "300"))
+
+
+class IdempotencySettings(BaseModel):
+    # Сколько часов повтор POST /orders/ с тем же Idempotency-Key возвращает сохранённый заказ.
+    # Просроченные ключи не учитываются, а удаляет их `python main.py idempotency-cleanup`
+    KEY_TTL_HOURS: int = int(os.getenv("IDEMPOTENCY_KEY_TTL_HOURS", "24"))
+
+
+class DeliverySettings(BaseModel):
+    # Длина слота в минутах; время доставки заказа округляется вниз до начала слота
+    SLOT_MINUTES: int = int(os.getenv("DELIVERY_SLOT_MINUTES", "15"))
+    # Вместимость слота по умолчанию: сколько заказов кухня готовит к одному слоту
+    # (отдельно для доставки и самовывоза) и сколько доставок развозят курьеры.
+    # Для отдельных слотов меняется через PUT /delivery-slots/{delivery_type}/{slot_start}
+    KITCHEN_DELIVERY_CAPACITY: int = int(os.getenv("DELIVERY_KITCHEN_DELIVERY_CAPACITY", "10"))
+    KITCHEN_PICKUP_CAPACITY: int = int(os.getenv("DELIVERY_KITCHEN_PICKUP_CAPACITY", "10"))
+    COURIER_CAPACITY: int = int(os.getenv("DELIVERY_COURIER_CAPACITY", "8"))
+    # Ближайший слот начинается не раньше чем через LEAD_MINUTES, дальний -- не позже HORIZON_HOURS
+    LEAD_MINUTES: int = int(os.getenv("DELIVERY_LEAD_MINUTES", "30"))
+    HORIZON_HOURS: int = int(os.getenv("DELIVERY_HORIZON_HOURS", "72"))
+
+
+class JobsSettings(BaseModel):
+    # Выполнять ли фоновые задачи в воркерах API; false -- только в `python main.py jobs-worker`
+    ENABLED: bool = os.getenv("JOBS_ENABLED", "true").lower() in ("1", "true", "yes")
+    # Как часто процесс проверяет очередь, когда задач нет
+    POLL_INTERVAL_SECONDS: float = float(os.getenv("JOBS_POLL_INTERVAL_SECONDS", "1"))
+    # Время на одну попытку; задачу, не завершённую за это время (процесс упал), забирает другой процесс
+    LEASE_SECONDS: int = int(os.getenv("JOBS_LEASE_SECONDS", "60"))
+    MAX_ATTEMPTS: int = int(os.getenv("JOBS_MAX_ATTEMPTS", "5"))
+    # Пауза перед повтором удваивается с каждой попыткой, от BACKOFF_BASE до BACKOFF_MAX секунд
+    BACKOFF_BASE_SECONDS: float = float(os.getenv("JOBS_BACKOFF_BASE_SECONDS", "5"))
+    BACKOFF_MAX_SECONDS: float = float(os.getenv("JOBS_BACKOFF_MAX_SECONDS", "600"))
+    # Сколько задач каждого типа один процесс выполняет одновременно
+    SMS_CONCURRENCY: int = int(os.getenv("JOBS_SMS_CONCURRENCY", "4"))
+    RECEIPT_CONCURRENCY: int = int(os.getenv("JOBS_RECEIPT_CONCURRENCY", "2"))
+    # logging -- провайдеры только пишут в лог, что отправили бы; fake -- ещё и имитируют
+    # задержку сети и сбои, чтобы проверить повторы локально
+    PROVIDERS: Literal["logging", "fake"] = os.getenv("JOBS_PROVIDERS", "logging")
+    # Доля вызовов, на которых поддельные провайдеры падают
+    FAKE_PROVIDER_FAILURE_RATE: float = float(os.getenv("JOBS_FAKE_PROVIDER_FAILURE_RATE", "0"))
+
+
+class MetricsSettings(BaseModel):
+    # Заголовок Server-Timing с числом запросов к базе и временем по этапам
+    SERVER_TIMING: bool = os.getenv("METRICS_SERVER_TIMING", "true").lower() in ("1", "true", "yes")
+    # Режим отладки: запоминать текст каждого выражения и писать в лог N+1,
+    # когда выражение одной формы выполнено за запрос больше N_PLUS_ONE_THRESHOLD раз
+    DEBUG: bool = os.getenv("METRICS_DEBUG", "false").lower() in ("1", "true", "yes")
+    N_PLUS_ONE_THRESHOLD: int = int(os.getenv("METRICS_N_PLUS_ONE_THRESHOLD", "5"))
 
 
 class Settings(BaseSettings):
     db: DBSettings = DBSettings()
     token: TokenSettings = TokenSettings()
     run: RunSettings = RunSettings()
+    menu: MenuSettings = MenuSettings()
+    analytics: AnalyticsSettings = AnalyticsSettings()
+    idempotency: IdempotencySettings = IdempotencySettings()
+    delivery: DeliverySettings = DeliverySettings()
+    jobs: JobsSettings = JobsSettings()
+    metrics: MetricsSettings = MetricsSettings()
 
 
 settings = Settings()
@@ -19,3 +19,28 @@ class OrderStatus(Enum):
 class DeliveryType(Enum):
     DELIVERY = "delivery"
     PICKUP = "pickup"
+
+
+# Фоновые задачи, см. src/services/jobs.py. Новый тип -- ещё и миграция ALTER TYPE job_type
+class JobType(Enum):
+    SEND_SMS = "send_sms"
+    SEND_ORDER_RECEIPT = "send_order_receipt"
+
+
+class JobStatus(Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    # Попытки кончились; выполненные задачи удаляются, а не хранятся
+    FAILED = "failed"
+
+
+# Допустимые переходы статусов заказа
+ORDER_STATUS_TRANSITIONS = {
+    OrderStatus.PENDING: {OrderStatus.PAID, OrderStatus.CANCELLED},
+    OrderStatus.PAID: {OrderStatus.PREPARING, OrderStatus.CANCELLED},
+    # Самовывоз завершается сразу после приготовления, доставка -- после курьера
+    OrderStatus.PREPARING: {OrderStatus.DELIVERING, OrderStatus.COMPLETED, OrderStatus.CANCELLED},
+    OrderStatus.DELIVERING: {OrderStatus.COMPLETED},
+    OrderStatus.COMPLETED: set(),
+    OrderStatus.CANCELLED: set(),
+}
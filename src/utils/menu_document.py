@@ -0,0 +1,77 @@
+import csv
+import io
+from typing import List, Optional, Sequence
+
+from pydantic import ValidationError
+
+from src.schemas.menu import MenuDocument, MenuProduct, MenuTopping
+
+# CSV: одна строка на категорию, топпинг или продукт, тип задаётся колонкой kind
+CSV_COLUMNS = ["kind", "category", "name", "price", "description", "toppings"]
+CATEGORY_PATH_SEPARATOR = "/"
+TOPPINGS_SEPARATOR = ";"
+
+
+class MenuDocumentError(ValueError):
+    """
+    The menu document cannot be parsed.
+    """
+
+
+def parse_menu_json(body: bytes) -> MenuDocument:
+    try:
+        return MenuDocument.model_validate_json(body)
+    except ValidationError as e:
+        raise MenuDocumentError(str(e)) from e
+
+
+def parse_menu_csv(text: str) -> MenuDocument:
+    """
+    Parse a CSV menu with CSV_COLUMNS as the header.
+
+    The category path is written as "Шашлык/Свинина", product toppings as
+    "Соус;Лук". Prices are integer kopecks.
+    """
+    reader = csv.DictReader(io.StringIO(text))
+    missing = set(CSV_COLUMNS) - set(reader.fieldnames or ())
+    if missing:
+        raise MenuDocumentError(f"CSV header is missing columns: {', '.join(sorted(missing))}")
+
+    document = MenuDocument()
+    try:
+        for row in reader:
+            kind = (row["kind"] or "").strip()
+            if kind == "category":
+                document.categories.append(split_category_path(row["category"]))
+            elif kind == "topping":
+                document.toppings.append(MenuTopping(name=row["name"].strip(), price=_parse_price(row["price"])))
+            elif kind == "product":
+                document.products.append(MenuProduct(
+                    category=split_category_path(row["category"]),
+                    name=row["name"].strip(),
+                    price=_parse_price(row["price"]),
+                    description=row["description"] or None,
+                    toppings=[name.strip() for name in (row["toppings"] or "").split(TOPPINGS_SEPARATOR) if name.strip()],
+                ))
+            else:
+                raise MenuDocumentError(f"Line {reader.line_num}: unknown kind {kind!r}")
+    except MenuDocumentError:
+        raise
+    except (ValidationError, ValueError) as e:
+        raise MenuDocumentError(f"Line {reader.line_num}: {e}") from e
+    return document
+
+
+def split_category_path(value: Optional[str]) -> List[str]:
+    return [part.strip() for part in (value or "").split(CATEGORY_PATH_SEPARATOR) if part.strip()]
+
+
+def join_category_path(path: Sequence[str]) -> str:
+    return CATEGORY_PATH_SEPARATOR.join(path)
+
+
+def _parse_price(value: Optional[str]) -> int:
+    try:
+        return int((value or "").strip())
+    except ValueError:
+        raise ValueError(f"price must be integer kopecks, got {value!r}") from None
@@ -0,0 +1,189 @@
+import os
+import re
+import time
+from bisect import bisect_left
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Границы корзин гистограмм, как у prometheus_client по умолчанию
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200)
+
+# asyncpg добавляет к параметрам приведение типа: $1::INTEGER, $2::TIMESTAMP WITH TIME ZONE, $3::VARCHAR[]
+_NUMBERED_PARAM = re.compile(r"\$\d+(?:::\w+(?:\(\d+(?:,\s*\d+)?\))?(?: WITH(?:OUT)? TIME ZONE)?(?:\[\])*)?|%\(\w+\)s|\?")
+_PARAM_LIST = re.compile(r"\?(?:\s*,\s*\?)+")
+
+
+@dataclass
+class RequestMetrics:
+    """
+    Costs of one request, filled by the engine and pool hooks in src/db/instrumentation.py.
+    """
+    started_at: float = field(default_factory=time.perf_counter)
+    statements: int = 0
+    db_seconds: float = 0.0
+    pool_wait_seconds: float = 0.0
+    serialization_seconds: float = 0.0
+    # Когда эндпоинт вернул результат; от этого момента FastAPI сериализует ответ
+    endpoint_finished_at: Optional[float] = None
+    # Текст каждого выражения -> сколько раз оно выполнено; заполняется только в режиме отладки
+    statement_counts: Optional[Counter] = None
+
+    def record_statement(self, statement: str, seconds: float) -> None:
+        self.statements += 1
+        self.db_seconds += seconds
+        if self.statement_counts is not None:
+            self.statement_counts[statement] += 1
+
+    def repeated_statements(self, threshold: int) -> List[Tuple[str, int]]:
+        """
+        Statement shapes executed more than `threshold` times, most frequent first.
+
+        Shapes ignore parameter values and the length of expanded IN lists.
+        """
+        if not self.statement_counts:
+            return []
+        shapes: Counter = Counter()
+        for statement, count in self.statement_counts.items():
+            shapes[statement_shape(statement)] += count
+        return [(shape, count) for shape, count in shapes.most_common() if count > threshold]
+
+    def server_timing(self) -> str:
+        total = time.perf_counter() - self.started_at
+        return ", ".join([
+            f'db;dur={self.db_seconds * 1000:.1f};desc="{self.statements} queries"',
+            f"pool;dur={self.pool_wait_seconds * 1000:.1f}",
+            f"ser;dur={self.serialization_seconds * 1000:.1f}",
+            f"total;dur={total * 1000:.1f}",
+        ])
+
+
+# Метрики текущего запроса; None вне запроса (фоновые задачи, CLI)
+current_request: ContextVar[Optional[RequestMetrics]] = ContextVar("current_request", default=None)
+
+
+def record_pool_wait(seconds: float) -> None:
+    metrics = current_request.get()
+    if metrics is not None:
+        metrics.pool_wait_seconds += seconds
+
+
+def record_serialization(seconds: float) -> None:
+    metrics = current_request.get()
+    if metrics is not None:
+        metrics.serialization_seconds += seconds
+
+
+def statement_shape(statement: str) -> str:
+    shape = _NUMBERED_PARAM.sub("?", " ".join(statement.split()))
+    return _PARAM_LIST.sub("?", shape)
+
+
+class Histogram:
+    def __init__(self, buckets: Iterable[float]) -> None:
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+
+@dataclass
+class RouteMetrics:
+    requests: Counter = field(default_factory=Counter)
+    duration: Histogram = field(default_factory=lambda: Histogram(DURATION_BUCKETS))
+    statements: Histogram = field(default_factory=lambda: Histogram(STATEMENT_BUCKETS))
+    db_seconds: float = 0.0
+    pool_wait_seconds: float = 0.0
+    serialization_seconds: float = 0.0
+    n_plus_one: int = 0
+
+
+class MetricsRegistry:
+    """
+    Per-route totals of one worker process, rendered in the Prometheus text format.
+
+    Every series carries the worker pid: with several uvicorn workers each
+    scrape of /metrics is answered by one of them, and the pid keeps their
+    counters apart instead of making them jump back and forth.
+    """
+
+    def __init__(self) -> None:
+        self.routes: Dict[Tuple[str, str], RouteMetrics] = {}
+        self.pid = str(os.getpid())
+
+    def observe(self, method: str, route: str, status: int, metrics: RequestMetrics, n_plus_one: bool) -> None:
+        route_metrics = self.routes.get((method, route))
+        if route_metrics is None:
+            route_metrics = self.routes[(method, route)] = RouteMetrics()
+        route_metrics.requests[status] += 1
+        route_metrics.duration.observe(time.perf_counter() - metrics.started_at)
+        route_metrics.statements.observe(metrics.statements)
+        route_metrics.db_seconds += metrics.db_seconds
+        route_metrics.pool_wait_seconds += metrics.pool_wait_seconds
+        route_metrics.serialization_seconds += metrics.serialization_seconds
+        route_metrics.n_plus_one += n_plus_one
+
+    def render(self, extra: Iterable[Tuple[str, str, str, float]] = ()) -> str:
+        """
+        :param extra: (name, type, help, value) of process-wide gauges and counters.
+        """
+        lines: List[str] = []
+        worker = f'worker="{self.pid}"'
+        routes = sorted(self.routes.items())
+
+        def header(name: str, kind: str, help_text: str) -> None:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        header("http_requests_total", "counter", "Requests by route and status code.")
+        for (method, route), metrics in routes:
+            for status, count in sorted(metrics.requests.items()):
+                lines.append(
+                    f'http_requests_total{{{worker},method="{method}",route="{_escape(route)}",status="{status}"}} {count}'
+                )
+
+        for name, attribute, help_text in (
+                ("http_request_duration_seconds", "duration", "Time from receiving a request to its last byte."),
+                ("http_request_db_statements", "statements", "SQL statements executed per request."),
+        ):
+            header(name, "histogram", help_text)
+            for (method, route), metrics in routes:
+                labels = f'{worker},method="{method}",route="{_escape(route)}"'
+                histogram: Histogram = getattr(metrics, attribute)
+                cumulative = 0
+                for bound, count in zip(histogram.buckets + (float("inf"),), histogram.counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f'{name}_bucket{{{labels},le="{le}"}} {cumulative}')
+                lines.append(f"{name}_sum{{{labels}}} {histogram.sum}")
+                lines.append(f"{name}_count{{{labels}}} {cumulative}")
+
+        for name, attribute, help_text in (
+                ("http_request_db_seconds_total", "db_seconds", "Time spent executing SQL statements."),
+                ("http_request_pool_wait_seconds_total", "pool_wait_seconds", "Time spent waiting for a pooled connection."),
+                ("http_request_serialization_seconds_total", "serialization_seconds", "Time spent building and encoding response schemas."),
+                ("http_request_n_plus_one_total", "n_plus_one", "Requests that repeated one statement shape too many times (debug mode only)."),
+        ):
+            header(name, "counter", help_text)
+            for (method, route), metrics in routes:
+                lines.append(
+                    f'{name}{{{worker},method="{method}",route="{_escape(route)}"}} {getattr(metrics, attribute)}'
+                )
+
+        for name, kind, help_text, value in extra:
+            header(name, kind, help_text)
+            lines.append(f"{name}{{{worker}}} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+# Один реестр на процесс
+metrics_registry = MetricsRegistry()
@@ -0,0 +1,137 @@
+import base64
+import hashlib
+import hmac
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Tuple
+
+import jwt
+
+from src.schemas.user import CurrentUser
+from src.utils.config import TokenSettings, settings
+from src.utils.enums import UserRole
+
+
+class InvalidTokenError(ValueError):
+    """
+    The access token is malformed, expired, signed with another key or revoked.
+    """
+
+
+def create_access_token(user_id: int, role: UserRole, token_version: int, token: TokenSettings = settings.token) -> str:
+    now = datetime.now(timezone.utc)
+    claims = {
+        "sub": str(user_id),
+        "role": role.value,
+        "ver": token_version,
+        "iat": now,
+        "exp": now + timedelta(minutes=token.ACCESS_TOKEN_EXPIRE_MINUTES),
+    }
+    return jwt.encode(claims, token.SECRET_KEY, algorithm=token.ALGORITHM)
+
+
+def decode_access_token(access_token: str, token: TokenSettings = settings.token) -> Tuple[CurrentUser, float]:
+    """
+    Verify the signature and expiry of a token.
+
+    :return: the user from the claims and the token expiry as a unix timestamp.
+    :raises InvalidTokenError: the token cannot be trusted.
+    """
+    try:
+        claims = jwt.decode(
+            access_token, token.SECRET_KEY, algorithms=[token.ALGORITHM], options={"require": ["sub", "exp"]}
+        )
+        user = CurrentUser(id=int(claims["sub"]), role=UserRole(claims["role"]), token_version=claims["ver"])
+    except (jwt.PyJWTError, KeyError, ValueError) as e:
+        raise InvalidTokenError("Could not validate credentials") from e
+    return user, float(claims["exp"])
+
+
+# Параметры scrypt: ~16 МБ памяти и десятки миллисекунд на проверку
+SCRYPT_N = 2 ** 14
+SCRYPT_R = 8
+SCRYPT_P = 1
+
+
+def _scrypt(password: str, salt: bytes, n: int, r: int, p: int) -> bytes:
+    return hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p, maxmem=64 * 1024 * 1024, dklen=32)
+
+
+def hash_password(password: str) -> str:
+    """
+    Hash a password with scrypt and a random salt.
+
+    :return: "scrypt$n$r$p$salt$hash", the parameters are kept so they can
+        be raised later without breaking stored hashes.
+    """
+    salt = os.urandom(16)
+    digest = _scrypt(password, salt, SCRYPT_N, SCRYPT_R, SCRYPT_P)
+    encoded = [base64.b64encode(part).decode() for part in (salt, digest)]
+    return "$".join(["scrypt", str(SCRYPT_N), str(SCRYPT_R), str(SCRYPT_P), *encoded])
+
+
+# Хеш для проверки, когда пользователя нет: ответ не выдаёт, зарегистрирован ли телефон
+_DUMMY_PASSWORD_HASH = hash_password(base64.b64encode(os.urandom(16)).decode())
+
+
+def verify_password(password: str, password_hash: Optional[str]) -> bool:
+    """
+    Check a password against a stored hash in constant time.
+
+    A missing hash is checked against a dummy one and never matches, so an
+    unknown phone takes as long as a wrong password.
+    """
+    try:
+        scheme, n, r, p, salt, digest = (password_hash or _DUMMY_PASSWORD_HASH).split("$")
+        expected = base64.b64decode(digest)
+        actual = _scrypt(password, base64.b64decode(salt), int(n), int(r), int(p))
+    except ValueError:
+        return False
+    return scheme == "scrypt" and password_hash is not None and hmac.compare_digest(actual, expected)
+
+
+class TokenCache:
+    """
+    Bounded LRU cache of verified tokens with a per-entry TTL.
+
+    Keys are SHA-256 hashes of the tokens, so raw tokens are not kept in
+    memory. An entry lives until the TTL passes or the token expires,
+    whichever comes first.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: int) -> None:
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[CurrentUser, float]]" = OrderedDict()
+
+    @staticmethod
+    def key(access_token: str) -> str:
+        return hashlib.sha256(access_token.encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[CurrentUser]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        user, expires_at = entry
+        if expires_at <= time.time():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return user
+
+    def put(self, key: str, user: CurrentUser, token_expires_at: float) -> None:
+        self._entries[key] = (user, min(token_expires_at, time.time() + self.ttl_seconds))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def evict_user(self, user_id: int) -> None:
+        stale = [key for key, (user, _) in self._entries.items() if user.id == user_id]
+        for key in stale:
+            del self._entries[key]
+
+
+# Один кеш на процесс
+token_cache = TokenCache(max_size=settings.token.TOKEN_CACHE_SIZE, ttl_seconds=settings.token.TOKEN_CACHE_TTL_SECONDS)
@@ -0,0 +1,30 @@
+import csv
+import io
+import json
+from datetime import date, datetime
+from enum import Enum
+from typing import Any, Iterable, Sequence
+
+
+def csv_lines(rows: Iterable[Sequence[object]]) -> str:
+    """
+    Encode rows as CSV text, used to write streamed exports in chunks.
+    """
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue()
+
+
+def ndjson_lines(documents: Iterable[Any]) -> str:
+    """
+    Encode documents as newline-delimited JSON, one document per line.
+    """
+    return "".join(json.dumps(document, ensure_ascii=False, default=_json_default) + "\n" for document in documents)
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
@@ -0,0 +1,85 @@
+import os
+
+# Настройки читаются при импорте src.utils.config -- задаём их до импорта приложения
+os.environ.setdefault("SECRET_KEY", "test-secret-key-at-least-32-bytes-long")
+os.environ.setdefault("JOBS_ENABLED", "false")
+
+from typing import AsyncIterator, Sequence
+
+import asyncpg
+import pytest
+from sqlalchemy import Table
+from sqlalchemy.dialects.postgresql.asyncpg import AsyncAdapt_asyncpg_dbapi
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+
+# Модели импортируются через src.db, как в приложении: прямой импорт src.models.models первым зацикливается
+import src.db  # noqa: F401
+
+
+@pytest.fixture
+def anyio_backend() -> str:
+    return "asyncio"
+
+
+@pytest.fixture
+async def sqlite_engine() -> AsyncIterator[AsyncEngine]:
+    # Таблицы с JSONB и TSVECTOR на SQLite не создаются -- тест создаёт только нужные ему
+    engine = create_async_engine("sqlite+aiosqlite://")
+    yield engine
+    await engine.dispose()
+
+
+async def create_tables(engine: AsyncEngine, tables: Sequence[Table]) -> async_sessionmaker:
+    from src.models.models import Base
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all, tables=list(tables))
+    return async_sessionmaker(engine, expire_on_commit=False)
+
+
+def integrity_error(sqlstate: str, constraint: str, table: str = "users") -> IntegrityError:
+    # Так ошибку PostgreSQL отдаёт диалект asyncpg
+    driver_error = asyncpg.PostgresError.new({"C": sqlstate, "M": "violation", "n": constraint, "t": table})
+    dbapi = AsyncAdapt_asyncpg_dbapi(asyncpg)
+    return IntegrityError(f"UPDATE {table} ...", {}, dbapi.IntegrityError("violation", driver_error))
+
+
+@pytest.fixture
+async def pg_session_maker() -> AsyncIterator[async_sessionmaker]:
+    """
+    Sessions on the database from TEST_DATABASE_URL, rolled back after the test.
+
+    The database must have the schema applied (`python main.py migrate`).
+    Everything runs in one outer transaction: commit() inside services only
+    releases a savepoint, so tests never leave data behind.
+    """
+    from src.db.instrumentation import instrument_statements
+
+    engine = create_async_engine(_test_database_url())
+    instrument_statements(engine)
+    async with engine.connect() as conn:
+        await conn.begin()
+        yield async_sessionmaker(bind=conn, expire_on_commit=False, join_transaction_mode="create_savepoint")
+        await conn.rollback()
+    await engine.dispose()
+
+
+@pytest.fixture
+async def pg_engine() -> AsyncIterator[AsyncEngine]:
+    """
+    Engine on the database from TEST_DATABASE_URL, for tests of concurrent transactions.
+
+    Unlike pg_session_maker, commits here are real: the test deletes the
+    rows it created.
+    """
+    engine = create_async_engine(_test_database_url())
+    yield engine
+    await engine.dispose()
+
+
+def _test_database_url() -> str:
+    url = os.getenv("TEST_DATABASE_URL")
+    if not url:
+        pytest.skip("TEST_DATABASE_URL is not set (postgresql+asyncpg://... of a migrated database)")
+    return url
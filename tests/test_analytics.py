@@ -0,0 +1,183 @@
+import random
+import uuid
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Dict, List, Tuple
+from zoneinfo import ZoneInfo
+
+import pytest
+from sqlalchemy import Date, cast, exists, func, select, update
+
+from src.models.models import (
+    Category, DailyProductSales, DailySales, Order, OrderItem, OrderItemTopping, Product, Topping, User
+)
+from src.repositories.analytics import SALES_STATUSES
+from src.services.analytics import AnalyticsRefresher
+from src.utils.enums import DeliveryType, OrderStatus
+
+pytestmark = pytest.mark.anyio
+
+# Пояса по обе стороны от UTC; тест не зависит от ANALYTICS_TIMEZONE
+TIMEZONES = ["Asia/Tomsk", "America/New_York"]
+# 2001 год не пересекается с настоящими заказами; в России тогда ещё переводили часы (25 марта и 28 октября)
+DAYS = [date(2001, 1, 1), date(2001, 1, 2), date(2001, 3, 24), date(2001, 3, 25), date(2001, 10, 28)]
+YEAR_FROM, YEAR_TO = date(2001, 1, 1), date(2001, 12, 31)
+
+DAY_FIELDS = (
+    "orders_count", "revenue", "delivery_orders", "delivery_revenue", "pickup_orders", "pickup_revenue",
+    "order_items_count", "items_with_toppings",
+)
+
+
+def boundary_moments(day: date, tz: str) -> List[datetime]:
+    """
+    Moments around the edges of a local day: the local and the UTC midnights fall on different days.
+    """
+    zone = ZoneInfo(tz)
+    local_midnight = datetime.combine(day, time(), zone)
+    return [
+        local_midnight,
+        local_midnight + timedelta(seconds=1),
+        datetime.combine(day, time(23, 59, 59), zone),
+        datetime.combine(day, time(), timezone.utc),
+        datetime.combine(day, time(23, 30), timezone.utc),
+    ]
+
+
+async def seed_orders(session_maker, tz: str) -> List[Order]:
+    rng = random.Random(17)
+    suffix = uuid.uuid4().hex[:8]
+    async with session_maker() as session:
+        category = Category(name=f"test-{suffix}")
+        products = [Product(name=f"test-{suffix}-{i}", subcategory=category, price=30000 + i * 500) for i in range(4)]
+        toppings = [Topping(name=f"test-{suffix}-{i}", price=2000 + i * 300) for i in range(3)]
+        user = User(name="test", phone=f"+7{suffix}", email=f"test-{suffix}@example.com")
+        session.add_all([category, user, *toppings])
+        await session.flush()
+
+        orders = []
+        for day in DAYS:
+            for moment in boundary_moments(day, tz):
+                items = []
+                for product in rng.sample(products, rng.randint(1, 3)):
+                    item_toppings = rng.sample(toppings, rng.choice([0, 0, 1, 2]))
+                    items.append(OrderItem(
+                        product_id=product.id,
+                        quantity=rng.randint(1, 3),
+                        price=product.price,
+                        toppings=[OrderItemTopping(topping_id=t.id, price=t.price) for t in item_toppings],
+                    ))
+                orders.append(Order(
+                    user_id=user.id,
+                    # updated_at в прошлом: иначе инкрементальный пересчёт счёл бы изменёнными все заказы
+                    created_at=moment,
+                    updated_at=moment,
+                    status=rng.choice(list(OrderStatus)),
+                    delivery_type=rng.choice(list(DeliveryType)),
+                    total_amount=sum(i.quantity * (i.price + sum(t.price for t in i.toppings)) for i in items),
+                    items=items,
+                ))
+        session.add_all(orders)
+        await session.commit()
+        return orders
+
+
+async def group_by_orders(session_maker, tz: str) -> Tuple[Dict[date, dict], Dict[Tuple[date, int], dict]]:
+    """
+    The rollups computed directly from orders with plain GROUP BY queries.
+    """
+    day = cast(func.timezone(tz, Order.created_at), Date).label("day")
+    is_delivery = Order.delivery_type == DeliveryType.DELIVERY
+    in_year = [day >= YEAR_FROM, day <= YEAR_TO, Order.status.in_(SALES_STATUSES)]
+    toppings_price = func.coalesce(
+        select(func.sum(OrderItemTopping.price)).where(OrderItemTopping.order_item_id == OrderItem.id)
+        .scalar_subquery(),
+        0,
+    )
+    has_toppings = exists().where(OrderItemTopping.order_item_id == OrderItem.id)
+
+    orders_stmt = (
+        select(
+            day,
+            func.count(),
+            func.sum(Order.total_amount),
+            func.count().filter(is_delivery),
+            func.coalesce(func.sum(Order.total_amount).filter(is_delivery), 0),
+            func.count().filter(~is_delivery),
+            func.coalesce(func.sum(Order.total_amount).filter(~is_delivery), 0),
+        )
+        .where(*in_year)
+        .group_by(day)
+    )
+    items_stmt = (
+        select(day, func.count(), func.count().filter(has_toppings))
+        .join(OrderItem, OrderItem.order_id == Order.id)
+        .where(*in_year)
+        .group_by(day)
+    )
+    products_stmt = (
+        select(day, OrderItem.product_id, func.sum(OrderItem.quantity),
+               func.sum(OrderItem.quantity * (OrderItem.price + toppings_price)))
+        .join(OrderItem, OrderItem.order_id == Order.id)
+        .where(*in_year)
+        .group_by(day, OrderItem.product_id)
+    )
+    async with session_maker() as session:
+        days = {
+            row[0]: dict(zip(DAY_FIELDS, [*row[1:], 0, 0]))
+            for row in (await session.execute(orders_stmt)).all()
+        }
+        for row_day, items_count, with_toppings in (await session.execute(items_stmt)).all():
+            days[row_day].update(order_items_count=items_count, items_with_toppings=with_toppings)
+        products = {
+            (row_day, product_id): {"quantity": quantity, "revenue": revenue}
+            for row_day, product_id, quantity, revenue in (await session.execute(products_stmt)).all()
+        }
+    return days, products
+
+
+async def read_rollups(session_maker) -> Tuple[Dict[date, dict], Dict[Tuple[date, int], dict]]:
+    async with session_maker() as session:
+        days = {
+            row.day: {field: getattr(row, field) for field in DAY_FIELDS}
+            for row in (await session.execute(
+                select(DailySales).where(DailySales.day >= YEAR_FROM, DailySales.day <= YEAR_TO)
+            )).scalars()
+        }
+        products = {
+            (row.day, row.product_id): {"quantity": row.quantity, "revenue": row.revenue}
+            for row in (await session.execute(
+                select(DailyProductSales).where(DailyProductSales.day >= YEAR_FROM, DailyProductSales.day <= YEAR_TO)
+            )).scalars()
+        }
+    return days, products
+
+
+@pytest.mark.parametrize("tz", TIMEZONES)
+async def test_rollups_match_group_by_over_orders(pg_session_maker, tz):
+    orders = await seed_orders(pg_session_maker, tz)
+    refresher = AnalyticsRefresher(session_maker=pg_session_maker, tz=tz)
+
+    full = await refresher.refresh_once(full=True)
+
+    assert full.refreshed
+    expected = await group_by_orders(pg_session_maker, tz)
+    assert await read_rollups(pg_session_maker) == expected
+
+    # Смена статуса попадает в день создания заказа, а не в день изменения
+    changed = [order for order in orders if order.created_at == datetime.combine(DAYS[1], time(), timezone.utc)]
+    changed += [order for order in orders if order.created_at == datetime.combine(DAYS[3], time(23, 30), timezone.utc)]
+    async with pg_session_maker() as session:
+        for order in changed:
+            status = OrderStatus.CANCELLED if order.status in SALES_STATUSES else OrderStatus.PAID
+            await session.execute(update(Order).where(Order.id == order.id).values(status=status))
+        await session.commit()
+    zone = ZoneInfo(tz)
+    changed_days = {order.created_at.astimezone(zone).date() for order in changed}
+
+    incremental = await refresher.refresh_once()
+
+    assert incremental.refreshed
+    assert {day for day in incremental.days if YEAR_FROM <= day <= YEAR_TO} == changed_days
+    after_changes = await group_by_orders(pg_session_maker, tz)
+    assert after_changes != expected
+    assert await read_rollups(pg_session_maker) == after_changes
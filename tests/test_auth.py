@@ -0,0 +1,51 @@
+from typing import Annotated
+
+import httpx
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.api import dependencies
+from src.api.dependencies import current_user
+from src.models.models import User
+from src.schemas.user import CurrentUser
+from src.utils.security import create_access_token
+from tests.conftest import create_tables
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def file_engine(tmp_path):
+    # Файловая база, чтобы у движка был обычный пул и можно было считать выданные соединения
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'auth.sqlite'}")
+    yield engine
+    await engine.dispose()
+
+
+async def test_streaming_route_does_not_hold_the_auth_connection(file_engine, monkeypatch):
+    session_maker = await create_tables(file_engine, [User.__table__])
+    async with session_maker() as session:
+        user = User(name="Кухня", phone="+70000000001", email="kitchen@example.com")
+        session.add(user)
+        await session.commit()
+    monkeypatch.setattr(dependencies, "session_maker_for", lambda read_only: session_maker)
+
+    app = FastAPI()
+
+    @app.get("/stream")
+    async def stream(user: Annotated[CurrentUser, Depends(current_user)]) -> StreamingResponse:
+        async def body():
+            yield f"{user.id}:{file_engine.pool.checkedout()}"
+        return StreamingResponse(body())
+
+    token = create_access_token(user_id=user.id, role=user.role, token_version=0)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.get("/stream", headers={"Authorization": f"Bearer {token}"})
+        rejected = await client.get("/stream", headers={"Authorization": "Bearer garbage"})
+
+    assert response.status_code == 200
+    assert response.text == f"{user.id}:0"
+    assert rejected.status_code == 401
+    assert file_engine.pool.checkedout() == 0
@@ -0,0 +1,142 @@
+import uuid
+from typing import Tuple
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from src.db.unit_of_work import UnitOfWork
+from src.models.models import Category, Product, ProductTopping, Topping
+from src.repositories.categories import CategoriesRepository
+from src.schemas.category import CategoryCreate, CategoryUpdate
+from src.services.categories import (
+    CategoriesService, CategoryAlreadyExistsError, CategoryCycleError, ParentCategoryNotFoundError
+)
+from src.services.menu import MenuSnapshotService
+from src.utils.metrics import RequestMetrics, current_request
+from tests.conftest import integrity_error
+
+pytestmark = pytest.mark.anyio
+
+
+async def seed_chain(session_maker, depth: int) -> Tuple[int, int]:
+    """
+    A chain of categories `depth` levels below the root, two products with toppings on every level.
+
+    :return: id of the root and the number of categories.
+    """
+    suffix = uuid.uuid4().hex[:8]
+    async with session_maker() as session:
+        topping = Topping(name=f"test-{suffix}", price=3000)
+        root = parent = Category(name=f"test-{suffix}-0")
+        categories = [root]
+        for level in range(1, depth + 1):
+            parent = Category(name=f"test-{suffix}-{level}", parent=parent)
+            categories.append(parent)
+        for category in categories:
+            for i in range(2):
+                product = Product(name=f"{category.name}-{i}", subcategory=category, price=40000)
+                ProductTopping(product=product, topping=topping)
+        session.add(root)
+        await session.commit()
+        return root.id, len(categories)
+
+
+async def count_statements(session_maker, root_id: int) -> Tuple[int, list]:
+    metrics = RequestMetrics()
+    token = current_request.set(metrics)
+    try:
+        async with session_maker() as session:
+            tree = await CategoriesRepository().get_tree(session=session, root_id=root_id, with_products=True)
+    finally:
+        current_request.reset(token)
+    return metrics.statements, tree
+
+
+def walk(nodes):
+    for node in nodes:
+        yield node
+        yield from walk(node.subcategories)
+
+
+async def test_get_tree_round_trips_do_not_depend_on_depth(pg_session_maker):
+    counts = {}
+    for depth in (1, 3, 6):
+        root_id, categories = await seed_chain(pg_session_maker, depth)
+
+        counts[depth], tree = await count_statements(pg_session_maker, root_id)
+
+        nodes = list(walk(tree))
+        assert len(nodes) == categories
+        assert all(len(node.products) == 2 for node in nodes)
+        assert all(len(product.available_toppings) == 1 for node in nodes for product in node.products)
+
+    assert counts[1] == counts[3] == counts[6], counts
+
+
+async def move(session_maker, category_id: int, parent_id: int):
+    async with UnitOfWork(session_maker) as uow:
+        service = CategoriesService(
+            uow=uow, categories_repo=CategoriesRepository(), menu=MenuSnapshotService(session_maker=session_maker)
+        )
+        return await service.update_category(category_id, CategoryUpdate(parent_id=parent_id))
+
+
+async def test_category_cannot_be_moved_into_its_own_subtree(pg_session_maker):
+    root_id, _ = await seed_chain(pg_session_maker, depth=3)
+    _, tree = await count_statements(pg_session_maker, root_id)
+    chain = [node.id for node in walk(tree)]
+
+    for parent_id in chain:
+        with pytest.raises(CategoryCycleError):
+            await move(pg_session_maker, root_id, parent_id)
+    with pytest.raises(CategoryCycleError):
+        await move(pg_session_maker, chain[1], chain[-1])
+
+    # Перенос в другую ветку -- обычное обновление
+    other_root_id, _ = await seed_chain(pg_session_maker, depth=0)
+    moved = await move(pg_session_maker, chain[1], other_root_id)
+    assert moved.parent_id == other_root_id
+
+
+class FailingCategoriesRepository(CategoriesRepository):
+    def __init__(self, error: IntegrityError) -> None:
+        self.error = error
+
+    async def create_category(self, session, category_data: dict):
+        raise self.error
+
+    async def update_category(self, session, category_id: int, category_data: dict):
+        raise self.error
+
+    async def lock_tree(self, session) -> None:
+        pass
+
+    async def is_in_subtree(self, session, root_id: int, category_id: int) -> bool:
+        return False
+
+
+class FakeUnitOfWork:
+    session = None
+
+    async def rollback(self) -> None:
+        pass
+
+
+@pytest.mark.parametrize(
+    "sqlstate, constraint, expected",
+    [
+        ("23505", "uq_categories_parent_id_name", CategoryAlreadyExistsError),
+        ("23503", "categories_parent_id_fkey", ParentCategoryNotFoundError),
+        ("23505", "some_other_key", IntegrityError),
+        ("23502", "categories_name_not_null", IntegrityError),
+    ],
+    ids=["duplicate name", "unknown parent", "other unique", "not null"],
+)
+async def test_category_writes_map_integrity_errors(sqlstate, constraint, expected):
+    repo = FailingCategoriesRepository(integrity_error(sqlstate, constraint, table="categories"))
+    service = CategoriesService(uow=FakeUnitOfWork(), categories_repo=repo, menu=None)
+
+    with pytest.raises(expected):
+        await service.create_category(CategoryCreate(name="Шашлык", parent_id=1))
+    with pytest.raises(expected):
+        await service.update_category(2, CategoryUpdate(parent_id=1))
@@ -0,0 +1,143 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Tuple
+
+import pytest
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from src.db.unit_of_work import UnitOfWork
+from src.models.models import Category, DeliverySlot, Product, User
+from src.repositories.delivery_slots import DeliverySlotsRepository
+from src.repositories.idempotency import IdempotencyRepository
+from src.repositories.jobs import JobsRepository
+from src.repositories.orders import OrdersRepository
+from src.schemas.cart import CartCreate
+from src.schemas.delivery_slot import DeliverySlotCapacityUpdate
+from src.services.delivery_slots import DeliverySlotFullError, DeliverySlotsService
+from src.services.orders import OrdersService
+from src.utils.enums import DeliveryType, OrderStatus
+
+pytestmark = pytest.mark.anyio
+
+
+class FakeUnitOfWork:
+    session = None
+
+
+def test_asap_slot_is_the_first_bookable_one():
+    service = DeliverySlotsService(uow=FakeUnitOfWork(), slots_repo=None, slot_minutes=15, lead_minutes=30)
+    now = datetime(2026, 10, 18, 12, 5, tzinfo=timezone.utc)
+
+    # 12:35 попадает в слот 12:30, который начинается раньше чем через 30 минут
+    assert service.get_asap_slot_start(now) == datetime(2026, 10, 18, 12, 45, tzinfo=timezone.utc)
+    assert service.get_asap_slot_start(now) == service.get_slot_start(now + timedelta(minutes=40), now)
+
+
+async def seed_menu(session_maker) -> Tuple[int, int]:
+    """
+    :return: ids of a customer and of a product.
+    """
+    suffix = uuid.uuid4().hex[:8]
+    async with session_maker() as session:
+        user = User(name="test", phone=f"+7{suffix}", email=f"test-{suffix}@example.com")
+        product = Product(name=f"test-{suffix}", subcategory=Category(name=f"test-{suffix}"), price=40000)
+        session.add_all([user, product])
+        await session.commit()
+        return user.id, product.id
+
+
+def orders_service(uow: UnitOfWork) -> OrdersService:
+    return OrdersService(
+        uow=uow,
+        orders_repo=OrdersRepository(),
+        idempotency_repo=IdempotencyRepository(),
+        slots=DeliverySlotsService(uow=uow, slots_repo=DeliverySlotsRepository()),
+        jobs_repo=JobsRepository(),
+    )
+
+
+async def place_asap_order(session_maker, user_id: int, product_id: int):
+    cart = CartCreate(delivery_type=DeliveryType.PICKUP, items=[{"product_id": product_id, "quantity": 1}])
+    async with UnitOfWork(session_maker) as uow:
+        return await orders_service(uow).place_order(cart, user_id=user_id)
+
+
+async def get_slot(session_maker, slot_start: datetime) -> Optional[DeliverySlot]:
+    async with session_maker() as session:
+        return (await session.execute(
+            select(DeliverySlot).where(
+                DeliverySlot.delivery_type == DeliveryType.PICKUP, DeliverySlot.slot_start == slot_start
+            )
+        )).scalars().one_or_none()
+
+
+async def test_asap_order_takes_a_place_and_gives_it_back_on_cancel(pg_session_maker):
+    user_id, product_id = await seed_menu(pg_session_maker)
+
+    order = await place_asap_order(pg_session_maker, user_id, product_id)
+    slot = await get_slot(pg_session_maker, order.delivery_time)
+    reserved = slot.kitchen_reserved
+    assert reserved >= 1
+
+    async with UnitOfWork(pg_session_maker) as uow:
+        await orders_service(uow).change_status(order.id, OrderStatus.CANCELLED)
+
+    slot = await get_slot(pg_session_maker, order.delivery_time)
+    assert slot.kitchen_reserved == reserved - 1
+
+
+async def test_asap_order_is_rejected_when_the_slot_is_full(pg_session_maker):
+    user_id, product_id = await seed_menu(pg_session_maker)
+    order = await place_asap_order(pg_session_maker, user_id, product_id)
+
+    slot = await get_slot(pg_session_maker, order.delivery_time)
+    async with UnitOfWork(pg_session_maker) as uow:
+        await DeliverySlotsService(uow=uow, slots_repo=DeliverySlotsRepository()).set_capacity(
+            delivery_type=DeliveryType.PICKUP,
+            slot_start=order.delivery_time,
+            capacity=DeliverySlotCapacityUpdate(kitchen_capacity=slot.kitchen_reserved, courier_capacity=0),
+        )
+
+    with pytest.raises(DeliverySlotFullError):
+        await place_asap_order(pg_session_maker, user_id, product_id)
+    assert (await get_slot(pg_session_maker, order.delivery_time)).kitchen_reserved == slot.kitchen_reserved
+
+
+@pytest.fixture
+async def free_slot(pg_engine):
+    # Настоящие коммиты: слот далеко за горизонтом, его не займут ни приложение, ни другие тесты
+    session_maker = async_sessionmaker(pg_engine, expire_on_commit=False)
+    slot_start = datetime(2100, 1, 1, tzinfo=timezone.utc) + timedelta(minutes=15 * (uuid.uuid4().int % 10 ** 6))
+    yield session_maker, slot_start
+    async with session_maker() as session:
+        await session.execute(delete(DeliverySlot).where(DeliverySlot.slot_start == slot_start))
+        await session.commit()
+
+
+async def test_concurrent_reservations_do_not_oversell_the_slot(free_slot):
+    session_maker, slot_start = free_slot
+    capacity = 3
+
+    async def reserve() -> bool:
+        async with UnitOfWork(session_maker) as uow:
+            service = DeliverySlotsService(
+                uow=uow, slots_repo=DeliverySlotsRepository(),
+                kitchen_capacity={DeliveryType.PICKUP: capacity}, courier_capacity={DeliveryType.PICKUP: 0},
+            )
+            try:
+                await service.reserve(delivery_type=DeliveryType.PICKUP, slot_start=slot_start)
+            except DeliverySlotFullError:
+                return False
+            # Остальные заказы на слот ждут блокировку строки до коммита
+            await asyncio.sleep(0.05)
+            await uow.commit()
+            return True
+
+    # Строки слота ещё нет: все транзакции одновременно создают её через ON CONFLICT
+    results = await asyncio.wait_for(asyncio.gather(*(reserve() for _ in range(10))), timeout=10)
+
+    assert results.count(True) == capacity
+    slot = await get_slot(session_maker, slot_start)
+    assert (slot.kitchen_capacity, slot.kitchen_reserved) == (capacity, capacity)
@@ -0,0 +1,156 @@
+import asyncio
+import uuid
+from typing import AsyncIterator, List, Tuple
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from src.api import dependencies
+from src.api.dependencies import current_user
+from src.api.routes import orders
+from src.db.unit_of_work import UnitOfWork
+from src.models.models import Category, IdempotencyKey, Job, Order, Product, User
+from src.repositories.delivery_slots import DeliverySlotsRepository
+from src.repositories.idempotency import IdempotencyRepository
+from src.repositories.jobs import JobsRepository
+from src.repositories.orders import OrdersRepository
+from src.schemas.cart import CartCreate
+from src.schemas.user import CurrentUser
+from src.services.delivery_slots import DeliverySlotsService
+from src.services.orders import OrdersService
+from src.utils.enums import DeliveryType, UserRole
+
+pytestmark = pytest.mark.anyio
+
+
+async def seed_customer(session_maker) -> Tuple[int, int, int]:
+    """
+    :return: ids of a customer, of a product and of its category.
+    """
+    suffix = uuid.uuid4().hex[:8]
+    async with session_maker() as session:
+        user = User(name="test", phone=f"+7{suffix}", email=f"test-{suffix}@example.com")
+        category = Category(name=f"test-{suffix}")
+        product = Product(name=f"test-{suffix}", subcategory=category, price=40000)
+        session.add_all([user, product])
+        await session.commit()
+        return user.id, product.id, category.id
+
+
+def cart(product_id: int, quantity: int = 1) -> dict:
+    return {"delivery_type": DeliveryType.PICKUP.value, "items": [{"product_id": product_id, "quantity": quantity}]}
+
+
+async def user_orders(session_maker, user_id: int) -> List[int]:
+    async with session_maker() as session:
+        return list((await session.execute(select(Order.id).where(Order.user_id == user_id))).scalars())
+
+
+@pytest.fixture
+async def customer(pg_session_maker) -> AsyncIterator[Tuple[httpx.AsyncClient, int, int]]:
+    user_id, product_id, _ = await seed_customer(pg_session_maker)
+    app = FastAPI()
+    app.include_router(orders.router)
+
+    async def unit_of_work() -> AsyncIterator[UnitOfWork]:
+        async with UnitOfWork(pg_session_maker) as uow:
+            yield uow
+
+    app.dependency_overrides[dependencies.unit_of_work] = unit_of_work
+    app.dependency_overrides[current_user] = lambda: CurrentUser(id=user_id, role=UserRole.CUSTOMER, token_version=0)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client, user_id, product_id
+
+
+async def test_same_key_replays_the_stored_order(customer, pg_session_maker):
+    client, user_id, product_id = customer
+    headers = {"Idempotency-Key": "checkout-1"}
+
+    first = await client.post("/orders/", json=cart(product_id), headers=headers)
+    replay = await client.post("/orders/", json=cart(product_id), headers=headers)
+
+    assert (first.status_code, replay.status_code) == (201, 201)
+    assert "idempotent-replayed" not in first.headers
+    assert replay.headers["idempotent-replayed"] == "true"
+    assert replay.json() == first.json()
+    assert await user_orders(pg_session_maker, user_id) == [first.json()["id"]]
+
+
+async def test_same_key_with_another_cart_is_rejected(customer, pg_session_maker):
+    client, user_id, product_id = customer
+    headers = {"Idempotency-Key": "checkout-1"}
+
+    first = await client.post("/orders/", json=cart(product_id), headers=headers)
+    other = await client.post("/orders/", json=cart(product_id, quantity=2), headers=headers)
+
+    assert other.status_code == 422
+    assert await user_orders(pg_session_maker, user_id) == [first.json()["id"]]
+
+
+async def test_expired_key_places_a_new_order(customer, pg_session_maker):
+    client, user_id, product_id = customer
+    headers = {"Idempotency-Key": "checkout-1"}
+    first = await client.post("/orders/", json=cart(product_id), headers=headers)
+
+    async with pg_session_maker() as session:
+        await session.execute(
+            update(IdempotencyKey).where(IdempotencyKey.user_id == user_id).values(expires_at=func.now())
+        )
+        await session.commit()
+    # Просроченный ключ, ещё не удалённый очисткой, не мешает новому заказу с другой корзиной
+    second = await client.post("/orders/", json=cart(product_id, quantity=2), headers=headers)
+
+    assert second.status_code == 201
+    assert "idempotent-replayed" not in second.headers
+    assert sorted(await user_orders(pg_session_maker, user_id)) == sorted([first.json()["id"], second.json()["id"]])
+    async with pg_session_maker() as session:
+        stored = (await session.execute(select(IdempotencyKey).where(IdempotencyKey.user_id == user_id))).scalars().one()
+    assert stored.order_id == second.json()["id"]
+
+
+@pytest.fixture
+async def committed_customer(pg_engine) -> AsyncIterator[Tuple[async_sessionmaker, int, int]]:
+    # Настоящие коммиты: конкурирующим запросам нужны разные соединения
+    session_maker = async_sessionmaker(pg_engine, expire_on_commit=False)
+    user_id, product_id, category_id = await seed_customer(session_maker)
+    yield session_maker, user_id, product_id
+    async with session_maker() as session:
+        placed = (await session.execute(
+            select(Order.id, Order.delivery_time).where(Order.user_id == user_id)
+        )).all()
+        for _, slot_start in placed:
+            await DeliverySlotsRepository().release(
+                session=session, delivery_type=DeliveryType.PICKUP, slot_start=slot_start, couriers=0
+            )
+        await session.execute(delete(Job).where(Job.payload["user_id"].as_integer() == user_id))
+        await session.execute(delete(User).where(User.id == user_id))
+        await session.execute(delete(Product).where(Product.id == product_id))
+        await session.execute(delete(Category).where(Category.id == category_id))
+        await session.commit()
+
+
+async def test_concurrent_requests_with_one_key_place_one_order(committed_customer):
+    session_maker, user_id, product_id = committed_customer
+
+    async def place():
+        async with UnitOfWork(session_maker) as uow:
+            service = OrdersService(
+                uow=uow,
+                orders_repo=OrdersRepository(),
+                idempotency_repo=IdempotencyRepository(),
+                slots=DeliverySlotsService(uow=uow, slots_repo=DeliverySlotsRepository()),
+                jobs_repo=JobsRepository(),
+            )
+            return await service.place_order_idempotent(
+                CartCreate.model_validate(cart(product_id)), user_id=user_id, idempotency_key="checkout-1"
+            )
+
+    # Оба запроса не находят ключ; второй ждёт advisory-блокировку и получает заказ первого
+    results = await asyncio.wait_for(asyncio.gather(place(), place()), timeout=10)
+
+    assert sorted(replayed for _, replayed in results) == [False, True]
+    assert results[0][0] == results[1][0]
+    assert await user_orders(session_maker, user_id) == [results[0][0].id]
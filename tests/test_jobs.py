@@ -0,0 +1,221 @@
+import asyncio
+import uuid
+from datetime import timedelta
+from typing import List, Optional
+
+import pytest
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from src.models.models import Job
+from src.repositories.jobs import JobsRepository
+from src.services.jobs import JobRunner, JobSpec, requeue_failed_jobs
+from src.services.providers import FAKE_SENT_HISTORY, FakeSmsProvider, LoggingSmsProvider, sms_provider
+from src.utils.enums import JobStatus, JobType
+
+pytestmark = pytest.mark.anyio
+
+LEASE = timedelta(seconds=60)
+
+
+def test_default_provider_only_logs():
+    assert isinstance(sms_provider, LoggingSmsProvider)
+
+
+async def test_fake_provider_keeps_only_recent_sends():
+    provider = FakeSmsProvider(latency_seconds=0)
+
+    for i in range(FAKE_SENT_HISTORY + 10):
+        await provider.send_sms(phone="+70000000000", text=str(i))
+
+    assert len(provider.sent) == FAKE_SENT_HISTORY
+    assert provider.sent[0].text == "10"
+
+
+async def enqueue(session_maker, count: int = 1, status: JobStatus = JobStatus.QUEUED, attempts: int = 0) -> List[int]:
+    marker = uuid.uuid4().hex
+    async with session_maker() as session:
+        jobs = [
+            Job(job_type=JobType.SEND_SMS, payload={"phone": "+70000000000", "text": f"{marker}-{i}"},
+                status=status, attempts=attempts)
+            for i in range(count)
+        ]
+        session.add_all(jobs)
+        await session.commit()
+        return [job.id for job in jobs]
+
+
+async def get_job(session_maker, job_id: int) -> Optional[Job]:
+    async with session_maker() as session:
+        return (await session.execute(select(Job).where(Job.id == job_id))).scalars().one_or_none()
+
+
+async def claim_own(runner: JobRunner, job_id: int) -> Optional[Job]:
+    # В тестовой базе могут лежать и чужие задачи того же типа
+    jobs = await runner._claim(JobType.SEND_SMS, limit=100)
+    return next((job for job in jobs if job.id == job_id), None)
+
+
+async def failing_handler(payload: dict) -> None:
+    raise RuntimeError("provider is down")
+
+
+async def test_failed_attempts_back_off_and_end_in_failed(pg_session_maker):
+    runner = JobRunner(
+        session_maker=pg_session_maker, enabled=False, max_attempts=3,
+        backoff_base_seconds=10, backoff_max_seconds=15,
+    )
+    spec = JobSpec(handler=failing_handler, concurrency=1)
+    [job_id] = await enqueue(pg_session_maker)
+
+    # Пауза удваивается до потолка, разброс -- от половины до целой паузы
+    for attempt, (low, high) in enumerate([(5, 10), (7.5, 15)], start=1):
+        job = await claim_own(runner, job_id)
+        assert job.attempts == attempt
+        await runner._execute(spec, job)
+
+        async with pg_session_maker() as session:
+            row = (await session.execute(
+                select(Job.status, Job.attempts, Job.last_error, Job.run_at - func.now()).where(Job.id == job_id)
+            )).one()
+        assert row.status == JobStatus.QUEUED
+        assert row.attempts == attempt
+        assert row.last_error == "RuntimeError: provider is down"
+        assert timedelta(seconds=low) <= row[3] <= timedelta(seconds=high)
+        # До срока повтора задачу не берут
+        assert await claim_own(runner, job_id) is None
+
+        async with pg_session_maker() as session:
+            await session.execute(update(Job).where(Job.id == job_id).values(run_at=func.now()))
+            await session.commit()
+
+    job = await claim_own(runner, job_id)
+    await runner._execute(spec, job)
+
+    job = await get_job(pg_session_maker, job_id)
+    assert job.status == JobStatus.FAILED
+    assert job.attempts == 3
+    assert await claim_own(runner, job_id) is None
+
+
+async def test_job_is_claimed_again_after_the_lease(pg_session_maker):
+    runner = JobRunner(session_maker=pg_session_maker, enabled=False, lease_seconds=int(LEASE.total_seconds()))
+    repo = JobsRepository()
+    [job_id] = await enqueue(pg_session_maker)
+
+    first = await claim_own(runner, job_id)
+    assert first.attempts == 1
+    assert await claim_own(runner, job_id) is None
+
+    # Исполнитель пропал: аренда истекла
+    async with pg_session_maker() as session:
+        await session.execute(
+            update(Job).where(Job.id == job_id).values(locked_at=func.now() - LEASE - timedelta(seconds=1))
+        )
+        await session.commit()
+    second = await claim_own(runner, job_id)
+    assert second.attempts == 2
+
+    # Опоздавший первый исполнитель не затирает результат второго
+    async with pg_session_maker() as session:
+        await repo.complete(session=session, job_id=job_id, attempt=first.attempts)
+        await repo.fail(session=session, job_id=job_id, attempt=first.attempts, error="late")
+        await session.commit()
+    job = await get_job(pg_session_maker, job_id)
+    assert (job.status, job.attempts, job.last_error) == (JobStatus.RUNNING, 2, None)
+
+    async with pg_session_maker() as session:
+        await repo.complete(session=session, job_id=job_id, attempt=second.attempts)
+        await session.commit()
+    assert await get_job(pg_session_maker, job_id) is None
+
+
+async def test_requeue_failed_jobs_starts_attempts_over(pg_session_maker):
+    runner = JobRunner(session_maker=pg_session_maker, enabled=False)
+    [job_id] = await enqueue(pg_session_maker, status=JobStatus.FAILED, attempts=5)
+    assert await claim_own(runner, job_id) is None
+
+    assert await requeue_failed_jobs(session_maker=pg_session_maker) >= 1
+
+    job = await claim_own(runner, job_id)
+    assert (job.status, job.attempts) == (JobStatus.RUNNING, 1)
+
+
+@pytest.fixture
+async def jobs_session_maker(pg_engine):
+    # Настоящие коммиты: конкурирующим транзакциям нужны разные соединения
+    session_maker = async_sessionmaker(pg_engine, expire_on_commit=False)
+    created: List[int] = []
+    yield session_maker, created
+    async with session_maker() as session:
+        await session.execute(delete(Job).where(Job.id.in_(created)))
+        await session.commit()
+
+
+async def test_concurrent_claims_skip_locked_jobs(jobs_session_maker):
+    session_maker, created = jobs_session_maker
+    created += await enqueue(session_maker, count=10)
+    repo = JobsRepository()
+
+    async with session_maker() as first, session_maker() as second:
+        # Первая транзакция держит блокировки взятых строк, пока не закончится
+        taken_first = {job.id for job in await repo.claim(first, JobType.SEND_SMS, limit=6, lease=LEASE)}
+        taken_second = {job.id for job in await asyncio.wait_for(
+            repo.claim(second, JobType.SEND_SMS, limit=100, lease=LEASE), timeout=5
+        )}
+        await first.rollback()
+        await second.rollback()
+
+    assert taken_first
+    assert not taken_first & taken_second
+    assert set(created) <= taken_first | taken_second
+
+
+class CountingHandler:
+    """
+    Handler of one runner that remembers how many jobs it ran at the same time.
+    """
+
+    def __init__(self, handled: List[str]) -> None:
+        self.handled = handled
+        self.active = 0
+        self.peak = 0
+
+    async def __call__(self, payload: dict) -> None:
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(0.05)
+            self.handled.append(payload["text"])
+        finally:
+            self.active -= 1
+
+
+async def test_two_runners_run_every_job_once_within_the_concurrency_limit(jobs_session_maker):
+    session_maker, created = jobs_session_maker
+    created += await enqueue(session_maker, count=12)
+    handled: List[str] = []
+    handlers = [CountingHandler(handled) for _ in range(2)]
+
+    runners = [JobRunner(session_maker=session_maker, enabled=True, poll_interval_seconds=0.01) for _ in handlers]
+    for runner, handler in zip(runners, handlers):
+        runner.register(JobType.SEND_SMS, handler, concurrency=2)
+        runner.start()
+    try:
+        for _ in range(500):
+            if not await remaining(session_maker, created):
+                break
+            await asyncio.sleep(0.02)
+    finally:
+        for runner in runners:
+            await runner.stop()
+
+    assert not await remaining(session_maker, created)
+    # Каждая задача выполнена один раз, и ни один исполнитель не превысил свой лимит
+    assert len(handled) == len(set(handled))
+    assert [handler.peak for handler in handlers] == [2, 2]
+
+
+async def remaining(session_maker, job_ids: List[int]) -> List[int]:
+    async with session_maker() as session:
+        return list((await session.execute(select(Job.id).where(Job.id.in_(job_ids)))).scalars())
@@ -0,0 +1,75 @@
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from src.api.dependencies import admin_user, menu_bulk_service
+from src.api.routes import menu
+from src.schemas.menu import MenuDocument, MenuImportReport
+from src.utils.config import settings
+
+pytestmark = pytest.mark.anyio
+
+CSV_MENU = (
+    "kind,category,name,price,description,toppings\r\n"
+    "topping,,Лук,3000,,\r\n"
+    "product,Шашлык/Свинина,Шейка,45000,,Лук\r\n"
+)
+
+
+class FakeMenuBulkService:
+    def __init__(self) -> None:
+        self.documents = []
+
+    async def import_document(self, document: MenuDocument, dry_run: bool = False) -> MenuImportReport:
+        self.documents.append(document)
+        return MenuImportReport(dry_run=dry_run)
+
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setattr(settings.menu, "IMPORT_MAX_BYTES", 1024)
+    return FakeMenuBulkService()
+
+
+@pytest.fixture
+async def client(service):
+    app = FastAPI()
+    app.include_router(menu.router)
+    app.dependency_overrides[admin_user] = lambda: None
+    app.dependency_overrides[menu_bulk_service] = lambda: service
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+
+
+async def chunks(body: bytes, size: int = 100):
+    # Без Content-Length: тело приходит частями (Transfer-Encoding: chunked)
+    for start in range(0, len(body), size):
+        yield body[start:start + size]
+
+
+async def test_import_within_limit(client, service):
+    response = await client.post("/menu/import", content=CSV_MENU.encode(), headers={"Content-Type": "text/csv"})
+
+    assert response.status_code == 200
+    assert [product.name for product in service.documents[0].products] == ["Шейка"]
+
+
+async def test_import_streamed_within_limit(client, service):
+    response = await client.post(
+        "/menu/import", content=chunks(CSV_MENU.encode()), headers={"Content-Type": "text/csv"}
+    )
+
+    assert response.status_code == 200
+    assert len(service.documents) == 1
+
+
+@pytest.mark.parametrize("streamed", [False, True], ids=["content-length", "chunked"])
+async def test_import_over_limit_is_rejected(client, service, streamed):
+    body = (CSV_MENU + "topping,,Соус,3000,,\r\n" * 100).encode()
+
+    response = await client.post(
+        "/menu/import", content=chunks(body) if streamed else body, headers={"Content-Type": "text/csv"}
+    )
+
+    assert response.status_code == 413
+    assert service.documents == []
@@ -0,0 +1,69 @@
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Optional
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+from src.api.dependencies import current_user
+from src.api.routes import metrics, system
+from src.models.models import Order
+from src.schemas.user import CurrentUser
+from src.utils.enums import UserRole
+from src.utils.metrics import RequestMetrics, statement_shape
+
+
+def executed_sql(stmt) -> str:
+    # Текст, который asyncpg получает после раскрытия IN-списков
+    return str(stmt.compile(dialect=postgresql.asyncpg.dialect(), compile_kwargs={"render_postcompile": True}))
+
+
+def in_query(ids_count: int, moments_count: int):
+    now = datetime.now(timezone.utc)
+    return select(Order.id).where(
+        Order.id.in_(list(range(ids_count))),
+        Order.created_at.in_([now] * moments_count),
+        Order.courier_comment == "x",
+    )
+
+
+@pytest.mark.parametrize("ids_count, moments_count", [(1, 1), (3, 2), (50, 7)])
+def test_statement_shape_collapses_asyncpg_in_lists(ids_count, moments_count):
+    sql = executed_sql(in_query(ids_count, moments_count))
+    assert "::INTEGER" in sql and "::TIMESTAMP WITH TIME ZONE" in sql
+
+    shape = statement_shape(sql)
+
+    assert "$" not in shape and "::" not in shape
+    assert "orders.id IN (?) AND orders.created_at IN (?) AND orders.courier_comment = ?" in shape
+
+
+def test_repeated_statements_group_in_lists_of_any_length():
+    metrics = RequestMetrics(statement_counts=Counter())
+    for ids_count in range(1, 6):
+        metrics.record_statement(executed_sql(in_query(ids_count, 1)), 0.001)
+
+    assert [count for _, count in metrics.repeated_statements(threshold=4)] == [5]
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize(
+    "role, status_code",
+    [(None, 401), (UserRole.CUSTOMER, 403), (UserRole.ADMINISTRATOR, 200)],
+    ids=["anonymous", "customer", "administrator"],
+)
+@pytest.mark.parametrize("path", ["/metrics", "/system/pool"])
+async def test_system_endpoints_are_for_administrators(path: str, role: Optional[UserRole], status_code: int):
+    app = FastAPI()
+    app.include_router(metrics.router)
+    app.include_router(system.router)
+    if role is not None:
+        app.dependency_overrides[current_user] = lambda: CurrentUser(id=1, role=role, token_version=0)
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.get(path)
+
+    assert response.status_code == status_code
@@ -0,0 +1,239 @@
+import asyncio
+import uuid
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+
+import pytest
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from src.db.unit_of_work import UnitOfWork
+from src.models.models import Order, User
+from src.repositories.jobs import JobsRepository
+from src.repositories.orders import OrdersRepository
+from src.schemas.order import OrderStatusEvent
+from src.services.order_events import OrderEventsHub
+from src.services.orders import InvalidStatusTransitionError, OrdersService
+from src.utils.enums import DeliveryType, OrderStatus
+
+pytestmark = pytest.mark.anyio
+
+
+def notify(hub: OrderEventsHub, order_id: int, previous_status: OrderStatus, status: OrderStatus) -> None:
+    # Так payload приходит из pg_notify
+    payload = OrderStatusEvent(
+        order_id=order_id,
+        status=status,
+        previous_status=previous_status,
+        delivery_type=DeliveryType.DELIVERY,
+        changed_at=datetime.now(timezone.utc),
+    ).model_dump_json()
+    hub._on_notification(None, 0, hub.channel, payload)
+
+
+def received(subscription) -> list:
+    events = []
+    while not subscription.queue.empty():
+        event = subscription.queue.get_nowait()
+        events.append((event.order_id, event.status))
+    return events
+
+
+async def test_events_reach_matching_subscriptions():
+    hub = OrderEventsHub()
+    kitchen = hub.subscribe(statuses={OrderStatus.PAID, OrderStatus.PREPARING})
+    couriers = hub.subscribe(statuses={OrderStatus.DELIVERING})
+    customer = hub.subscribe(order_id=2)
+    everything = hub.subscribe()
+
+    notify(hub, 1, OrderStatus.PENDING, OrderStatus.PAID)
+    notify(hub, 2, OrderStatus.PAID, OrderStatus.PREPARING)
+    # Заказ уходит из статусов кухни: кухня получает событие, чтобы убрать его с экрана
+    notify(hub, 2, OrderStatus.PREPARING, OrderStatus.DELIVERING)
+    notify(hub, 3, OrderStatus.PENDING, OrderStatus.CANCELLED)
+
+    assert received(kitchen) == [(1, OrderStatus.PAID), (2, OrderStatus.PREPARING), (2, OrderStatus.DELIVERING)]
+    assert received(couriers) == [(2, OrderStatus.DELIVERING)]
+    assert received(customer) == [(2, OrderStatus.PREPARING), (2, OrderStatus.DELIVERING)]
+    assert len(received(everything)) == 4
+
+
+async def test_unsubscribed_and_slow_subscribers():
+    hub = OrderEventsHub()
+    gone = hub.subscribe()
+    slow = hub.subscribe()
+    hub.unsubscribe(gone)
+
+    for order_id in range(slow.queue.maxsize + 5):
+        notify(hub, order_id, OrderStatus.PENDING, OrderStatus.PAID)
+    hub._on_notification(None, 0, hub.channel, "not json")
+
+    assert received(gone) == []
+    # Отстающий подписчик теряет самые старые события, а не тормозит остальных
+    assert [order_id for order_id, _ in received(slow)] == list(range(5, slow.queue.maxsize + 5))
+
+
+async def seed_order(session_maker, status: OrderStatus, delivery_type: DeliveryType) -> Tuple[int, int]:
+    """
+    :return: ids of the order and of its user.
+    """
+    suffix = uuid.uuid4().hex[:8]
+    async with session_maker() as session:
+        user = User(name="test", phone=f"+7{suffix}", email=f"test-{suffix}@example.com")
+        session.add(user)
+        await session.flush()
+        order = Order(user_id=user.id, status=status, delivery_type=delivery_type, total_amount=45000)
+        session.add(order)
+        await session.commit()
+        return order.id, user.id
+
+
+async def change_status(
+        session_maker, order_id: int, status: OrderStatus, orders_repo: Optional[OrdersRepository] = None
+) -> OrderStatusEvent:
+    async with UnitOfWork(session_maker) as uow:
+        service = OrdersService(
+            uow=uow, orders_repo=orders_repo or OrdersRepository(), idempotency_repo=None, slots=None,
+            jobs_repo=JobsRepository(),
+        )
+        return await service.change_status(order_id, status)
+
+
+async def current_status(session_maker, order_id: int) -> OrderStatus:
+    async with session_maker() as session:
+        return (await session.execute(select(Order.status).where(Order.id == order_id))).scalar_one()
+
+
+@pytest.mark.parametrize(
+    "delivery_type, flow",
+    [
+        (DeliveryType.PICKUP, [OrderStatus.PAID, OrderStatus.PREPARING, OrderStatus.COMPLETED]),
+        (DeliveryType.DELIVERY, [OrderStatus.PAID, OrderStatus.PREPARING, OrderStatus.DELIVERING, OrderStatus.COMPLETED]),
+    ],
+)
+async def test_order_goes_through_the_flow_of_its_delivery_type(pg_session_maker, delivery_type, flow):
+    order_id, _ = await seed_order(pg_session_maker, OrderStatus.PENDING, delivery_type)
+
+    previous = OrderStatus.PENDING
+    for status in flow:
+        event = await change_status(pg_session_maker, order_id, status)
+        assert (event.order_id, event.previous_status, event.status) == (order_id, previous, status)
+        assert event.delivery_type == delivery_type
+        previous = status
+    assert await current_status(pg_session_maker, order_id) == OrderStatus.COMPLETED
+
+
+@pytest.mark.parametrize("delivery_type", list(DeliveryType))
+@pytest.mark.parametrize("status", [OrderStatus.PENDING, OrderStatus.PAID, OrderStatus.PREPARING])
+async def test_order_is_cancelled_until_it_leaves_the_kitchen(pg_session_maker, delivery_type, status):
+    order_id, _ = await seed_order(pg_session_maker, status, delivery_type)
+
+    await change_status(pg_session_maker, order_id, OrderStatus.CANCELLED)
+
+    assert await current_status(pg_session_maker, order_id) == OrderStatus.CANCELLED
+
+
+@pytest.mark.parametrize(
+    "delivery_type, current, status",
+    [
+        # Самовывоз не бывает у курьера, доставка не завершается без него
+        (DeliveryType.PICKUP, OrderStatus.PREPARING, OrderStatus.DELIVERING),
+        (DeliveryType.DELIVERY, OrderStatus.PREPARING, OrderStatus.COMPLETED),
+        (DeliveryType.DELIVERY, OrderStatus.PENDING, OrderStatus.PREPARING),
+        (DeliveryType.DELIVERY, OrderStatus.DELIVERING, OrderStatus.CANCELLED),
+        (DeliveryType.PICKUP, OrderStatus.COMPLETED, OrderStatus.CANCELLED),
+        (DeliveryType.DELIVERY, OrderStatus.CANCELLED, OrderStatus.PAID),
+    ],
+)
+async def test_transitions_outside_the_flow_are_rejected(pg_session_maker, delivery_type, current, status):
+    order_id, _ = await seed_order(pg_session_maker, current, delivery_type)
+
+    with pytest.raises(InvalidStatusTransitionError):
+        await change_status(pg_session_maker, order_id, status)
+
+    assert await current_status(pg_session_maker, order_id) == current
+
+
+@pytest.fixture
+async def committed_orders(pg_engine):
+    # NOTIFY доходит только после настоящего коммита, а гонке нужны два соединения
+    session_maker = async_sessionmaker(pg_engine, expire_on_commit=False)
+    user_ids: List[int] = []
+    yield session_maker, user_ids
+    async with session_maker() as session:
+        await session.execute(delete(User).where(User.id.in_(user_ids)))
+        await session.commit()
+
+
+async def test_status_change_reaches_subscribers_through_postgres(pg_engine, committed_orders):
+    session_maker, user_ids = committed_orders
+    order_id, user_id = await seed_order(session_maker, OrderStatus.PENDING, DeliveryType.DELIVERY)
+    user_ids.append(user_id)
+
+    hub = OrderEventsHub(url=pg_engine.url)
+    probe = hub.subscribe(order_id=-1)
+    customer = hub.subscribe(order_id=order_id)
+    stuck = hub.subscribe()
+    for _ in range(stuck.queue.maxsize):
+        stuck.put(OrderStatusEvent(
+            order_id=-2, status=OrderStatus.PAID, previous_status=OrderStatus.PENDING,
+            delivery_type=DeliveryType.PICKUP, changed_at=datetime.now(timezone.utc),
+        ))
+    hub.start()
+    try:
+        # LISTEN устанавливается в фоне: шлём пробные события, пока одно не дойдёт
+        probe_event = OrderStatusEvent(
+            order_id=-1, status=OrderStatus.PAID, previous_status=OrderStatus.PENDING,
+            delivery_type=DeliveryType.PICKUP, changed_at=datetime.now(timezone.utc),
+        ).model_dump_json()
+        for _ in range(100):
+            async with session_maker() as session:
+                await session.execute(select(func.pg_notify(hub.channel, probe_event)))
+                await session.commit()
+            if not probe.queue.empty():
+                break
+            await asyncio.sleep(0.05)
+        assert not probe.queue.empty()
+
+        published = await change_status(session_maker, order_id, OrderStatus.PAID)
+        event = await asyncio.wait_for(customer.queue.get(), timeout=5)
+    finally:
+        await hub.stop()
+
+    assert event == published
+    # Переполненная очередь не задерживает рассылку: из неё вытеснено самое старое событие
+    assert stuck.queue.qsize() == stuck.queue.maxsize
+    assert list(stuck.queue._queue)[-1] == published
+
+
+class RacingOrdersRepository(OrdersRepository):
+    """
+    Lets both transactions read the current status before either of them updates it.
+    """
+
+    def __init__(self, barrier: asyncio.Barrier) -> None:
+        self.barrier = barrier
+
+    async def get_order_state(self, session, order_id: int):
+        state = await super().get_order_state(session=session, order_id=order_id)
+        await self.barrier.wait()
+        return state
+
+
+async def test_concurrent_transitions_from_the_same_status_have_one_winner(committed_orders):
+    session_maker, user_ids = committed_orders
+    order_id, user_id = await seed_order(session_maker, OrderStatus.PAID, DeliveryType.DELIVERY)
+    user_ids.append(user_id)
+    orders_repo = RacingOrdersRepository(asyncio.Barrier(2))
+
+    results = await asyncio.wait_for(asyncio.gather(
+        change_status(session_maker, order_id, OrderStatus.PREPARING, orders_repo),
+        change_status(session_maker, order_id, OrderStatus.CANCELLED, orders_repo),
+        return_exceptions=True,
+    ), timeout=10)
+
+    events = [result for result in results if isinstance(result, OrderStatusEvent)]
+    errors = [result for result in results if isinstance(result, InvalidStatusTransitionError)]
+    assert len(events) == 1 and len(errors) == 1, results
+    assert "concurrently" in str(errors[0])
+    assert await current_status(session_maker, order_id) == events[0].status
@@ -0,0 +1,258 @@
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from typing import List, Optional, Sequence
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import selectinload
+
+from src.db.unit_of_work import UnitOfWork
+from src.models.models import Category, Order, OrderItem, OrderItemTopping, Payment, Product, Topping, User
+from src.repositories.orders import OrdersRepository
+from src.schemas.cart import CartCreate
+from src.schemas.order import OrderSummary
+from src.services.delivery_slots import DeliverySlotsService
+from src.services.orders import CartValidationError, OrdersService
+from src.utils.enums import DeliveryType, OrderStatus
+from src.utils.metrics import RequestMetrics, current_request
+
+pytestmark = pytest.mark.anyio
+
+USER_ID = 1
+OWN_ADDRESS_ID = 10
+PRODUCT_ID = 100
+
+
+class FakeUnitOfWork:
+    session = None
+
+    async def commit(self) -> None:
+        pass
+
+
+class FakeOrdersRepository:
+    """
+    Prices and addresses as get_cart_prices() would return them.
+    """
+
+    def __init__(self) -> None:
+        self.created: List[dict] = []
+
+    async def get_cart_prices(
+            self, session, product_ids: Sequence[int], topping_ids: Sequence[int], user_id: int,
+            address_id: Optional[int],
+    ):
+        product_prices = {PRODUCT_ID: 40000} if PRODUCT_ID in product_ids else {}
+        address_valid = bool(product_prices) and address_id in (None, OWN_ADDRESS_ID) and user_id == USER_ID
+        return product_prices, {}, address_valid
+
+    async def create_order(self, session, order_data: dict, items_data: List[dict]) -> Order:
+        self.created.append(order_data)
+        now = datetime.now(timezone.utc)
+        return Order(id=len(self.created), items=[], created_at=now, updated_at=now, **order_data)
+
+
+class FakeJobsRepository:
+    async def enqueue(self, session, job_type, payload) -> None:
+        pass
+
+
+class FakeDeliverySlots:
+    """
+    Scheduler with always free slots that records the reservations.
+    """
+
+    def __init__(self) -> None:
+        self.service = DeliverySlotsService(uow=FakeUnitOfWork(), slots_repo=None)
+        self.reserved: List[datetime] = []
+
+    def get_slot_start(self, delivery_time: datetime) -> datetime:
+        return self.service.get_slot_start(delivery_time)
+
+    def get_asap_slot_start(self) -> datetime:
+        return self.service.get_asap_slot_start()
+
+    async def reserve(self, delivery_type: DeliveryType, slot_start: datetime) -> None:
+        self.reserved.append(slot_start)
+
+
+def make_service(orders_repo: FakeOrdersRepository, slots: Optional[FakeDeliverySlots] = None) -> OrdersService:
+    return OrdersService(
+        uow=FakeUnitOfWork(), orders_repo=orders_repo, idempotency_repo=None, slots=slots or FakeDeliverySlots(),
+        jobs_repo=FakeJobsRepository(),
+    )
+
+
+def cart(**fields) -> CartCreate:
+    return CartCreate(items=[{"product_id": PRODUCT_ID, "quantity": 2}], **fields)
+
+
+@pytest.mark.parametrize(
+    "fields",
+    [
+        {"address_id": OWN_ADDRESS_ID},
+        {"delivery_type": DeliveryType.PICKUP},
+    ],
+    ids=["delivery to own address", "pickup"],
+)
+async def test_place_order(fields):
+    orders_repo = FakeOrdersRepository()
+    slots = FakeDeliverySlots()
+
+    order = await make_service(orders_repo, slots).place_order(cart(**fields), user_id=USER_ID)
+
+    assert order.total_amount == 80000
+    assert len(orders_repo.created) == 1
+    # Заказ без времени доставки занимает первый доступный слот
+    assert slots.reserved == [order.delivery_time]
+    assert order.delivery_time > datetime.now(timezone.utc)
+
+
+@pytest.mark.parametrize(
+    "fields",
+    [
+        {},
+        {"address_id": OWN_ADDRESS_ID + 1},
+    ],
+    ids=["delivery without address", "address of another user"],
+)
+async def test_place_order_rejects_address(fields):
+    orders_repo = FakeOrdersRepository()
+
+    with pytest.raises(CartValidationError):
+        await make_service(orders_repo).place_order(cart(**fields), user_id=USER_ID)
+    assert orders_repo.created == []
+
+
+async def test_cart_prices_check_address_in_the_same_query():
+    statements = []
+
+    class RecordingSession:
+        async def execute(self, stmt):
+            statements.append(stmt)
+
+            class Result:
+                @staticmethod
+                def all():
+                    return [(PRODUCT_ID, 40000, None, None, True)]
+            return Result()
+
+    prices = await OrdersRepository().get_cart_prices(
+        session=RecordingSession(), product_ids=[PRODUCT_ID], topping_ids=[], user_id=USER_ID,
+        address_id=OWN_ADDRESS_ID,
+    )
+
+    assert prices == ({PRODUCT_ID: 40000}, {}, True)
+    assert len(statements) == 1
+    sql = str(statements[0].compile(dialect=postgresql.asyncpg.dialect()))
+    assert "EXISTS (SELECT * \nFROM user_addresses" in sql
+    assert "user_addresses.user_id = $" in sql
+
+
+@pytest.mark.parametrize("cart_size", [2, 10, 50])
+async def test_create_order_inserts_every_level_in_one_statement(pg_session_maker, cart_size):
+    suffix = uuid.uuid4().hex[:8]
+    async with pg_session_maker() as session:
+        category = Category(name=f"test-{suffix}")
+        products = [Product(name=f"test-{suffix}-{i}", subcategory=category, price=40000 + i) for i in range(cart_size)]
+        toppings = [Topping(name=f"test-{suffix}-{i}", price=3000 + i) for i in range(3)]
+        user = User(name="test", phone=f"+7{suffix}", email=f"test-{suffix}@example.com")
+        session.add_all([category, user, *toppings])
+        await session.commit()
+
+    items_data = [
+        {
+            "product_id": product.id,
+            "quantity": i % 3 + 1,
+            "price": product.price,
+            # Позиции без топпингов, с одним и с двумя
+            "toppings": [{"topping_id": topping.id, "price": topping.price} for topping in toppings[: i % 3]],
+        }
+        for i, product in enumerate(products)
+    ]
+    order_data = {
+        "user_id": user.id,
+        "status": OrderStatus.PENDING,
+        "delivery_type": DeliveryType.PICKUP,
+        "total_amount": 1,
+    }
+
+    metrics = RequestMetrics(statement_counts=Counter())
+    token = current_request.set(metrics)
+    try:
+        async with pg_session_maker() as session:
+            order = await OrdersRepository().create_order(session=session, order_data=order_data, items_data=items_data)
+            await session.commit()
+    finally:
+        current_request.reset(token)
+
+    # Заказ, позиции и топпинги -- по одному INSERT, сколько бы позиций ни было;
+    # SAVEPOINT тестовой сессии не в счёт
+    inserts = {statement: count for statement, count in metrics.statement_counts.items() if statement.startswith("INSERT")}
+    assert sorted(inserts.values()) == [1, 1, 1]
+    assert [(item.product_id, item.quantity, item.price) for item in order.items] == [
+        (item["product_id"], item["quantity"], item["price"]) for item in items_data
+    ]
+    assert [[(t.topping_id, t.price) for t in item.toppings] for item in order.items] == [
+        [(t["topping_id"], t["price"]) for t in item["toppings"]] for item in items_data
+    ]
+
+    async with pg_session_maker() as session:
+        stored = (await session.execute(
+            select(OrderItem)
+            .where(OrderItem.order_id == order.id)
+            .options(selectinload(OrderItem.toppings))
+            .order_by(OrderItem.id)
+        )).scalars().all()
+    assert [(item.id, item.product_id, sorted(t.topping_id for t in item.toppings)) for item in stored] == [
+        (item.id, item.product_id, sorted(t.topping_id for t in item.toppings)) for item in order.items
+    ]
+
+
+async def test_order_history_page_lists_summaries_without_details(pg_session_maker):
+    suffix = uuid.uuid4().hex[:8]
+    async with pg_session_maker() as session:
+        user = User(name="test", phone=f"+7{suffix}", email=f"test-{suffix}@example.com")
+        product = Product(name=f"test-{suffix}", subcategory=Category(name=f"test-{suffix}"), price=40000)
+        topping = Topping(name=f"test-{suffix}", price=3000)
+        session.add_all([user, product, topping])
+        await session.flush()
+        for _ in range(3):
+            order = Order(
+                user_id=user.id, status=OrderStatus.PAID, delivery_type=DeliveryType.PICKUP, total_amount=43000,
+                items=[OrderItem(
+                    product_id=product.id, quantity=1, price=40000,
+                    toppings=[OrderItemTopping(topping_id=topping.id, price=3000)],
+                )],
+            )
+            session.add(order)
+            await session.flush()
+            session.add(Payment(user_id=user.id, order_id=order.id, amount=43000, status="succeeded"))
+        await session.commit()
+
+    metrics = RequestMetrics(statement_counts=Counter())
+    token = current_request.set(metrics)
+    try:
+        async with UnitOfWork(pg_session_maker) as uow:
+            service = OrdersService(
+                uow=uow, orders_repo=OrdersRepository(), idempotency_repo=None, slots=None, jobs_repo=None,
+            )
+            first = await service.get_order_history(user_id=user.id, limit=2)
+            second = await service.get_order_history(user_id=user.id, limit=2, cursor=first.next_cursor)
+    finally:
+        current_request.reset(token)
+
+    # Одна выборка строк заказов на страницу: позиции, топпинги и оплата не загружаются
+    selects = {statement: count for statement, count in metrics.statement_counts.items() if statement.startswith("SELECT")}
+    assert sum(selects.values()) == 2
+    assert all("FROM orders" in statement and "JOIN" not in statement for statement in selects)
+    assert [len(first.orders), len(second.orders)] == [2, 1]
+    assert second.next_cursor is None
+    for summary in [*first.orders, *second.orders]:
+        assert set(summary.model_dump()) == set(OrderSummary.model_fields)
+        assert not {"items", "payment", "address", "user"} & set(summary.model_dump())
+    assert [summary.id for summary in [*first.orders, *second.orders]] == sorted(
+        (summary.id for summary in [*first.orders, *second.orders]), reverse=True
+    )
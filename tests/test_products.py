@@ -0,0 +1,223 @@
+import uuid
+from typing import AsyncIterator, Tuple
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy.exc import IntegrityError
+
+from src.api import dependencies
+from src.api.dependencies import admin_user, menu_snapshot_service
+from src.api.routes import categories, products
+from src.db.unit_of_work import UnitOfWork
+from src.models.models import Category, Order, OrderItem, Product, User
+from src.repositories.categories import CategoriesRepository
+from src.repositories.orders import OrdersRepository
+from src.repositories.products import ProductsRepository
+from src.schemas.product import ProductCreate, ProductUpdate
+from src.services.categories import CategoriesService, CategoryInUseError
+from src.services.menu import MenuSnapshotService
+from src.services.products import (
+    SEARCH_MAX_OFFSET, ProductAlreadyExistsError, ProductsService, SubcategoryNotFoundError
+)
+from src.utils.enums import DeliveryType, OrderStatus
+from tests.conftest import integrity_error
+
+pytestmark = pytest.mark.anyio
+
+
+class FakeUnitOfWork:
+    session = None
+
+    async def rollback(self) -> None:
+        pass
+
+
+class FakeProductsRepository:
+    """
+    Search over a fixed number of matching products.
+    """
+
+    def __init__(self, matches: int) -> None:
+        self.matches = matches
+
+    async def search_products(self, session, query, limit, offset, **filters):
+        return [
+            {"id": i, "name": f"Шашлык {i}", "subcategory_id": 1, "price": 45000, "rank": 1.0}
+            for i in range(offset, min(offset + limit, self.matches))
+        ]
+
+
+async def search(offset: int, limit: int, matches: int = 5000):
+    service = ProductsService(uow=FakeUnitOfWork(), products_repo=FakeProductsRepository(matches), menu=None)
+    return await service.search_products(query="шашлык", limit=limit, offset=offset)
+
+
+@pytest.mark.parametrize(
+    "offset, limit, next_offset",
+    [
+        (0, 20, 20),
+        (980, 20, 1000),
+        (1000, 20, None),
+        (990, 20, None),
+        (960, 50, None),
+    ],
+)
+async def test_next_offset_stops_at_the_last_reachable_page(offset, limit, next_offset):
+    page = await search(offset, limit)
+
+    assert len(page.items) == limit
+    assert page.next_offset == next_offset
+    assert page.next_offset is None or page.next_offset <= SEARCH_MAX_OFFSET
+
+
+async def test_next_offset_is_none_after_the_last_match():
+    page = await search(offset=40, limit=20, matches=55)
+
+    assert [item.id for item in page.items] == list(range(40, 55))
+    assert page.next_offset is None
+
+
+async def seed_ordered_product(session_maker) -> Tuple[int, int, int]:
+    """
+    A product in its own category that is already in an order.
+
+    :return: ids of the category, the product and the order item.
+    """
+    suffix = uuid.uuid4().hex[:8]
+    async with session_maker() as session:
+        category = Category(name=f"test-{suffix}")
+        product = Product(name=f"Шашлык test-{suffix}", subcategory=category, price=45000)
+        user = User(name="test", phone=f"+7{suffix}", email=f"test-{suffix}@example.com")
+        session.add_all([product, user])
+        await session.flush()
+        item = OrderItem(product_id=product.id, quantity=1, price=product.price)
+        session.add(Order(
+            user_id=user.id, status=OrderStatus.COMPLETED, delivery_type=DeliveryType.PICKUP,
+            total_amount=product.price, items=[item],
+        ))
+        await session.commit()
+        return category.id, product.id, item.id
+
+
+async def test_deleted_product_leaves_the_menu_but_not_past_orders(pg_session_maker):
+    category_id, product_id, item_id = await seed_ordered_product(pg_session_maker)
+    menu = MenuSnapshotService(session_maker=pg_session_maker)
+
+    async with UnitOfWork(pg_session_maker) as uow:
+        service = ProductsService(uow=uow, products_repo=ProductsRepository(), menu=menu)
+        assert await service.delete_product(product_id)
+    async with UnitOfWork(pg_session_maker) as uow:
+        service = ProductsService(uow=uow, products_repo=ProductsRepository(), menu=menu)
+        assert not await service.delete_product(product_id)
+        assert await service.update_product(product_id, ProductUpdate(price=50000)) is None
+        assert await service.update_product(product_id, ProductUpdate()) is None
+        page = await service.search_products(query="шашлык", limit=20, subcategory_id=category_id)
+        assert page.items == []
+
+    snapshot = await menu.get()
+    assert product_id not in snapshot.product_by_id
+    assert b'"products":[]' in snapshot.category_by_id[category_id].body
+    async with pg_session_maker() as session:
+        assert (await session.get(OrderItem, item_id)).product_id == product_id
+        prices, _, _ = await OrdersRepository().get_cart_prices(
+            session=session, product_ids=[product_id], topping_ids=[], user_id=0, address_id=None
+        )
+        assert prices == {}
+
+
+async def test_category_with_ordered_products_is_not_deleted(pg_session_maker):
+    category_id, product_id, item_id = await seed_ordered_product(pg_session_maker)
+
+    async with UnitOfWork(pg_session_maker) as uow:
+        service = CategoriesService(uow=uow, categories_repo=CategoriesRepository(), menu=MenuSnapshotService(session_maker=pg_session_maker))
+        with pytest.raises(CategoryInUseError):
+            await service.delete_category(category_id)
+
+    async with pg_session_maker() as session:
+        assert await session.get(OrderItem, item_id) is not None
+
+
+class FailingProductsRepository(ProductsRepository):
+    def __init__(self, error: IntegrityError) -> None:
+        self.error = error
+
+    async def create_product(self, session, product_data: dict):
+        raise self.error
+
+    async def update_product(self, session, product_id: int, product_data: dict):
+        raise self.error
+
+
+@pytest.mark.parametrize(
+    "sqlstate, constraint, expected",
+    [
+        ("23505", "uq_products_subcategory_id_name", ProductAlreadyExistsError),
+        ("23503", "products_subcategory_id_fkey", SubcategoryNotFoundError),
+        ("23505", "some_other_key", IntegrityError),
+        ("23502", "products_price_not_null", IntegrityError),
+    ],
+    ids=["duplicate name", "unknown subcategory", "other unique", "not null"],
+)
+async def test_product_writes_map_integrity_errors(sqlstate, constraint, expected):
+    repo = FailingProductsRepository(integrity_error(sqlstate, constraint, table="products"))
+    service = ProductsService(uow=FakeUnitOfWork(), products_repo=repo, menu=None)
+
+    with pytest.raises(expected):
+        await service.create_product(ProductCreate(name="Шашлык", subcategory_id=1, price=45000))
+    with pytest.raises(expected):
+        await service.update_product(2, ProductUpdate(subcategory_id=1))
+
+
+@pytest.fixture
+async def menu_client(pg_session_maker) -> AsyncIterator[httpx.AsyncClient]:
+    app = FastAPI()
+    app.include_router(categories.router)
+    app.include_router(products.router)
+    menu = MenuSnapshotService(session_maker=pg_session_maker)
+
+    async def unit_of_work() -> AsyncIterator[UnitOfWork]:
+        async with UnitOfWork(pg_session_maker) as uow:
+            yield uow
+
+    app.dependency_overrides[dependencies.unit_of_work] = unit_of_work
+    app.dependency_overrides[menu_snapshot_service] = lambda: menu
+    app.dependency_overrides[admin_user] = lambda: None
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+
+
+async def test_menu_etag_changes_after_every_write(menu_client):
+    suffix = uuid.uuid4().hex[:8]
+    first = await menu_client.get("/categories/")
+    etag = first.headers["etag"]
+
+    cached = await menu_client.get("/categories/", headers={"If-None-Match": etag})
+    assert (cached.status_code, cached.content, cached.headers["etag"]) == (304, b"", etag)
+
+    created = await menu_client.post("/categories/", json={"name": f"test-{suffix}"})
+    assert created.status_code == 201
+    category_id = created.json()["id"]
+    # Снапшот пересобран после записи: старый ETag получает новое дерево, а не 304
+    stale = await menu_client.get("/categories/", headers={"If-None-Match": etag})
+    assert stale.status_code == 200
+    assert stale.headers["etag"] != etag
+    assert f"test-{suffix}" in stale.text
+
+    catalog_etag = (await menu_client.get("/products/")).headers["etag"]
+    created = await menu_client.post(
+        "/products/", json={"name": f"test-{suffix}", "subcategory_id": category_id, "price": 45000}
+    )
+    assert created.status_code == 201
+    product_id = created.json()["id"]
+    product_etag = (await menu_client.get(f"/products/{product_id}")).headers["etag"]
+    assert (await menu_client.get(f"/products/{product_id}", headers={"If-None-Match": product_etag})).status_code == 304
+
+    assert (await menu_client.patch(f"/products/{product_id}", json={"price": 50000})).status_code == 200
+    stale = await menu_client.get(f"/products/{product_id}", headers={"If-None-Match": product_etag})
+    assert stale.status_code == 200
+    assert stale.headers["etag"] != product_etag
+    assert stale.json()["price"] == 50000
+    stale = await menu_client.get("/products/", headers={"If-None-Match": catalog_etag})
+    assert stale.status_code == 200
+    assert stale.headers["etag"] != catalog_etag
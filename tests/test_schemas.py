@@ -0,0 +1,34 @@
+import pytest
+from pydantic import ValidationError
+
+from src.schemas import CategoryUpdate, ProductUpdate, UserUpdate
+
+
+@pytest.mark.parametrize(
+    "schema, payload",
+    [
+        (CategoryUpdate, {"name": None}),
+        (ProductUpdate, {"name": None}),
+        (ProductUpdate, {"subcategory_id": None}),
+        (ProductUpdate, {"price": None}),
+        (UserUpdate, {"name": None}),
+        (UserUpdate, {"email": None}),
+    ],
+)
+def test_update_rejects_null_for_not_null_columns(schema, payload):
+    with pytest.raises(ValidationError):
+        schema.model_validate(payload)
+
+
+@pytest.mark.parametrize(
+    "schema, payload",
+    [
+        (CategoryUpdate, {}),
+        (CategoryUpdate, {"parent_id": None}),
+        (ProductUpdate, {"description": None}),
+        (ProductUpdate, {"name": "Шашлык", "price": 45000}),
+        (UserUpdate, {"email": "user@example.com"}),
+    ],
+)
+def test_update_accepts_omitted_and_nullable_fields(schema, payload):
+    assert schema.model_validate(payload).model_dump(exclude_unset=True) == payload
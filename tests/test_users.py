@@ -0,0 +1,110 @@
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from src.db.unit_of_work import UnitOfWork
+from src.models.models import User
+from src.repositories.jobs import JobsRepository
+from src.repositories.users import UsersRepository
+from src.schemas.user import UserLogin, UserUpdate
+from src.services.users import InvalidCredentialsError, UserAlreadyExistsError, UsersService
+from src.utils.enums import UserRole
+from src.utils.security import TokenCache, decode_access_token, hash_password, verify_password
+from tests.conftest import create_tables, integrity_error
+
+pytestmark = pytest.mark.anyio
+
+
+def test_verify_password():
+    password_hash = hash_password("correct horse")
+
+    assert password_hash.startswith("scrypt$")
+    assert verify_password("correct horse", password_hash)
+    assert not verify_password("wrong horse", password_hash)
+    assert not verify_password("correct horse", None)
+    assert not verify_password("correct horse", "garbage")
+
+
+@pytest.fixture
+async def users_session_maker(sqlite_engine):
+    session_maker = await create_tables(sqlite_engine, [User.__table__])
+    async with session_maker() as session:
+        session.add_all([
+            User(name="Админ", phone="+70000000001", email="admin@example.com", role=UserRole.ADMINISTRATOR,
+                 password_hash=hash_password("admin-password")),
+            # Пользователь, заведённый до появления паролей
+            User(name="Старый", phone="+70000000002", email="old@example.com"),
+        ])
+        await session.commit()
+    return session_maker
+
+
+async def login(session_maker, phone: str, password: str):
+    async with UnitOfWork(session_maker, read_only=True) as uow:
+        service = UsersService(
+            uow=uow, users_repo=UsersRepository(), jobs_repo=JobsRepository(), tokens=TokenCache(10, 60)
+        )
+        return await service.login_user(UserLogin(phone=phone, password=password))
+
+
+async def test_login_with_password_issues_token(users_session_maker):
+    token = await login(users_session_maker, "+70000000001", "admin-password")
+
+    user, _ = decode_access_token(token.access_token)
+    assert user.role == UserRole.ADMINISTRATOR
+    assert token.user.phone == "+70000000001"
+
+
+@pytest.mark.parametrize(
+    "phone, password",
+    [
+        ("+70000000001", "wrong-password"),
+        ("+70000000001", ""),
+        ("+79999999999", "admin-password"),
+        ("+70000000002", ""),
+    ],
+    ids=["wrong password", "empty password", "unknown phone", "no password set"],
+)
+async def test_login_without_valid_password_is_rejected(users_session_maker, phone, password):
+    with pytest.raises(InvalidCredentialsError):
+        await login(users_session_maker, phone, password)
+
+
+class FailingUsersRepository(UsersRepository):
+    def __init__(self, error: IntegrityError) -> None:
+        self.error = error
+
+    async def update_user(self, session, user_id: int, user_data: dict):
+        raise self.error
+
+
+class FakeUnitOfWork:
+    session = None
+
+    async def commit(self) -> None:
+        pass
+
+    async def rollback(self) -> None:
+        pass
+
+
+async def update_profile(error: IntegrityError):
+    service = UsersService(
+        uow=FakeUnitOfWork(), users_repo=FailingUsersRepository(error), jobs_repo=JobsRepository(),
+        tokens=TokenCache(10, 60),
+    )
+    return await service.update_profile(1, UserUpdate(email="taken@example.com"))
+
+
+async def test_update_profile_maps_taken_email_to_conflict():
+    with pytest.raises(UserAlreadyExistsError, match="email"):
+        await update_profile(integrity_error("23505", "users_email_key"))
+
+
+@pytest.mark.parametrize(
+    "sqlstate, constraint",
+    [("23502", "users_name_not_null"), ("23505", "some_other_key"), ("23503", "users_fkey")],
+    ids=["not null", "other unique", "foreign key"],
+)
+async def test_update_profile_does_not_hide_other_integrity_errors(sqlstate, constraint):
+    with pytest.raises(IntegrityError):
+        await update_profile(integrity_error(sqlstate, constraint))